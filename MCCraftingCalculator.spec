@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('recepies.json', '.'), ('recepies', 'recepies'), ('pic', 'pic'), ('LICENSE', '.'), ('NOTICE.md', '.'), ('tools\\\\build\\\\app.ico', '.'), ('tools\\\\build\\\\16x16-minecraft-icon-19.jpg', '.')],
+    datas=[('recepies.json', '.'), ('tags.json', '.'), ('icon_table.json', '.'), ('recepies', 'recepies'), ('icons', 'icons'), ('LICENSE', '.'), ('NOTICE.md', '.'), ('tools\\\\build\\\\app.ico', '.'), ('tools\\\\build\\\\16x16-minecraft-icon-19.jpg', '.')],
     hiddenimports=['tkinter', 'PIL.ImageTk'],
     hookspath=[],
     hooksconfig={},
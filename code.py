@@ -1,3 +1,5 @@
+import heapq
+
 import json
 
 import logging
@@ -5,7 +7,7 @@ import os
 
 from collections import defaultdict
 
-from typing import Dict, Any
+from typing import Dict, Any, Mapping, Optional
 
 from datetime import datetime
 
@@ -22,15 +24,20 @@ def _user_log_file_path() -> str:
         return os.path.join(os.path.expanduser("~"), "minecraft_calculator.log")
 
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s.%(msecs)03d [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        logging.FileHandler(_user_log_file_path(), encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
-)
+def configure_logging():
+
+    # Called once by the app on the main thread before it logs anything;
+    # force replaces any handler an earlier implicit basicConfig installed
+    logging.basicConfig(
+        force=True,
+        level=logging.DEBUG,
+        format="%(asctime)s.%(msecs)03d [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        handlers=[
+            logging.FileHandler(_user_log_file_path(), encoding="utf-8"),
+            logging.StreamHandler(),
+        ],
+    )
 
 
 def load_recipes(path: str) -> Dict[str, Any]:
@@ -40,31 +47,116 @@ def load_recipes(path: str) -> Dict[str, Any]:
         return json.load(f)
 
 
-def calculate_requirements(
-    recipes: Dict[str, Dict[str, int]], item: str, qty: int, expand_all: bool = False
-) -> Dict[str, int]:
+def is_base_material(recipe_item: str, depth: int) -> bool:
 
-    logging.debug(f"Calculating requirements for {qty}x {item}")
+    if any((recipe_item.endswith("_planks") for x in recipe_item.split("_"))):
+
+        return True
+
+    if recipe_item.endswith("_ingot"):
+
+        return True
+
+    if recipe_item.endswith("_block") and (not recipe_item.startswith("stripped_")):
+
+        return True
+
+    return False
+
+
+def _expand_in_order(
+    recipes, item: str, qty: int, expand_all: bool, tags, order: Mapping[str, int]
+) -> Optional[Dict[str, int]]:
+
+    # Every item is expanded once with its summed quantity, highest position
+    # in the topological order (ingredients first) first, so all of its users
+    # are done before it. Returns None when an ingredient does not sit before
+    # its user (a cycle, or recipes changed since the order was built).
+    if item not in order:
+
+        return None
 
     totals = defaultdict(int)
 
-    recipe_stack = []
+    need = {item: qty}
+
+    heap = [(-order[item], item)]
+
+    while heap:
+
+        neg_pos, cur = heapq.heappop(heap)
+
+        cur_qty = need.pop(cur)
+
+        recipe = recipes.get(cur)
+
+        if not recipe or (not expand_all and cur != item and is_base_material(cur, 1)):
+
+            logging.debug(f"Adding material: {cur_qty}x {cur}")
+
+            totals[cur] += cur_qty
+
+            continue
+
+        logging.debug(f"Expanding {cur_qty}x {cur}: {recipe}")
+
+        for sub, sub_q in recipe.items():
 
-    def is_base_material(recipe_item: str, depth: int) -> bool:
+            total_sub_qty = cur_qty * int(sub_q)
 
-        if any((recipe_item.endswith("_planks") for x in recipe_item.split("_"))):
+            if tags is not None and tags.is_tag(sub):
 
-            return True
+                # Tags are leaf materials, as in the recursive walk
+                totals[tags.resolve(sub)] += total_sub_qty
 
-        if recipe_item.endswith("_ingot"):
+                continue
 
-            return True
+            pos = order.get(sub)
 
-        if recipe_item.endswith("_block") and (not recipe_item.startswith("stripped_")):
+            if pos is None or pos >= -neg_pos:
 
-            return True
+                return None
 
-        return False
+            if sub not in need:
+
+                need[sub] = 0
+
+                heapq.heappush(heap, (-pos, sub))
+
+            need[sub] += total_sub_qty
+
+    return dict(totals)
+
+
+def calculate_requirements(
+    recipes: Dict[str, Dict[str, int]],
+    item: str,
+    qty: int,
+    expand_all: bool = False,
+    tags=None,
+    order: Optional[Mapping[str, int]] = None,
+) -> Dict[str, int]:
+
+    logging.debug(f"Calculating requirements for {qty}x {item}")
+
+    # With the cached topological order (item -> position) the tree is
+    # expanded without recursion; the recursive walk below remains the
+    # fallback and is what reports recipe cycles
+    if order is not None:
+
+        totals = _expand_in_order(recipes, item, int(qty), expand_all, tags, order)
+
+        if totals is not None:
+
+            logging.debug(f"Final totals for {qty}x {item}: {totals}")
+
+            return totals
+
+        logging.debug(f"Recipe order does not cover {item}; expanding recursively")
+
+    totals = defaultdict(int)
+
+    recipe_stack = []
 
     def helper(cur_item: str, cur_qty: int, depth=0):
 
@@ -104,6 +196,20 @@ def calculate_requirements(
 
                 total_sub_qty = cur_qty * int(sub_q)
 
+                if tags is not None and tags.is_tag(sub):
+
+                    # A tag means "any member": count its representative as a
+                    # material instead of expanding that item's own recipe
+                    sub = tags.resolve(sub)
+
+                    logging.debug(
+                        f"{indent}Adding tag material: {total_sub_qty}x {sub}"
+                    )
+
+                    totals[sub] += total_sub_qty
+
+                    continue
+
                 logging.debug(
                     f"{indent}Need {total_sub_qty}x {sub} for {cur_qty}x {cur_item}"
                 )
@@ -122,7 +228,10 @@ def calculate_requirements(
 
 
 def aggregate_requirements(
-    recipes: Dict[str, Dict[str, int]], items: Dict[str, int]
+    recipes: Dict[str, Dict[str, int]],
+    items: Dict[str, int],
+    tags=None,
+    order: Optional[Mapping[str, int]] = None,
 ) -> Dict[str, int]:
 
     logging.info(f"Calculating aggregate requirements for items: {items}")
@@ -133,7 +242,9 @@ def aggregate_requirements(
 
         logging.debug(f"Processing requirements for {q}x {itm}")
 
-        sub = calculate_requirements(recipes, itm, q, expand_all=False)
+        sub = calculate_requirements(
+            recipes, itm, q, expand_all=False, tags=tags, order=order
+        )
 
         logging.debug(f"Requirements for {q}x {itm}: {sub}")
 
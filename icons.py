@@ -0,0 +1,788 @@
+import json
+
+import logging
+
+import os
+
+import tkinter as tk
+
+from collections import OrderedDict
+
+from pathlib import Path
+
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Written by tools/build_icon_atlas.py: every pic/*.png pre-resized to each
+# of ICON_SIZES and packed row-major into one sheet per size, all sharing a
+# single stem -> slot index.
+ATLAS_VERSION = 2
+
+ATLAS_INDEX_NAME = "atlas.json"
+
+ICON_SIZE = 20
+
+ICON_SIZES = (16, 20, 32, 48)
+
+# Persisted stem -> (path, atlas slot) picture index, trusted while the
+# directories it was built from keep their mtimes
+MANIFEST_VERSION = 1
+
+# Trailing name parts dropped when looking for a base icon ("stone_bricks"
+# falls back to "stone")
+SUFFIX_TOKENS = {
+    "stairs",
+    "terracotta",
+    "glazed",
+    "stained",
+    "glass",
+    "pane",
+    "block",
+    "ore",
+    "ingot",
+    "nugget",
+    "dust",
+    "tile",
+    "tiles",
+    "bricks",
+    "brick",
+}
+
+WOOD_TYPES = [
+    "oak",
+    "spruce",
+    "birch",
+    "jungle",
+    "acacia",
+    "dark_oak",
+    "mangrove",
+    "cherry",
+    "bamboo",
+    "crimson",
+    "warped",
+]
+
+
+def slot_origin(slot: int, columns: int, size: int) -> Tuple[int, int]:
+
+    return (slot % columns) * size, (slot // columns) * size
+
+
+def pick_icon_size(tk_scaling: float, sizes=ICON_SIZES) -> int:
+
+    # tk scaling is pixels per point: 96 dpi (~1.33) keeps the classic 20 px
+    # icon, higher DPI picks the nearest pyramid level (the larger on a tie)
+    # so nothing is resampled
+    try:
+
+        factor = float(tk_scaling) / (96 / 72)
+
+    except (TypeError, ValueError):
+
+        factor = 1.0
+
+    want = ICON_SIZE * max(factor, 0.5)
+
+    return min(sizes, key=lambda s: (abs(s - want), -s))
+
+
+class IconAtlas:
+
+    # The index is plain data and can be loaded on any thread; the sheet is a
+    # tk.PhotoImage, so it is decoded lazily by the first photo() call, which
+    # must happen on the Tk thread.
+
+    def __init__(self, image_path: Path, stems: Dict[str, int], columns: int, size: int):
+
+        self.image_path = Path(image_path)
+
+        self.stems = stems
+
+        self.columns = columns
+
+        self.size = size
+
+        self._sheet = None
+
+    def __contains__(self, stem) -> bool:
+
+        return stem in self.stems
+
+    def __len__(self) -> int:
+
+        return len(self.stems)
+
+    def rect(self, stem: str) -> Tuple[int, int, int, int]:
+
+        x, y = slot_origin(self.stems[stem], self.columns, self.size)
+
+        return x, y, x + self.size, y + self.size
+
+    def photo(self, stem: str, master=None) -> Optional[tk.PhotoImage]:
+
+        if stem not in self.stems:
+
+            return None
+
+        if self._sheet is None:
+
+            self._sheet = tk.PhotoImage(master=master, file=str(self.image_path))
+
+        x0, y0, x1, y1 = self.rect(stem)
+
+        photo = tk.PhotoImage(master=master, width=self.size, height=self.size)
+
+        photo.tk.call(photo, "copy", self._sheet, "-from", x0, y0, x1, y1)
+
+        return photo
+
+
+def load_icon_table(path: Path) -> Dict[str, Optional[str]]:
+
+    # Frozen item key -> picture stem (None = no icon) written by
+    # tools/build_icon_table.py with the same IconIndex rules
+    try:
+
+        with open(path, "r", encoding="utf-8") as f:
+
+            data = json.load(f)
+
+    except FileNotFoundError:
+
+        return {}
+
+    except Exception as e:
+
+        logging.warning(f"Failed to read icon table {path}: {e}")
+
+        return {}
+
+    return data.get("icons", {}) if isinstance(data, dict) else {}
+
+
+def decode_icon(path: Path, size: int = ICON_SIZE) -> Tuple[int, int, bytes]:
+
+    # Safe to run on a worker thread: touches PIL only, no Tk. Returns raw
+    # RGBA bytes the Tk thread wraps in a PhotoImage.
+    from PIL import Image
+
+    with Image.open(path) as img:
+
+        if img.mode != "RGBA":
+
+            img = img.convert("RGBA")
+
+        img = img.resize((size, size), Image.Resampling.LANCZOS)
+
+        return img.width, img.height, img.tobytes()
+
+
+def user_icon_path(cache_dir: Path, stem: str, size: int) -> Path:
+
+    return Path(cache_dir) / str(size) / f"{stem}.png"
+
+
+def cached_user_icon(src: Path, cache_dir: Path, stem: str, size: int) -> Optional[Path]:
+
+    # The normalized copy is valid while it is not older than the picked file
+    path = user_icon_path(cache_dir, stem, size)
+
+    mtime = _mtime_ns(path)
+
+    if mtime < 0 or mtime < _mtime_ns(src):
+
+        return None
+
+    return path
+
+
+def normalize_user_icon(
+    src: Path, cache_dir: Path, stem: str, sizes=ICON_SIZES
+) -> Dict[int, Path]:
+
+    # Decode a user-picked image once and store it at every pyramid size,
+    # so later sessions load a ready-sized PNG instead of resampling it
+    from PIL import Image
+
+    out = {}
+
+    with Image.open(src) as img:
+
+        if img.mode != "RGBA":
+
+            img = img.convert("RGBA")
+
+        for size in sizes:
+
+            path = user_icon_path(cache_dir, stem, size)
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            tmp = path.with_name(path.name + ".tmp")
+
+            img.resize((size, size), Image.Resampling.LANCZOS).save(tmp, format="PNG")
+
+            os.replace(tmp, path)
+
+            out[size] = path
+
+    return out
+
+
+def decode_user_icon(
+    src: Path, cache_dir: Path, stem: str, size: int
+) -> Tuple[int, int, bytes]:
+
+    # Worker-thread variant for pictures picked before the cache existed:
+    # fills the cache, then returns the requested size like decode_icon
+    paths = normalize_user_icon(src, cache_dir, stem)
+
+    return decode_icon(paths.get(size, src), size)
+
+
+def load_icon_atlas(icons_dir: Path, size: int = ICON_SIZE) -> Optional[IconAtlas]:
+
+    index_path = Path(icons_dir) / ATLAS_INDEX_NAME
+
+    try:
+
+        with open(index_path, "r", encoding="utf-8") as f:
+
+            data = json.load(f)
+
+    except FileNotFoundError:
+
+        return None
+
+    except Exception as e:
+
+        logging.warning(f"Failed to read icon atlas index {index_path}: {e}")
+
+        return None
+
+    if data.get("version") != ATLAS_VERSION:
+
+        logging.info(f"Ignoring icon atlas {index_path}: version {data.get('version')}")
+
+        return None
+
+    sheets = {int(k): v for k, v in data.get("sheets", {}).items()}
+
+    if not sheets:
+
+        return None
+
+    if size not in sheets:
+
+        size = min(sheets, key=lambda s: (abs(s - size), -s))
+
+    image_path = index_path.parent / sheets[size]
+
+    if not image_path.exists():
+
+        return None
+
+    return IconAtlas(image_path, data["stems"], data["columns"], size)
+
+
+def _mtime_ns(path: Path) -> int:
+
+    try:
+
+        return os.stat(path).st_mtime_ns
+
+    except OSError:
+
+        return -1
+
+
+def _manifest_key(dirs: List[Path], atlas: Optional[IconAtlas]) -> Dict:
+
+    atlas_index = atlas.image_path.parent / ATLAS_INDEX_NAME if atlas else None
+
+    return {
+        "dirs": {str(d): _mtime_ns(d) for d in dirs},
+        "atlas": _mtime_ns(atlas_index) if atlas_index else -1,
+    }
+
+
+def scan_pictures(
+    pic_dir: Path, user_pic_dir: Path, atlas: Optional[IconAtlas] = None
+) -> Dict[str, Path]:
+
+    index = {}
+
+    try:
+
+        for p in sorted(pic_dir.glob("*.png")):
+
+            index[p.stem.lower()] = p
+
+    except Exception:
+
+        pass
+
+    # Atlas-only icons get their would-be pic/ path; the app serves any pic/
+    # path the atlas knows from the sheet
+    for stem in atlas.stems if atlas else ():
+
+        index.setdefault(stem, pic_dir / f"{stem}.png")
+
+    try:
+
+        for p in sorted(user_pic_dir.glob("*.png")):
+
+            index[p.stem.lower()] = p
+
+    except Exception:
+
+        pass
+
+    return index
+
+
+def _save_manifest(manifest_path: Path, data: Dict):
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = manifest_path.with_name(manifest_path.name + ".tmp")
+
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+
+    os.replace(tmp, manifest_path)
+
+
+def _read_manifest(manifest_path: Path) -> Optional[Dict]:
+
+    try:
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+
+            data = json.load(f)
+
+    except FileNotFoundError:
+
+        return None
+
+    except Exception as e:
+
+        logging.warning(f"Ignoring unreadable icon manifest {manifest_path}: {e}")
+
+        return None
+
+    if data.get("version") != MANIFEST_VERSION:
+
+        return None
+
+    return data
+
+
+def load_picture_index(
+    pic_dir: Path,
+    user_pic_dir: Path,
+    manifest_path: Path,
+    atlas: Optional[IconAtlas] = None,
+) -> Dict[str, Path]:
+
+    # One stat per directory instead of a glob when nothing changed; slow
+    # network-mounted profile folders make the glob the expensive part
+    key = _manifest_key([pic_dir, user_pic_dir], atlas)
+
+    data = _read_manifest(manifest_path)
+
+    if (
+        data is not None
+        and data.get("dirs") == key["dirs"]
+        and data.get("atlas") == key["atlas"]
+    ):
+
+        logging.debug(f"Using icon manifest {manifest_path}")
+
+        return {stem: Path(entry[0]) for stem, entry in data["entries"].items()}
+
+    index = scan_pictures(pic_dir, user_pic_dir, atlas)
+
+    entries = {
+        stem: [str(path), atlas.stems.get(stem) if atlas else None]
+        for stem, path in index.items()
+    }
+
+    try:
+
+        _save_manifest(
+            manifest_path, {"version": MANIFEST_VERSION, **key, "entries": entries}
+        )
+
+    except Exception as e:
+
+        logging.warning(f"Failed to write icon manifest {manifest_path}: {e}")
+
+    return index
+
+
+def record_picture(manifest_path: Path, stem: str, path: Path):
+
+    # Incremental update after a user picks an image: add the entry and
+    # re-stamp only the directory it was written to
+    data = _read_manifest(manifest_path)
+
+    if data is None:
+
+        return
+
+    path = Path(path)
+
+    dirs = data.get("dirs", {})
+
+    if str(path.parent) not in dirs:
+
+        return
+
+    dirs[str(path.parent)] = _mtime_ns(path.parent)
+
+    data["entries"][stem] = [str(path), None]
+
+    _save_manifest(manifest_path, data)
+
+
+class IconIndex:
+
+    # Picks the picture stem for an item key. Exact and suffixed names are
+    # dict hits; the fuzzy fallbacks use an index built once:
+    #   segment -> stems, so "every token is a substring of the stem" only
+    #     checks the (small) segment vocabulary. Tokens hold no "_", so a
+    #     token can only ever match inside a single segment.
+    #   prefix -> best stem, for "stem starts with base_key + '_'".
+    # Every answer, including "no icon", is memoized until the index changes.
+
+    def __init__(self, stems: Iterable[str] = ()):
+
+        self.order: Dict[str, int] = {}
+
+        self._segments: Dict[str, Set[str]] = {}
+
+        self._prefix_best: Dict[str, str] = {}
+
+        self._token_memo: Dict[str, Set[str]] = {}
+
+        self._memo: Dict[str, Optional[str]] = {}
+
+        for stem in stems:
+
+            self._index(stem)
+
+    def __contains__(self, stem) -> bool:
+
+        return stem in self.order
+
+    def __len__(self) -> int:
+
+        return len(self.order)
+
+    def _index(self, stem: str):
+
+        if stem in self.order:
+
+            return
+
+        self.order[stem] = len(self.order)
+
+        for seg in stem.split("_"):
+
+            self._segments.setdefault(seg, set()).add(stem)
+
+        rank = (len(stem.split("_")), stem)
+
+        for i, ch in enumerate(stem):
+
+            if ch != "_":
+
+                continue
+
+            prefix = stem[:i]
+
+            best = self._prefix_best.get(prefix)
+
+            if best is None or rank < (len(best.split("_")), best):
+
+                self._prefix_best[prefix] = stem
+
+    def add(self, stem: str):
+
+        if stem in self.order:
+
+            return
+
+        self._index(stem)
+
+        self._token_memo.clear()
+
+        self._memo.clear()
+
+    def _stems_with(self, token: str) -> Set[str]:
+
+        found = self._token_memo.get(token)
+
+        if found is None:
+
+            found = set()
+
+            for seg, stems in self._segments.items():
+
+                if token in seg:
+
+                    found |= stems
+
+            self._token_memo[token] = found
+
+        return found
+
+    def _containing_all(self, tokens: List[str]) -> Optional[str]:
+
+        # First stem in index order whose name contains every token
+        if not tokens:
+
+            return next(iter(self.order), None)
+
+        sets = sorted((self._stems_with(t) for t in tokens), key=len)
+
+        matches = set(sets[0]).intersection(*sets[1:])
+
+        if not matches:
+
+            return None
+
+        return min(matches, key=self.order.__getitem__)
+
+    def resolve(self, key: str) -> Optional[str]:
+
+        if key in self._memo:
+
+            return self._memo[key]
+
+        stem = self._resolve(key)
+
+        self._memo[key] = stem
+
+        return stem
+
+    def _resolve(self, key: str) -> Optional[str]:
+
+        for suffix in ("", "_top", "_side", "_front"):
+
+            if key + suffix in self.order:
+
+                return key + suffix
+
+        tokens = [t for t in key.split("_") if t]
+
+        best = self._containing_all(tokens)
+
+        if best is not None:
+
+            return best
+
+        btokens = tokens[:]
+
+        while btokens and btokens[-1] in SUFFIX_TOKENS:
+
+            btokens.pop()
+
+        if btokens:
+
+            base_key = "_".join(btokens)
+
+            if base_key in self.order:
+
+                return base_key
+
+            if len(btokens) == 1 and btokens[0] in WOOD_TYPES:
+
+                if f"{btokens[0]}_planks" in self.order:
+
+                    return f"{btokens[0]}_planks"
+
+            best = self._prefix_best.get(base_key)
+
+            if best is not None:
+
+                return best
+
+        for wt in WOOD_TYPES:
+
+            if wt in key:
+
+                if f"{wt}_planks" in self.order:
+
+                    return f"{wt}_planks"
+
+                break
+
+        return None
+
+
+class IconCache:
+
+    # LRU of item name -> PhotoImage (or None for "no icon"), bounded by the
+    # pixel bytes of the distinct images it holds. Several names may share
+    # one image (tag aliases); it is counted once and freed with the last
+    # name. Names returned by pinned() (rows currently in a Treeview) are
+    # never evicted, since dropping the last reference deletes the Tk image
+    # under the row.
+
+    def __init__(self, max_bytes: int, pinned: Optional[Callable[[], Set[str]]] = None):
+
+        self.max_bytes = max_bytes
+
+        self.pinned = pinned
+
+        self._entries: "OrderedDict[str, object]" = OrderedDict()
+
+        self._users: Dict[int, int] = {}
+
+        self.bytes = 0
+
+        self.hits = 0
+
+        self.misses = 0
+
+        self.evictions = 0
+
+    def __len__(self) -> int:
+
+        return len(self._entries)
+
+    def __contains__(self, name) -> bool:
+
+        return name in self._entries
+
+    @staticmethod
+    def _cost(photo) -> int:
+
+        try:
+
+            return int(photo.width()) * int(photo.height()) * 4
+
+        except Exception:
+
+            return 0
+
+    def lookup(self, name: str) -> Tuple[bool, object]:
+
+        if name in self._entries:
+
+            self._entries.move_to_end(name)
+
+            self.hits += 1
+
+            return True, self._entries[name]
+
+        self.misses += 1
+
+        return False, None
+
+    def put(self, name: str, photo):
+
+        self.pop(name)
+
+        self._entries[name] = photo
+
+        if photo is not None:
+
+            key = id(photo)
+
+            if key not in self._users:
+
+                self.bytes += self._cost(photo)
+
+            self._users[key] = self._users.get(key, 0) + 1
+
+        if self.bytes > self.max_bytes:
+
+            self._evict()
+
+    def pop(self, name: str, default=None):
+
+        if name not in self._entries:
+
+            return default
+
+        photo = self._entries.pop(name)
+
+        if photo is not None:
+
+            key = id(photo)
+
+            left = self._users.get(key, 1) - 1
+
+            if left <= 0:
+
+                self._users.pop(key, None)
+
+                self.bytes -= self._cost(photo)
+
+            else:
+
+                self._users[key] = left
+
+        return photo
+
+    def forget_misses(self):
+
+        for name in [n for n, p in self._entries.items() if p is None]:
+
+            del self._entries[name]
+
+    def _evict(self):
+
+        pinned = set()
+
+        if self.pinned is not None:
+
+            try:
+
+                pinned = set(self.pinned())
+
+            except Exception:
+
+                pinned = set()
+
+        for name in list(self._entries):
+
+            if self.bytes <= self.max_bytes:
+
+                break
+
+            # Misses hold no pixels, so dropping them frees nothing
+            if name in pinned or self._entries[name] is None:
+
+                continue
+
+            self.pop(name)
+
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+
+        total = self.hits + self.misses
+
+        return {
+            "entries": len(self._entries),
+            "images": len(self._users),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def describe(self) -> str:
+
+        st = self.stats()
+
+        return (
+            f"{st['entries']} names, {st['images']} images, "
+            f"{st['bytes'] / 1024:.0f}/{st['max_bytes'] / 1024:.0f} KB, "
+            f"hit rate {st['hit_rate']:.1%} ({st['hits']}/{st['hits'] + st['misses']}), "
+            f"{st['evictions']} evicted"
+        )
@@ -1,3 +1,8 @@
+import startup_profile
+
+# No-op unless MCCC_PROFILE_STARTUP is set; must run before the other imports
+startup_profile.install()
+
 import json
 
 import copy
@@ -14,15 +19,64 @@ import tkinter.font as tkfont
 
 from pathlib import Path
 import os
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from code import (
+    load_recipes,
+    calculate_requirements,
+    aggregate_requirements,
+    configure_logging,
+)
+
+from recipe_cache import compile_recipes, load_recipes_cached, open_mapped_recipes
+
+from tags import load_tag_index
+
+from icons import (
+    IconCache,
+    IconIndex,
+    cached_user_icon,
+    decode_icon,
+    decode_user_icon,
+    load_icon_atlas,
+    load_icon_table,
+    load_picture_index,
+    normalize_user_icon,
+    pick_icon_size,
+    record_picture,
+)
+
+from materials_canvas import VIEW_ENV, MaterialsGrid, split_qty
+
+from search import (
+    SUGGEST_DEBOUNCE_MS,
+    SearchIndex,
+    SuggestionPopup,
+    ingredient_counts,
+)
 
-from PIL import Image, ImageTk
+startup_profile.mark("imports")
 
-from code import load_recipes, calculate_requirements, aggregate_requirements
+# Before the first log call, or logging falls back to its implicit stderr
+# WARNING setup and the log file is never attached
+configure_logging()
 
 BASE = Path(__file__).parent
 
 
+def _pil():
+
+    # PIL is imported on first use (the window icon or the first item icon),
+    # not before the window is shown
+    from PIL import Image, ImageTk
+
+    return Image, ImageTk
+
+
 def _user_data_dir() -> Path:
     try:
         base = os.getenv("LOCALAPPDATA")
@@ -47,40 +101,87 @@ USER_DIR = _user_data_dir()
 RECIPES_PATHS = [BASE / "recepies.json", BASE / "recipes.json"]
 
 PIC_DIR = BASE / "pic"
+
+# Prebuilt by tools/build_icon_atlas.py; bundled builds ship it instead of pic/
+ICONS_DIR = BASE / "icons"
+
+# Item -> picture stem resolved at build time by tools/build_icon_table.py
+ICON_TABLE_PATH = BASE / "icon_table.json"
 USER_PIC_DIR = USER_DIR / "pic"
 
-RECIPES = {}
-for p in RECIPES_PATHS:
-    if p.exists():
-        try:
-            RECIPES = load_recipes(str(p))
-            break
-        except Exception:
-            RECIPES = {}
+CACHE_DIR = USER_DIR / "cache"
+RECIPE_CACHE_FILE = CACHE_DIR / "recipes.bin"
+ICON_MANIFEST_FILE = CACHE_DIR / "icons.json"
+# User-picked images pre-resized to every icon pyramid size
+USER_ICON_CACHE = CACHE_DIR / "user_icons"
 
-ITEM_IMAGES = {}
-PIC_INDEX = {}
-for p in PIC_DIR.glob("*.png"):
-    try:
-        PIC_INDEX[p.stem.lower()] = p
-    except Exception:
-        pass
+# "dict" decodes recipes into Python dicts; "mmap" serves them read-only from
+# the mapped cache file so large modpacks share pages across processes.
+RECIPE_STORE = os.getenv("MCCC_RECIPE_STORE", "dict").strip().lower()
+
+TAGS_PATH = BASE / "tags.json"
+
+# How "#tag" ingredients pick the item they stand for: "first" member as
+# declared by the datapack, or "alphabetical"; TAG_PREFERRED wins over both.
+TAG_POLICY = os.getenv("MCCC_TAG_POLICY", "first").strip().lower()
+TAG_PREFERRED = {"logs": "oak_log", "logs_that_burn": "oak_log"}
 
 try:
-    USER_PIC_DIR.mkdir(parents=True, exist_ok=True)
-except Exception:
-    pass
-try:
-    for p in USER_PIC_DIR.glob("*.png"):
-        try:
-            PIC_INDEX[p.stem.lower()] = p
-        except Exception:
-            pass
-except Exception:
-    pass
+    TAGS = load_tag_index(TAGS_PATH, policy=TAG_POLICY, preferred=TAG_PREFERRED)
+except ValueError as e:
+    logging.warning(f"{e}; using the 'first' tag policy")
+    TAGS = load_tag_index(TAGS_PATH, preferred=TAG_PREFERRED)
+
+# Recipes, the picture index and suggestions are filled in by the startup
+# worker thread (_load_startup_data); calculations stay off until DATA_READY.
+STARTUP_T0 = time.perf_counter()
+RECIPES = {}
+RECIPE_TABLE = None
+# item -> topological position; lets requirements expand without recursion
+RECIPE_ORDER = None
+ICON_ATLAS = None
+# Bounded by pixel bytes; rows still shown in a tree are pinned (see below)
+ICON_CACHE_BYTES = 8 * 1024 * 1024
+ITEM_IMAGES = IconCache(ICON_CACHE_BYTES)
+PIC_INDEX = {}
+ICON_INDEX = IconIndex()
+ICON_TABLE = {}
+DATA_READY = False
+_STARTUP_QUEUE = queue.Queue()
 
 ALL_MATERIAL_SUGGESTIONS = []
 
+
+def _load_recipe_table():
+
+    for p in RECIPES_PATHS:
+        if p.exists():
+            try:
+                if RECIPE_STORE == "mmap":
+                    table = open_mapped_recipes(p, RECIPE_CACHE_FILE)
+                else:
+                    table = load_recipes_cached(p, RECIPE_CACHE_FILE)
+                return table, table.recipes
+            except Exception as e:
+                logging.warning(f"Compiled recipe load failed for {p.name}: {e}")
+            try:
+                # Compile without the cache so the list-of-variants format
+                # (parse_datapack_recipes --all-variants) loads here too
+                table = compile_recipes(load_recipes(str(p)))
+                return table, table.recipes
+            except Exception as e:
+                logging.error(f"Failed to load recipes from {p.name}: {e}")
+    return None, {}
+
+
+def _scan_pictures(atlas=None):
+
+    try:
+        USER_PIC_DIR.mkdir(parents=True, exist_ok=True)
+    except Exception:
+        pass
+    return load_picture_index(PIC_DIR, USER_PIC_DIR, ICON_MANIFEST_FILE, atlas)
+
 PROJECTS_DIR = USER_DIR / "projects"
 try:
     PROJECTS_DIR.mkdir(parents=True, exist_ok=True)
@@ -127,6 +228,13 @@ AUTOSAVE_MS = 1500
 
 _autosave_after_id = None
 
+# Views marked dirty by handlers; one idle pass re-renders each at most once
+_view_dirty = {"items": False, "materials": False}
+
+_refresh_after_id = None
+
+REFRESH_STATS = {"requests": 0, "coalesced": 0, "passes": 0}
+
 _mat_sort = ("default", False)
 
 
@@ -376,26 +484,45 @@ def list_project_files():
 
 root = tk.Tk()
 
+# Icon edge in pixels for this display, one of the prebuilt pyramid sizes, and
+# the tree row height that fits it (26 px at the classic 20 px icon)
+try:
+    ICON_PX = pick_icon_size(root.tk.call("tk", "scaling"))
+except Exception:
+    ICON_PX = 20
+
+ROW_HEIGHT = ICON_PX + 6
+
 root.title("MC Crafting Calculator - Projects")
 
 _ICON_IMG = None
-try:
-    base_dir = Path(sys.executable).parent if getattr(sys, "frozen", False) else BASE
-    candidates = [
-        base_dir / "16x16-minecraft-icon-19.jpg",
-        BASE / "tools" / "build" / "16x16-minecraft-icon-19.jpg",
-    ]
-    for img_path in candidates:
-        if img_path.exists():
-            try:
-                pil = Image.open(img_path)
-                _ICON_IMG = ImageTk.PhotoImage(pil)
-                root.iconphoto(True, _ICON_IMG)
-                break
-            except Exception:
-                pass
-except Exception:
-    pass
+
+
+def _set_window_icon():
+
+    global _ICON_IMG
+
+    try:
+        base_dir = Path(sys.executable).parent if getattr(sys, "frozen", False) else BASE
+        candidates = [
+            base_dir / "16x16-minecraft-icon-19.jpg",
+            BASE / "tools" / "build" / "16x16-minecraft-icon-19.jpg",
+        ]
+        for img_path in candidates:
+            if img_path.exists():
+                try:
+                    Image, ImageTk = _pil()
+                    pil = Image.open(img_path)
+                    _ICON_IMG = ImageTk.PhotoImage(pil)
+                    root.iconphoto(True, _ICON_IMG)
+                    break
+                except Exception:
+                    pass
+    except Exception:
+        pass
+
+
+root.after_idle(_set_window_icon)
 
 main = ttk.Frame(root, padding=12)
 
@@ -576,7 +703,7 @@ def apply_theme(name: str = "light"):
         fieldbackground=P["tree_bg"],
         foreground=P["text"],
         bordercolor=P["border"],
-        rowheight=26,
+        rowheight=ROW_HEIGHT,
     )
 
     style.configure(
@@ -624,6 +751,18 @@ def apply_theme(name: str = "light"):
 
         pass
 
+    try:
+
+        reset_overlay_metrics()
+
+    except Exception:
+
+        pass
+
+    if materials_grid is not None:
+
+        materials_grid.set_palette(P)
+
     try:
 
         btn_theme.config(text="☀" if name == "dark" else "☾")
@@ -710,7 +849,7 @@ left.grid(row=1, column=0, sticky="nsew", padx=6, pady=6)
 
 ttk.Label(left, text="Item:").grid(row=0, column=0, sticky="w")
 
-ALL_ITEMS = sorted(list(RECIPES.keys()))
+ALL_ITEMS = []
 
 item_var = tk.StringVar()
 
@@ -718,52 +857,17 @@ entry_item = ttk.Combobox(left, textvariable=item_var, values=ALL_ITEMS)
 
 entry_item.grid(row=0, column=1, sticky="ew")
 
-_suggestion_win = None
+ITEM_SEARCH = SearchIndex()
 
-_suggestion_listbox = None
+MATERIAL_SEARCH = SearchIndex()
 
 _tab_pressed = False
 
 
-def _hide_suggestions():
-
-    global _suggestion_win, _suggestion_listbox
-
-    try:
-
-        if _suggestion_win:
-
-            _suggestion_win.destroy()
-
-    except Exception:
-
-        pass
-
-    _suggestion_win = None
-
-    _suggestion_listbox = None
-
-
-def _accept_suggestion(evt=None):
-
-    global _suggestion_listbox
-
-    if not _suggestion_listbox:
-
-        return
-
-    sel = _suggestion_listbox.curselection()
-
-    if not sel:
-
-        return
-
-    value = _suggestion_listbox.get(sel[0])
+def _set_item_from_suggestion(value: str):
 
     item_var.set(value)
 
-    _hide_suggestions()
-
     try:
 
         entry_item.icursor("end")
@@ -773,75 +877,43 @@ def _accept_suggestion(evt=None):
         pass
 
 
-def _show_suggestions(suggestions):
-
-    global _suggestion_win, _suggestion_listbox
-
-    _hide_suggestions()
-
-    if not suggestions:
-
-        return
-
-    try:
-
-        _suggestion_win = tk.Toplevel(root)
-
-        _suggestion_win.wm_overrideredirect(True)
-
-        _suggestion_win.attributes("-topmost", True)
-
-        _suggestion_listbox = tk.Listbox(
-            _suggestion_win,
-            activestyle="dotbox",
-            exportselection=False,
-            selectmode="browse",
-            highlightthickness=0,
-        )
+_item_popup = SuggestionPopup(
+    root, entry_item, _set_item_from_suggestion, palette=lambda: THEME_PALETTE
+)
 
-        try:
+_item_suggest_after = None
 
-            _suggestion_listbox.configure(
-                bg=THEME_PALETTE.get("surface", "#FFFFFF"),
-                fg=THEME_PALETTE.get("text", "#000000"),
-                selectbackground=THEME_PALETTE.get("select", "#DBEAFE"),
-                selectforeground=THEME_PALETTE.get("text", "#000000"),
-                relief="flat",
-                bd=1,
-            )
 
-        except Exception:
+def _hide_suggestions():
 
-            pass
+    _item_popup.hide()
 
-        for s in suggestions:
 
-            _suggestion_listbox.insert("end", s)
+def _accept_suggestion(evt=None):
 
-        _suggestion_listbox.pack(fill="both", expand=True)
+    _item_popup.accept()
 
-        x = entry_item.winfo_rootx()
 
-        y = entry_item.winfo_rooty() + entry_item.winfo_height()
+def _show_suggestions(suggestions):
 
-        width = entry_item.winfo_width()
+    _item_popup.show(suggestions)
 
-        height = min(6, len(suggestions)) * 20
 
-        _suggestion_win.geometry(f"{width}x{height}+{x}+{y}")
+def _run_item_suggestions():
 
-        _suggestion_listbox.bind("<Double-Button-1>", _accept_suggestion)
+    global _item_suggest_after
 
-        _suggestion_listbox.bind("<Return>", _accept_suggestion)
+    _item_suggest_after = None
 
-    except Exception:
+    typed = item_var.get() or ""
 
-        _hide_suggestions()
+    _show_suggestions(ITEM_SEARCH.search(typed) if typed else [])
 
 
 def _update_item_suggestions(event=None):
 
-    global _tab_pressed
+    # Typing bursts collapse into one lookup once input pauses
+    global _tab_pressed, _item_suggest_after
 
     if _tab_pressed:
 
@@ -849,62 +921,24 @@ def _update_item_suggestions(event=None):
 
         return
 
-    typed = item_var.get() or ""
-
-    if typed == "":
-
-        _hide_suggestions()
-
-        return
-
-    lower = typed.lower()
-
-    suggestions = [it for it in ALL_ITEMS if lower in it.lower()]
-
-    if suggestions:
-
-        _show_suggestions(suggestions)
+    if _item_suggest_after is not None:
 
-    else:
+        root.after_cancel(_item_suggest_after)
 
-        _hide_suggestions()
+    _item_suggest_after = root.after(SUGGEST_DEBOUNCE_MS, _run_item_suggestions)
 
 
 def _on_item_tab(event):
 
-    global _suggestion_listbox, _tab_pressed
+    global _tab_pressed
 
     _tab_pressed = True
 
-    if _suggestion_listbox:
+    if _item_popup.is_open:
 
         try:
 
-            sel = _suggestion_listbox.curselection()
-
-            if not sel:
-
-                _suggestion_listbox.selection_clear(0, "end")
-
-                _suggestion_listbox.selection_set(0)
-
-                _suggestion_listbox.activate(0)
-
-                _suggestion_listbox.see(0)
-
-            else:
-
-                current_idx = sel[0]
-
-                next_idx = (current_idx + 1) % _suggestion_listbox.size()
-
-                _suggestion_listbox.selection_clear(0, "end")
-
-                _suggestion_listbox.selection_set(next_idx)
-
-                _suggestion_listbox.activate(next_idx)
-
-                _suggestion_listbox.see(next_idx)
+            _item_popup.cycle()
 
             entry_item.focus_set()
 
@@ -923,21 +957,13 @@ def _on_item_tab(event):
 
 def _on_item_enter(event):
 
-    global _suggestion_listbox
-
-    if _suggestion_listbox:
+    if _item_popup.is_open:
 
         _accept_suggestion()
 
-        entry_qty.focus_set()
-
-        entry_qty.select_range(0, "end")
-
-    else:
-
-        entry_qty.focus_set()
+    entry_qty.focus_set()
 
-        entry_qty.select_range(0, "end")
+    entry_qty.select_range(0, "end")
 
     return "break"
 
@@ -958,14 +984,7 @@ def _on_qty_enter(event):
 
 entry_item.bind("<KeyRelease>", _update_item_suggestions)
 
-entry_item.bind(
-    "<Down>",
-    lambda e: (
-        (_suggestion_listbox.focus_set(), _suggestion_listbox.selection_set(0))
-        if _suggestion_listbox
-        else None
-    ),
-)
+entry_item.bind("<Down>", lambda e: _item_popup.focus_list())
 
 entry_item.bind("<Tab>", _on_item_tab)
 
@@ -1012,292 +1031,170 @@ def _mode_changed(event=None):
 
 mode_combo.bind("<<ComboboxSelected>>", _mode_changed)
 
-btn_add = ttk.Button(left, text="Add")
+btn_add = ttk.Button(left, text="Add", state="disabled")
 
 btn_add.grid(row=2, column=0, columnspan=2, sticky="ew", padx=2, pady=6)
 
-_cust_suggestion_win = None
-
-_cust_suggestion_listbox = None
-
 _cust_tab_pressed = False
 
 
-def _cust_hide_suggestions():
+def _set_custom_from_suggestion(value: str):
 
-    global _cust_suggestion_win, _cust_suggestion_listbox
+    custom_name_var.set(value)
 
     try:
 
-        if _cust_suggestion_win:
-
-            _cust_suggestion_win.destroy()
+        custom_name_combo.icursor("end")
 
     except Exception:
 
         pass
 
-    _cust_suggestion_win = None
 
-    _cust_suggestion_listbox = None
+_cust_suggest_after = None
 
 
-def _cust_accept_suggestion(evt=None):
+def _cust_hide_suggestions():
 
-    global _cust_suggestion_listbox
+    _cust_popup.hide()
 
-    if not _cust_suggestion_listbox:
 
-        return
+def _cust_accept_suggestion(evt=None):
 
-    sel = _cust_suggestion_listbox.curselection()
+    _cust_popup.accept()
 
-    if not sel:
 
-        return
+def _cust_show_suggestions(suggestions):
 
-    value = _cust_suggestion_listbox.get(sel[0])
+    _cust_popup.show(suggestions)
 
-    custom_name_var.set(value)
 
-    _cust_hide_suggestions()
+def _cust_run_suggestions():
 
-    try:
+    global _cust_suggest_after
 
-        custom_name_combo.icursor("end")
+    _cust_suggest_after = None
 
-    except Exception:
+    typed = custom_name_var.get() or ""
 
-        pass
+    _cust_show_suggestions(MATERIAL_SEARCH.search(typed) if typed else [])
 
 
-def _cust_show_suggestions(suggestions):
+def _cust_update_suggestions(event=None):
 
-    global _cust_suggestion_win, _cust_suggestion_listbox
+    global _cust_tab_pressed, _cust_suggest_after
 
-    _cust_hide_suggestions()
+    if _cust_tab_pressed:
 
-    if not suggestions:
+        _cust_tab_pressed = False
 
         return
 
-    try:
+    if _cust_suggest_after is not None:
 
-        _cust_suggestion_win = tk.Toplevel(root)
+        root.after_cancel(_cust_suggest_after)
 
-        _cust_suggestion_win.wm_overrideredirect(True)
+    _cust_suggest_after = root.after(SUGGEST_DEBOUNCE_MS, _cust_run_suggestions)
 
-        _cust_suggestion_win.attributes("-topmost", True)
 
-        _cust_suggestion_listbox = tk.Listbox(
-            _cust_suggestion_win,
-            activestyle="dotbox",
-            exportselection=False,
-            selectmode="browse",
-            highlightthickness=0,
-        )
+def _cust_on_tab(event):
 
-        try:
+    global _cust_tab_pressed
 
-            _cust_suggestion_listbox.configure(
-                bg=THEME_PALETTE.get("surface", "#FFFFFF"),
-                fg=THEME_PALETTE.get("text", "#000000"),
-                selectbackground=THEME_PALETTE.get("select", "#DBEAFE"),
-                selectforeground=THEME_PALETTE.get("text", "#000000"),
-                relief="flat",
-                bd=1,
-            )
+    _cust_tab_pressed = True
 
-        except Exception:
+    if _cust_popup.is_open:
 
-            pass
+        try:
 
-        for s in suggestions:
+            _cust_popup.cycle()
 
-            _cust_suggestion_listbox.insert("end", s)
+            custom_name_combo.focus_set()
 
-        _cust_suggestion_listbox.pack(fill="both", expand=True)
+            return "break"
 
-        x = custom_name_combo.winfo_rootx()
+        except Exception:
 
-        y = custom_name_combo.winfo_rooty() + custom_name_combo.winfo_height()
+            _cust_tab_pressed = False
 
-        width = custom_name_combo.winfo_width()
+    return None
 
-        height = min(6, len(suggestions)) * 20
 
-        _cust_suggestion_win.geometry(f"{width}x{height}+{x}+{y}")
+def _cust_on_enter(event):
 
-        _cust_suggestion_listbox.bind("<Double-Button-1>", _cust_accept_suggestion)
+    if _cust_popup.is_open:
 
-        _cust_suggestion_listbox.bind("<Return>", _cust_accept_suggestion)
+        _cust_accept_suggestion()
 
-    except Exception:
+    try:
 
-        _cust_hide_suggestions()
+        custom_qty_entry.focus_set()
 
+        custom_qty_entry.select_range(0, "end")
 
-def _cust_update_suggestions(event=None):
+    except Exception:
 
-    global _cust_tab_pressed
+        pass
 
-    if _cust_tab_pressed:
+    return "break"
 
-        _cust_tab_pressed = False
 
-        return
+def _cust_on_escape(event):
 
-    typed = custom_name_var.get() or ""
+    _cust_hide_suggestions()
 
-    if typed == "":
+    return "break"
 
-        _cust_hide_suggestions()
 
-        return
+items_tree = ttk.Treeview(
+    left, columns=("item", "qty", "stacks", "del"), show="tree headings", height=12
+)
 
-    lower = typed.lower()
+items_tree.heading("#0", text="Img")
 
-    suggestions = [it for it in ALL_MATERIAL_SUGGESTIONS if lower in it.lower()]
+items_tree.heading("item", text="Item")
 
-    if suggestions:
+items_tree.heading("qty", text="Qty")
 
-        _cust_show_suggestions(suggestions)
+items_tree.heading("stacks", text="Stacks")
 
-    else:
+items_tree.heading("del", text="Remove")
 
-        _cust_hide_suggestions()
+items_tree.column("#0", width=ICON_PX + 20, stretch=False)
 
+items_tree.column("item", width=180, anchor="w", stretch=True)
 
-def _cust_on_tab(event):
+items_tree.column("qty", width=70, anchor="center", stretch=False)
 
-    global _cust_suggestion_listbox, _cust_tab_pressed
+items_tree.column("stacks", width=100, anchor="w", stretch=False)
 
-    _cust_tab_pressed = True
+items_tree.column("del", width=70, anchor="center", stretch=False)
 
-    if _cust_suggestion_listbox:
+items_tree.grid(row=4, column=0, columnspan=2, sticky="nsew")
 
-        try:
+left.columnconfigure(0, weight=1)
 
-            sel = _cust_suggestion_listbox.curselection()
+right = ttk.LabelFrame(main, text="Raw Materials", padding=8)
 
-            if not sel:
+right.grid(row=1, column=1, sticky="nsew", padx=6, pady=6)
 
-                _cust_suggestion_listbox.selection_clear(0, "end")
+custom_frame = ttk.Frame(right)
 
-                _cust_suggestion_listbox.selection_set(0)
+custom_frame.grid(row=0, column=0, sticky="ew", pady=(0, 6))
 
-                _cust_suggestion_listbox.activate(0)
+ttk.Label(custom_frame, text="Add custom material:").pack(side="left", padx=(0, 6))
 
-                _cust_suggestion_listbox.see(0)
+custom_name_var = tk.StringVar()
 
-            else:
+custom_name_combo = ttk.Combobox(
+    custom_frame, textvariable=custom_name_var, values=ALL_MATERIAL_SUGGESTIONS
+)
 
-                current_idx = sel[0]
+custom_name_combo.pack(side="left", padx=(0, 6))
 
-                next_idx = (current_idx + 1) % _cust_suggestion_listbox.size()
-
-                _cust_suggestion_listbox.selection_clear(0, "end")
-
-                _cust_suggestion_listbox.selection_set(next_idx)
-
-                _cust_suggestion_listbox.activate(next_idx)
-
-                _cust_suggestion_listbox.see(next_idx)
-
-            custom_name_combo.focus_set()
-
-            return "break"
-
-        except Exception:
-
-            _cust_tab_pressed = False
-
-    return None
-
-
-def _cust_on_enter(event):
-
-    if _cust_suggestion_listbox:
-
-        _cust_accept_suggestion()
-
-        try:
-
-            custom_qty_entry.focus_set()
-
-            custom_qty_entry.select_range(0, "end")
-
-        except Exception:
-
-            pass
-
-    else:
-
-        try:
-
-            custom_qty_entry.focus_set()
-
-            custom_qty_entry.select_range(0, "end")
-
-        except Exception:
-
-            pass
-
-    return "break"
-
-
-def _cust_on_escape(event):
-
-    _cust_hide_suggestions()
-
-    return "break"
-
-
-items_tree = ttk.Treeview(
-    left, columns=("item", "qty", "stacks", "del"), show="tree headings", height=12
-)
-
-items_tree.heading("#0", text="Img")
-
-items_tree.heading("item", text="Item")
-
-items_tree.heading("qty", text="Qty")
-
-items_tree.heading("stacks", text="Stacks")
-
-items_tree.heading("del", text="Remove")
-
-items_tree.column("#0", width=40, stretch=False)
-
-items_tree.column("item", width=180, anchor="w", stretch=True)
-
-items_tree.column("qty", width=70, anchor="center", stretch=False)
-
-items_tree.column("stacks", width=100, anchor="w", stretch=False)
-
-items_tree.column("del", width=70, anchor="center", stretch=False)
-
-items_tree.grid(row=4, column=0, columnspan=2, sticky="nsew")
-
-left.columnconfigure(0, weight=1)
-
-right = ttk.LabelFrame(main, text="Raw Materials", padding=8)
-
-right.grid(row=1, column=1, sticky="nsew", padx=6, pady=6)
-
-custom_frame = ttk.Frame(right)
-
-custom_frame.grid(row=0, column=0, sticky="ew", pady=(0, 6))
-
-ttk.Label(custom_frame, text="Add custom material:").pack(side="left", padx=(0, 6))
-
-custom_name_var = tk.StringVar()
-
-custom_name_combo = ttk.Combobox(
-    custom_frame, textvariable=custom_name_var, values=ALL_MATERIAL_SUGGESTIONS
-)
-
-custom_name_combo.pack(side="left", padx=(0, 6))
+_cust_popup = SuggestionPopup(
+    root, custom_name_combo, _set_custom_from_suggestion, palette=lambda: THEME_PALETTE
+)
 
 custom_qty_entry = ttk.Entry(custom_frame, width=6)
 
@@ -1317,17 +1214,7 @@ lbl_sorted_by.pack(side="right")
 
 custom_name_combo.bind("<KeyRelease>", _cust_update_suggestions)
 
-custom_name_combo.bind(
-    "<Down>",
-    lambda e: (
-        (
-            _cust_suggestion_listbox.focus_set(),
-            _cust_suggestion_listbox.selection_set(0),
-        )
-        if _cust_suggestion_listbox
-        else None
-    ),
-)
+custom_name_combo.bind("<Down>", lambda e: _cust_popup.focus_list())
 
 custom_name_combo.bind("<Tab>", _cust_on_tab)
 
@@ -1339,6 +1226,21 @@ materials_tree = ttk.Treeview(
     right, columns=("item", "qty", "stacks", "acq"), show="tree headings", height=20
 )
 
+# MCCC_MATERIALS_VIEW=canvas draws the table on one Canvas (materials_grid)
+# instead; materials_view is whichever of the two is shown
+USE_MATERIALS_CANVAS = os.getenv(VIEW_ENV, "").strip().lower() == "canvas"
+
+materials_grid = None
+
+
+def _icons_in_use():
+
+    # Row iids are item names; their images must stay alive while shown
+    return set(items_tree.get_children()) | set(materials_view.get_children())
+
+
+ITEM_IMAGES.pinned = _icons_in_use
+
 materials_tree.heading("#0", text="Img")
 
 materials_tree.heading("item", text="Item")
@@ -1349,7 +1251,7 @@ materials_tree.heading("stacks", text="Stacks")
 
 materials_tree.heading("acq", text="Acquired")
 
-materials_tree.column("#0", width=40, stretch=False)
+materials_tree.column("#0", width=ICON_PX + 20, stretch=False)
 
 materials_tree.column("item", width=200, anchor="w", stretch=True)
 
@@ -1359,7 +1261,46 @@ materials_tree.column("stacks", width=120, anchor="w", stretch=False)
 
 materials_tree.column("acq", width=80, anchor="center", stretch=False)
 
-materials_tree.grid(row=1, column=0, sticky="nsew")
+if USE_MATERIALS_CANVAS:
+
+    materials_grid = MaterialsGrid(
+        right,
+        columns=(
+            ("#0", "Img", ICON_PX + 20, "center", False),
+            ("item", "Item", 200, "w", True),
+            ("qty", "Qty (missing)", 120, "center", False),
+            ("stacks", "Stacks", 120, "w", False),
+            ("acq", "Acquired", 80, "center", False),
+        ),
+        row_height=ROW_HEIGHT,
+        image_for=lambda iid: load_item_image(iid),
+        on_done=lambda rid: _on_row_done_click(rid),
+        on_delete=lambda rid: _on_row_del_click(rid),
+        on_heading=lambda col: _on_mat_heading_click(col),
+        height=20 * ROW_HEIGHT,
+    )
+
+    materials_grid.grid(row=1, column=0, sticky="nsew")
+
+    materials_view = materials_grid
+
+else:
+
+    materials_tree.grid(row=1, column=0, sticky="nsew")
+
+    materials_view = materials_tree
+
+# The tree only holds the rows in view, so it cannot drive a scrollbar
+# itself; _mat_yview maps the bar onto the full materials model
+materials_scroll = ttk.Scrollbar(
+    right, orient="vertical", command=lambda *a: _mat_yview(*a)
+)
+
+if materials_grid is not None:
+
+    materials_grid.scroll_command = materials_scroll.set
+
+materials_scroll.grid(row=1, column=1, sticky="ns")
 
 try:
 
@@ -1401,30 +1342,67 @@ _stacks_overlays = {}
 
 _qty_overlays = {}
 
+# Overlay widgets whose row scrolled out of view, kept for reuse; each pool
+# holds at most OVERLAY_POOL_MAX widgets, extras are destroyed
+OVERLAY_POOL_MAX = 32
+
+_overlay_pool = {"done": [], "del": [], "stacks": [], "qty": []}
+
+# Last layout key per row (bbox, column widths, row state); rows whose key
+# is unchanged are not re-placed
+_overlay_geom = {}
+
+_overlay_font_cache = {}
+
+LAYOUT_FRAME_MS = 16
+
+_layout_after_id = None
 
-def _collect_material_suggestions():
+# Materials view model: every row in display order as (iid, values, tags).
+# Only _mat_model[_mat_first:] up to the viewport plus MAT_BUFFER_ROWS is
+# materialized in materials_tree; _mat_index maps iid -> model position.
+MAT_BUFFER_ROWS = 4
+
+_mat_model = []
+
+_mat_index = {}
+
+_mat_first = 0
+
+_mat_rendered_rows = 0
+
+_mat_resync_pending = False
+
+
+def _collect_material_suggestions(table, recipes, pic_index):
 
     try:
 
         mats = set()
 
-        for k, v in RECIPES.items():
+        if table is not None:
 
-            mats.add(k)
+            mats.update(table.suggestions)
 
-            try:
+        else:
 
-                for sk in (v or {}).keys():
+            for k, v in recipes.items():
 
-                    mats.add(sk)
+                mats.add(k)
 
-            except Exception:
+                try:
 
-                pass
+                    for sk in (v or {}).keys():
+
+                        mats.add(sk)
+
+                except Exception:
+
+                    pass
 
         try:
 
-            for base in PIC_INDEX.keys():
+            for base in pic_index.keys():
 
                 mats.add(base)
 
@@ -1441,355 +1419,508 @@ def _collect_material_suggestions():
         return []
 
 
-ALL_MATERIAL_SUGGESTIONS = _collect_material_suggestions()
-
-
-def _normalize_material_key(name: str) -> str:
+def _load_startup_data():
 
+    # Runs on the worker thread: touches no Tk objects and no globals, the
+    # results are handed to the main loop through _STARTUP_QUEUE
+    timings = {}
+    data = {}
     try:
+        t = time.perf_counter()
+        data["table"], data["recipes"] = _load_recipe_table()
+        if data["table"] is not None:
+            data["order"] = data["table"].topo_positions()
+        timings["recipes"] = time.perf_counter() - t
+        t = time.perf_counter()
+        data["atlas"] = load_icon_atlas(ICONS_DIR, ICON_PX)
+        data["pictures"] = _scan_pictures(data["atlas"])
+        data["icon_index"] = IconIndex(data["pictures"])
+        data["icon_table"] = load_icon_table(ICON_TABLE_PATH)
+        timings["pictures"] = time.perf_counter() - t
+        t = time.perf_counter()
+        data["suggestions"] = _collect_material_suggestions(
+            data["table"], data["recipes"], data["pictures"]
+        )
+        table = data["table"]
+        items = table.items if table else sorted(data["recipes"])
+        weights = ingredient_counts(data["recipes"])
+        data["item_search"] = SearchIndex(
+            items, [format_item_name(n) for n in items], weights
+        )
+        mats = data["suggestions"]
+        data["material_search"] = SearchIndex(
+            mats, [format_item_name(n) for n in mats], weights
+        )
+        timings["suggestions"] = time.perf_counter() - t
+    except Exception as e:
+        logging.error(f"Startup data load failed: {e}")
+    data["timings"] = timings
+    _STARTUP_QUEUE.put(data)
 
-        return str(name).strip().lower().replace(" ", "_")
 
-    except Exception:
+def _apply_startup_data(data):
 
-        return str(name).strip()
+    global RECIPES, RECIPE_TABLE, RECIPE_ORDER, ALL_ITEMS, ALL_MATERIAL_SUGGESTIONS
 
+    global DATA_READY
 
-def load_item_image(item_name):
+    global ITEM_SEARCH, MATERIAL_SEARCH
 
-    if item_name in ITEM_IMAGES:
+    global ICON_ATLAS, ICON_INDEX, ICON_TABLE
 
-        return ITEM_IMAGES[item_name]
+    RECIPE_TABLE = data.get("table")
 
-    requested_name = item_name
+    RECIPE_ORDER = data.get("order")
 
-    material_mappings = {
-        "planks": "oak_planks",
-        "stone_tool_materials": "cobblestone",
-        "wooden_tool_materials": "oak_planks",
-        "iron_tool_materials": "iron_ingot",
-        "diamond_tool_materials": "diamond",
-        "gold_tool_materials": "gold_ingot",
-        "copper_tool_materials": "copper_ingot",
-        "stone_crafting_materials": "cobblestone",
-    }
+    ICON_ATLAS = data.get("atlas")
 
-    lookup_name = material_mappings.get(item_name, item_name)
+    RECIPES = data.get("recipes") or {}
 
-    if lookup_name in ITEM_IMAGES:
+    # Images picked while loading were added to PIC_INDEX already; keep them
+    for k, v in (data.get("pictures") or {}).items():
+        PIC_INDEX.setdefault(k, v)
 
-        ITEM_IMAGES[requested_name] = ITEM_IMAGES[lookup_name]
+    ICON_INDEX = data.get("icon_index") or IconIndex()
 
-        return ITEM_IMAGES[requested_name]
+    ICON_TABLE = data.get("icon_table") or {}
 
-    key = str(lookup_name).lower().replace(" ", "_")
+    for k in PIC_INDEX:
+        ICON_INDEX.add(k)
 
-    def _load_and_cache(img_path: Path):
+    # Rows drawn before the picture index existed cached "no icon"; retry them
+    ITEM_IMAGES.forget_misses()
 
-        try:
+    ALL_ITEMS = RECIPE_TABLE.items if RECIPE_TABLE else sorted(list(RECIPES.keys()))
 
-            img = Image.open(img_path)
+    ALL_MATERIAL_SUGGESTIONS = data.get("suggestions") or []
 
-            if img.mode != "RGBA":
+    ITEM_SEARCH = data.get("item_search") or SearchIndex(ALL_ITEMS)
 
-                img = img.convert("RGBA")
+    MATERIAL_SEARCH = data.get("material_search") or SearchIndex(
+        ALL_MATERIAL_SUGGESTIONS
+    )
 
-            img = img.resize((20, 20), Image.Resampling.LANCZOS)
+    try:
 
-            photo = ImageTk.PhotoImage(img)
+        entry_item.configure(values=ALL_ITEMS)
 
-            ITEM_IMAGES[lookup_name] = photo
+        custom_name_combo.configure(values=ALL_MATERIAL_SUGGESTIONS)
 
-            ITEM_IMAGES[requested_name] = photo
+        btn_add.configure(state="normal")
 
-            return photo
+    except Exception:
 
-        except Exception as e:
+        pass
 
-            logging.warning(
-                f"Failed to load image for {requested_name} from {img_path.name}: {e}"
-            )
+    DATA_READY = True
 
-            return None
+    timings = data.get("timings", {})
 
-    if key in PIC_INDEX:
+    phases = ", ".join(f"{k} {v * 1000:.1f} ms" for k, v in timings.items())
 
-        photo = _load_and_cache(PIC_INDEX[key])
+    logging.info(
+        f"Startup: ui {STARTUP_UI_MS:.1f} ms, {phases}; ready"
+        f" {(time.perf_counter() - STARTUP_T0) * 1000:.1f} ms after launch"
+        f" ({len(RECIPES)} recipes, {len(PIC_INDEX)} pictures)"
+    )
 
-        if photo:
+    if startup_profile.enabled():
 
-            return photo
+        for k, v in timings.items():
 
-    for suffix in ("", "_top", "_side", "_front"):
+            startup_profile.add_phase(f"worker: {k}", v)
 
-        cand = key + suffix
+        startup_profile.mark("ready")
 
-        if cand in PIC_INDEX:
+        try:
 
-            photo = _load_and_cache(PIC_INDEX[cand])
+            report = startup_profile.write_report(USER_DIR / "startup_profile.txt")
 
-            if photo:
+            logging.info(f"Startup profile written to {report}")
 
-                return photo
+        except Exception as e:
 
-    tokens = [t for t in key.split("_") if t]
+            logging.warning(f"Failed to write startup profile: {e}")
 
-    best = None
+    update_views()
 
-    best_score = -1
 
-    for base, path in PIC_INDEX.items():
+def _poll_startup_data():
 
-        score = 0
+    try:
 
-        ok = True
+        data = _STARTUP_QUEUE.get_nowait()
 
-        for t in tokens:
+    except queue.Empty:
 
-            if t in base:
+        root.after(30, _poll_startup_data)
 
-                score += 1
+        return
 
-            else:
+    _apply_startup_data(data)
 
-                ok = False
 
-                break
+def _normalize_material_key(name: str) -> str:
 
-        if ok and score > best_score:
+    try:
 
-            best_score = score
+        return str(name).strip().lower().replace(" ", "_")
 
-            best = path
+    except Exception:
 
-    if best is not None:
+        return str(name).strip()
 
-        photo = _load_and_cache(best)
 
-        if photo:
+# Icons that need a PNG decode are resized on a small thread pool; rows show
+# ICON_PLACEHOLDER until _drain_icon_results swaps the finished image in.
+# Rows use the item name as iid, which is how a result finds its rows.
+ICON_PLACEHOLDER = None
 
-            return photo
+_ICON_POOL = None
 
-    suffix_tokens = {
-        "stairs",
-        "terracotta",
-        "glazed",
-        "stained",
-        "glass",
-        "pane",
-        "block",
-        "ore",
-        "ingot",
-        "nugget",
-        "dust",
-        "tile",
-        "tiles",
-        "bricks",
-        "brick",
-    }
+_ICON_JOBS = {}
 
-    btokens = tokens[:]
+_ICON_DONE = queue.Queue()
 
-    while btokens and btokens[-1] in suffix_tokens:
+_ICON_DRAIN_SCHEDULED = False
 
-        btokens.pop()
 
-    if btokens:
+def _icon_placeholder():
 
-        base_key = "_".join(btokens)
+    global ICON_PLACEHOLDER
 
-        if base_key in PIC_INDEX:
+    if ICON_PLACEHOLDER is None:
 
-            photo = _load_and_cache(PIC_INDEX[base_key])
+        ICON_PLACEHOLDER = tk.PhotoImage(master=root, width=ICON_PX, height=ICON_PX)
 
-            if photo:
+    return ICON_PLACEHOLDER
 
-                return photo
 
-        wood_types = [
-            "oak",
-            "spruce",
-            "birch",
-            "jungle",
-            "acacia",
-            "dark_oak",
-            "mangrove",
-            "cherry",
-            "bamboo",
-            "crimson",
-            "warped",
-        ]
+def _request_icon_decode(img_path: Path, names, decode=decode_icon, *args):
 
-        if len(btokens) == 1 and btokens[0] in wood_types:
+    global _ICON_POOL, _ICON_DRAIN_SCHEDULED
 
-            cand = f"{btokens[0]}_planks"
+    key = str(img_path)
 
-            if cand in PIC_INDEX:
+    if key in _ICON_JOBS:
 
-                photo = _load_and_cache(PIC_INDEX[cand])
+        _ICON_JOBS[key].update(names)
 
-                if photo:
+        return
 
-                    return photo
+    _ICON_JOBS[key] = set(names)
 
-        candidates = [
-            (base, path)
-            for base, path in PIC_INDEX.items()
-            if base.startswith(base_key + "_")
-        ]
+    if _ICON_POOL is None:
 
-        if candidates:
+        _ICON_POOL = ThreadPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="icons"
+        )
 
-            candidates.sort(key=lambda x: (len(x[0].split("_")), x[0]))
+    future = _ICON_POOL.submit(decode, img_path, *(args or (ICON_PX,)))
 
-            photo = _load_and_cache(candidates[0][1])
+    future.add_done_callback(lambda f, key=key: _ICON_DONE.put((key, f)))
 
-            if photo:
+    if not _ICON_DRAIN_SCHEDULED:
 
-                return photo
+        _ICON_DRAIN_SCHEDULED = True
 
-    wood_types = [
-        "oak",
-        "spruce",
-        "birch",
-        "jungle",
-        "acacia",
-        "dark_oak",
-        "mangrove",
-        "cherry",
-        "bamboo",
-        "crimson",
-        "warped",
-    ]
+        root.after(15, _drain_icon_results)
 
-    for wt in wood_types:
 
-        if wt in key:
+def _set_row_icon(name: str, photo):
 
-            plank_key = f"{wt}_planks"
+    ITEM_IMAGES.put(name, photo)
 
-            if plank_key in PIC_INDEX:
+    if materials_grid is not None:
 
-                photo = _load_and_cache(PIC_INDEX[plank_key])
+        materials_grid.set_image(name, photo)
 
-                if photo:
+    for tree in (items_tree, materials_tree):
 
-                    return photo
+        try:
 
-            break
+            if tree.exists(name):
 
-    logging.debug(
-        f"No image found for {requested_name} (lookup: {lookup_name}); caching None"
-    )
+                tree.item(name, image=photo if photo else "")
 
-    ITEM_IMAGES[requested_name] = None
+                cached = _rendered_rows.get(str(tree), {}).get(name)
 
-    return None
+                if cached is not None:
 
+                    _rendered_rows[str(tree)][name] = (cached[0], cached[1], photo)
 
-_qty_edit_entry = None
+        except Exception:
 
+            pass
 
-def _begin_qty_edit(item_id: str):
 
-    global _qty_edit_entry
+def _drain_icon_results():
 
-    try:
+    global _ICON_DRAIN_SCHEDULED
 
-        bbox = items_tree.bbox(item_id, "#2")
+    while True:
 
-        if not bbox:
+        try:
 
-            return
+            key, future = _ICON_DONE.get_nowait()
 
-        x, y, w, h = bbox
+        except queue.Empty:
 
-        _qty_edit_entry = ttk.Entry(items_tree)
+            break
 
-        _qty_edit_entry.place(x=x, y=y, width=w, height=h)
+        names = _ICON_JOBS.pop(key, set())
 
-        _qty_edit_entry.insert(0, str(current_project.items.get(item_id, 0)))
+        try:
 
-        _qty_edit_entry.focus_set()
+            width, height, rgba = future.result()
 
-        _qty_edit_entry.select_range(0, "end")
+            Image, ImageTk = _pil()
 
-        def _commit(*_):
+            photo = ImageTk.PhotoImage(
+                Image.frombuffer("RGBA", (width, height), rgba, "raw", "RGBA", 0, 1)
+            )
 
-            global _qty_edit_entry
+        except Exception as e:
 
-            try:
+            logging.warning(f"Failed to load image {Path(key).name}: {e}")
 
-                new_val = int(_qty_edit_entry.get())
+            photo = None
 
-            except Exception:
+        for name in names:
 
-                new_val = None
+            _set_row_icon(name, photo)
 
-            _qty_edit_entry.destroy()
+    if _ICON_JOBS:
 
-            _qty_edit_entry = None
+        root.after(15, _drain_icon_results)
 
-            if new_val is None:
+    else:
 
-                return
+        _ICON_DRAIN_SCHEDULED = False
 
-            if new_val <= 0:
 
-                record_undo("edit_qty_remove")
+def _icon_stem(key: str):
 
-                current_project.items.pop(item_id, None)
+    # A user-picked image for exactly this name always wins; otherwise the
+    # frozen table answers with one dict hit. Names it does not know, or
+    # stems missing from this install, go through the runtime index.
+    path = PIC_INDEX.get(key)
 
-            else:
+    if path is not None and path.parent == USER_PIC_DIR:
 
-                record_undo("edit_qty")
+        return key
 
-                current_project.items[item_id] = new_val
+    if key in ICON_TABLE:
 
-            update_views()
+        stem = ICON_TABLE[key]
 
-            _schedule_autosave()
+        if stem is None or stem in PIC_INDEX:
 
-        def _cancel(*_):
+            return stem
 
-            global _qty_edit_entry
+    return ICON_INDEX.resolve(key)
 
-            if _qty_edit_entry:
 
-                _qty_edit_entry.destroy()
+def load_item_image(item_name):
 
-                _qty_edit_entry = None
+    found, photo = ITEM_IMAGES.lookup(item_name)
 
-        _qty_edit_entry.bind("<Return>", _commit)
+    if found:
 
-        _qty_edit_entry.bind("<FocusOut>", _commit)
+        return photo
 
-        _qty_edit_entry.bind("<Escape>", _cancel)
+    requested_name = item_name
 
-    except Exception as e:
+    lookup_name = TAGS.resolve(item_name)
 
-        logging.error(f"Failed to begin qty edit for {item_id}: {e}")
+    found, photo = ITEM_IMAGES.lookup(lookup_name)
 
+    if found:
 
-def _on_items_tree_double_click(event):
+        ITEM_IMAGES.put(requested_name, photo)
 
-    row_id = items_tree.identify_row(event.y)
+        return photo
 
-    col = items_tree.identify_column(event.x)
+    key = str(lookup_name).lower().replace(" ", "_")
 
-    if not row_id:
+    def _load_and_cache(img_path: Path):
 
-        return
+        try:
 
-    if col == "#2":
+            stem = img_path.stem.lower()
 
-        _begin_qty_edit(row_id)
+            if (
+                ICON_ATLAS is not None
+                and img_path.parent == PIC_DIR
+                and stem in ICON_ATLAS
+            ):
 
-    elif col in ("#1", "item"):
+                photo = ICON_ATLAS.photo(stem, master=root)
 
-        try:
+            elif img_path.parent == USER_PIC_DIR:
 
-            _open_recipe_peek(row_id, 1)
+                cached = cached_user_icon(img_path, USER_ICON_CACHE, stem, ICON_PX)
+
+                if cached is None:
+
+                    # Picked by an older version: normalize it in the pool
+                    _request_icon_decode(
+                        img_path,
+                        (lookup_name, requested_name),
+                        decode_user_icon,
+                        USER_ICON_CACHE,
+                        stem,
+                        ICON_PX,
+                    )
+
+                    return _icon_placeholder()
+
+                photo = tk.PhotoImage(master=root, file=str(cached))
+
+            else:
+
+                # Not cached: the row gets the placeholder now and the real
+                # image once the pool has decoded it
+                _request_icon_decode(img_path, (lookup_name, requested_name))
+
+                return _icon_placeholder()
+
+            ITEM_IMAGES.put(lookup_name, photo)
+
+            ITEM_IMAGES.put(requested_name, photo)
+
+            return photo
+
+        except Exception as e:
+
+            logging.warning(
+                f"Failed to load image for {requested_name} from {img_path.name}: {e}"
+            )
+
+            return None
+
+    stem = _icon_stem(key)
+
+    if stem is not None and stem in PIC_INDEX:
+
+        photo = _load_and_cache(PIC_INDEX[stem])
+
+        if photo:
+
+            return photo
+
+    logging.debug(
+        f"No image found for {requested_name} (lookup: {lookup_name}); caching None"
+    )
+
+    ITEM_IMAGES.put(requested_name, None)
+
+    return None
+
+
+_qty_edit_entry = None
+
+
+def _begin_qty_edit(item_id: str):
+
+    global _qty_edit_entry
+
+    try:
+
+        bbox = items_tree.bbox(item_id, "#2")
+
+        if not bbox:
+
+            return
+
+        x, y, w, h = bbox
+
+        _qty_edit_entry = ttk.Entry(items_tree)
+
+        _qty_edit_entry.place(x=x, y=y, width=w, height=h)
+
+        _qty_edit_entry.insert(0, str(current_project.items.get(item_id, 0)))
+
+        _qty_edit_entry.focus_set()
+
+        _qty_edit_entry.select_range(0, "end")
+
+        def _commit(*_):
+
+            global _qty_edit_entry
+
+            try:
+
+                new_val = int(_qty_edit_entry.get())
+
+            except Exception:
+
+                new_val = None
+
+            _qty_edit_entry.destroy()
+
+            _qty_edit_entry = None
+
+            if new_val is None:
+
+                return
+
+            if new_val <= 0:
+
+                record_undo("edit_qty_remove")
+
+                current_project.items.pop(item_id, None)
+
+            else:
+
+                record_undo("edit_qty")
+
+                current_project.items[item_id] = new_val
+
+            update_views()
+
+            _schedule_autosave()
+
+        def _cancel(*_):
+
+            global _qty_edit_entry
+
+            if _qty_edit_entry:
+
+                _qty_edit_entry.destroy()
+
+                _qty_edit_entry = None
+
+        _qty_edit_entry.bind("<Return>", _commit)
+
+        _qty_edit_entry.bind("<FocusOut>", _commit)
+
+        _qty_edit_entry.bind("<Escape>", _cancel)
+
+    except Exception as e:
+
+        logging.error(f"Failed to begin qty edit for {item_id}: {e}")
+
+
+def _on_items_tree_double_click(event):
+
+    row_id = items_tree.identify_row(event.y)
+
+    col = items_tree.identify_column(event.x)
+
+    if not row_id:
+
+        return
+
+    if col == "#2":
+
+        _begin_qty_edit(row_id)
+
+    elif col in ("#1", "item"):
+
+        try:
+
+            _open_recipe_peek(row_id, 1)
 
         except Exception:
 
@@ -1812,199 +1943,597 @@ def _on_items_tree_click(event):
 
             record_undo("delete_item")
 
-            del current_project.items[row_id]
+            del current_project.items[row_id]
+
+            update_views()
+
+            _schedule_autosave()
+
+
+def refresh_projects_combo():
+
+    combo_projects["values"] = [p.name for p in list_project_files()]
+
+
+def refresh_items_view():
+
+    style = ttk.Style()
+
+    style.configure("Treeview", rowheight=ROW_HEIGHT)
+
+    rows = []
+
+    for idx, (itm, q) in enumerate(sorted(current_project.items.items())):
+
+        tag = "odd" if idx % 2 else "even"
+
+        rows.append((itm, (format_item_name(itm), q, format_stacks(q), "X"), (tag,)))
+
+    _reconcile_tree(items_tree, rows)
+
+
+# Last values/tags/image written per row, per tree, so a refresh only
+# touches rows whose content actually changed
+_rendered_rows = {}
+
+
+def _reconcile_tree(tree, rows):
+
+    # Make tree's top-level rows equal rows [(iid, values, tags), ...] by iid:
+    # delete what is gone, insert what is new, move what changed position
+    # and re-set values only where they differ. Selection, focus and scroll
+    # survive because untouched rows are never recreated.
+    cache = _rendered_rows.setdefault(str(tree), {})
+
+    wanted = {iid for iid, _, _ in rows}
+
+    gone = [iid for iid in tree.get_children("") if iid not in wanted]
+
+    if gone:
+
+        tree.delete(*gone)
+
+    for iid in gone:
+
+        cache.pop(iid, None)
+
+    order = list(tree.get_children(""))
+
+    changed = 0
+
+    for i, (iid, values, tags) in enumerate(rows):
+
+        if i < len(order) and order[i] == iid:
+
+            pass
+
+        elif tree.exists(iid):
+
+            tree.move(iid, "", i)
+
+            order.remove(iid)
+
+            order.insert(i, iid)
+
+            changed += 1
+
+        else:
+
+            img = load_item_image(iid)
+
+            tree.insert(
+                "",
+                i,
+                iid=iid,
+                image=img if img else "",
+                text="",
+                values=values,
+                tags=tags,
+            )
+
+            order.insert(i, iid)
+
+            cache[iid] = (values, tags, img)
+
+            changed += 1
+
+            continue
+
+        old_values, old_tags, old_img = cache.get(iid, (None, None, None))
+
+        if old_values != values or old_tags != tags:
+
+            tree.item(iid, values=values, tags=tags)
+
+            changed += 1
+
+        if old_img is None:
+
+            # No icon yet (data still loading, or a miss): cheap cached retry
+            img = load_item_image(iid)
+
+            if img is not None:
+
+                tree.item(iid, image=img)
+
+        else:
+
+            img = old_img
+
+        cache[iid] = (values, tags, img)
+
+    return changed
+
+
+def format_item_name(name: str) -> str:
+
+    name = TAGS.resolve(name).lstrip("#")
+
+    return name.replace("_", " ").title()
+
+
+def refresh_materials_view():
+
+    try:
+
+        style = ttk.Style()
+
+        style.configure("Treeview", rowheight=ROW_HEIGHT)
+
+        if not DATA_READY:
+
+            return
+
+        mats = aggregate_requirements(
+            RECIPES, current_project.items, tags=TAGS, order=RECIPE_ORDER
+        )
+
+        mats = normalize_display_mats(mats)
+
+        try:
+
+            for k, v in CUSTOM_MATS.items():
+
+                mats[k] = mats.get(k, 0) + max(int(v), 0)
+
+        except Exception:
+
+            pass
+
+        order_keys = [k for k, _ in sorted(mats.items())]
+
+        try:
+
+            sort_key, desc = _mat_sort
+
+            if sort_key != "default":
+
+                acq_map = {m: max(int(ACQUIRED_MATS.get(m, 0)), 0) for m in mats.keys()}
+
+                miss_map = {m: max(int(mats[m]) - acq_map[m], 0) for m in mats.keys()}
+
+                if sort_key == "item":
+
+                    order_keys = sorted(mats.keys(), key=lambda m: format_item_name(m))
+
+                elif sort_key == "qty":
+
+                    order_keys = sorted(
+                        mats.keys(), key=lambda m: (miss_map[m], format_item_name(m))
+                    )
+
+                elif sort_key == "stacks":
+
+                    order_keys = sorted(
+                        mats.keys(), key=lambda m: format_stacks(int(mats[m]))
+                    )
+
+                elif sort_key == "acq":
+
+                    order_keys = sorted(
+                        mats.keys(), key=lambda m: (acq_map[m], format_item_name(m))
+                    )
+
+                if desc:
+
+                    order_keys = list(reversed(order_keys))
+
+        except Exception:
+
+            pass
+
+        model = []
+
+        for idx, mat in enumerate(order_keys):
+
+            q = mats[mat]
+
+            tag = "odd" if idx % 2 else "even"
+
+            acq = max(int(ACQUIRED_MATS.get(mat, 0)), 0)
+
+            missing = max(q - acq, 0)
+
+            qty_display = f"{q} ({missing})"
+
+            if mat in MANUAL_DONE:
+
+                DONE_MATS.add(mat)
+
+            elif mat in MANUAL_UNDONE:
+
+                DONE_MATS.discard(mat)
+
+            elif missing == 0:
+
+                DONE_MATS.add(mat)
+
+            else:
+
+                DONE_MATS.discard(mat)
+
+                MANUAL_UNDONE.discard(mat)
+
+            model.append(
+                (
+                    mat,
+                    (format_item_name(mat), qty_display, format_stacks(q), acq),
+                    (tag, "done") if mat in DONE_MATS else (tag,),
+                )
+            )
+
+        _set_materials_model(model)
+
+        root.after_idle(_refresh_done_buttons)
+
+        try:
+
+            sorted_by_var.set(_sorted_by_label_text())
+
+        except Exception:
+
+            pass
+
+    except Exception as e:
+
+        messagebox.showerror("Calculation error", f"Failed to calculate materials: {e}")
+
+
+def _set_materials_model(model):
+
+    global _mat_model, _mat_index
+
+    _mat_model = model
+
+    _mat_index = {iid: i for i, (iid, _, _) in enumerate(model)}
+
+    _render_material_window()
+
+
+def _mat_visible_rows() -> int:
+
+    # Rows that fit in the tree's current height; before the first layout
+    # the configured height (in rows) is the best guess
+    try:
+
+        h = materials_tree.winfo_height()
+
+        if h > 1:
+
+            top = ROW_HEIGHT
+
+            kids = materials_tree.get_children("")
+
+            if kids:
+
+                bb = materials_tree.bbox(kids[0])
+
+                if bb:
+
+                    top = bb[1]
+
+            return max(1, (h - top) // ROW_HEIGHT)
+
+    except Exception:
+
+        pass
+
+    try:
+
+        return max(1, int(materials_tree.cget("height")))
+
+    except Exception:
+
+        return 20
+
+
+def _render_material_window():
+
+    global _mat_first, _mat_rendered_rows
+
+    if materials_grid is not None:
+
+        materials_grid.set_model(_mat_model, custom=CUSTOM_MATS)
+
+        return
+
+    total = len(_mat_model)
+
+    visible = _mat_visible_rows()
+
+    _mat_rendered_rows = visible
+
+    _mat_first = max(0, min(_mat_first, total - visible))
+
+    window = _mat_model[_mat_first : _mat_first + visible + MAT_BUFFER_ROWS]
+
+    _reconcile_tree(materials_tree, window)
+
+    materials_tree.yview_moveto(0)
+
+    _update_mat_scrollbar(visible)
+
+
+def _update_mat_scrollbar(visible=None):
+
+    try:
+
+        total = len(_mat_model)
+
+        if total <= 0:
+
+            materials_scroll.set(0, 1)
+
+            return
+
+        visible = visible or _mat_visible_rows()
+
+        last = min(_mat_first + visible, total)
+
+        materials_scroll.set(_mat_first / total, last / total)
+
+    except Exception:
+
+        pass
+
+
+def _mat_scroll_to(first):
+
+    global _mat_first
+
+    limit = max(0, len(_mat_model) - _mat_visible_rows())
+
+    first = max(0, min(int(first), limit))
+
+    if first == _mat_first:
+
+        return
+
+    _mat_first = first
+
+    _render_material_window()
+
+    _refresh_done_buttons()
+
+
+def _mat_yview(*args):
+
+    if materials_grid is not None:
+
+        materials_grid.yview(*args)
+
+        return
+
+    try:
+
+        if args[0] == "moveto":
+
+            _mat_scroll_to(round(float(args[1]) * len(_mat_model)))
+
+        elif args[0] == "scroll":
+
+            step = _mat_visible_rows() if args[2] == "pages" else 1
+
+            _mat_scroll_to(_mat_first + int(args[1]) * step)
+
+    except Exception:
+
+        pass
+
+
+def _on_mat_configure(event=None):
+
+    # A resize changes how many rows fit; re-materialize only then
+    if _mat_visible_rows() != _mat_rendered_rows:
+
+        _render_material_window()
+
+        _refresh_done_buttons()
+
+
+def _on_mat_wheel(event):
+
+    if getattr(event, "num", None) == 4:
+
+        rows = -3
+
+    elif getattr(event, "num", None) == 5:
 
-            update_views()
+        rows = 3
 
-            _schedule_autosave()
+    else:
 
+        if abs(event.delta) >= 120:
 
-def refresh_projects_combo():
+            notches = int(event.delta / 120)
 
-    combo_projects["values"] = [p.name for p in list_project_files()]
+        else:
 
+            notches = (event.delta > 0) - (event.delta < 0)
 
-def refresh_items_view():
+        rows = -3 * notches
 
-    style = ttk.Style()
+    _mat_scroll_to(_mat_first + rows)
 
-    style.configure("Treeview", rowheight=26)
+    return "break"
 
-    for r in items_tree.get_children():
 
-        items_tree.delete(r)
+def _on_mat_key(event):
 
-    for idx, (itm, q) in enumerate(sorted(current_project.items.items())):
+    # Arrow/page keys move through the whole model, not just the rows that
+    # currently exist in the tree
+    if not _mat_model:
 
-        img = load_item_image(itm)
+        return "break"
 
-        tag = "odd" if idx % 2 else "even"
+    visible = _mat_visible_rows()
 
-        items_tree.insert(
-            "",
-            "end",
-            iid=itm,
-            image=img if img else "",
-            text="",
-            values=(format_item_name(itm), q, format_stacks(q), "X"),
-            tags=(tag,),
-        )
+    cur = _mat_index.get(materials_tree.focus(), _mat_first)
 
+    step = {
+        "Up": -1,
+        "Down": 1,
+        "Prior": -visible,
+        "Next": visible,
+        "Home": -len(_mat_model),
+        "End": len(_mat_model),
+    }.get(event.keysym, 0)
 
-def format_item_name(name: str) -> str:
+    new = max(0, min(cur + step, len(_mat_model) - 1))
 
-    name_mappings = {
-        "copper_tool_materials": "Copper Ingot",
-        "stone_tool_materials": "Cobblestone",
-        "wooden_tool_materials": "Oak Planks",
-        "iron_tool_materials": "Iron Ingot",
-        "diamond_tool_materials": "Diamond",
-        "gold_tool_materials": "Gold Ingot",
-        "stone_crafting_materials": "Cobblestone",
-        "planks": "Oak Planks",
-    }
+    if new < _mat_first:
 
-    if name in name_mappings:
+        _mat_scroll_to(new)
 
-        return name_mappings[name]
+    elif new >= _mat_first + visible:
 
-    return name.replace("_", " ").title()
+        _mat_scroll_to(new - visible + 1)
 
+    iid = _mat_model[new][0]
 
-def refresh_materials_view():
+    if materials_tree.exists(iid):
 
-    try:
+        materials_tree.selection_set(iid)
 
-        style = ttk.Style()
+        materials_tree.focus(iid)
 
-        style.configure("Treeview", rowheight=26)
+    return "break"
 
-        mats = aggregate_requirements(RECIPES, current_project.items)
 
-        mats = normalize_display_mats(mats)
+def _on_mat_tree_scrolled(first, last):
 
-        try:
+    # The window is rendered with the tree scrolled to its top. Tk still
+    # scrolls the tree on its own when a buffer row below the viewport is
+    # clicked or focused; shift the window onto the row now at the top so
+    # _mat_first keeps matching what is shown
+    global _mat_resync_pending
 
-            for k, v in CUSTOM_MATS.items():
+    if float(first) <= 0 or _mat_resync_pending:
 
-                mats[k] = mats.get(k, 0) + max(int(v), 0)
+        return
 
-        except Exception:
+    _mat_resync_pending = True
 
-            pass
+    root.after_idle(_mat_resync_window)
 
-        for r in materials_tree.get_children():
 
-            materials_tree.delete(r)
+def _mat_resync_window():
 
-        order_keys = [k for k, _ in sorted(mats.items())]
+    global _mat_first, _mat_resync_pending
 
-        try:
+    _mat_resync_pending = False
 
-            sort_key, desc = _mat_sort
+    try:
 
-            if sort_key != "default":
+        kids = materials_tree.get_children("")
 
-                acq_map = {m: max(int(ACQUIRED_MATS.get(m, 0)), 0) for m in mats.keys()}
+        shift = round(float(materials_tree.yview()[0]) * len(kids))
 
-                miss_map = {m: max(int(mats[m]) - acq_map[m], 0) for m in mats.keys()}
+    except Exception:
 
-                if sort_key == "item":
+        return
 
-                    order_keys = sorted(mats.keys(), key=lambda m: format_item_name(m))
+    if shift <= 0:
 
-                elif sort_key == "qty":
+        return
 
-                    order_keys = sorted(
-                        mats.keys(), key=lambda m: (miss_map[m], format_item_name(m))
-                    )
+    _mat_first += shift
 
-                elif sort_key == "stacks":
+    _render_material_window()
 
-                    order_keys = sorted(
-                        mats.keys(), key=lambda m: format_stacks(int(mats[m]))
-                    )
+    _refresh_done_buttons()
 
-                elif sort_key == "acq":
 
-                    order_keys = sorted(
-                        mats.keys(), key=lambda m: (acq_map[m], format_item_name(m))
-                    )
+def request_refresh(items: bool = False, materials: bool = False):
 
-                if desc:
+    global _refresh_after_id
 
-                    order_keys = list(reversed(order_keys))
+    REFRESH_STATS["requests"] += 1
 
-        except Exception:
+    if items:
 
-            pass
+        _view_dirty["items"] = True
 
-        for idx, mat in enumerate(order_keys):
+    if materials:
 
-            q = mats[mat]
+        _view_dirty["materials"] = True
 
-            img = load_item_image(mat)
+    if _refresh_after_id is not None:
 
-            tag = "odd" if idx % 2 else "even"
+        REFRESH_STATS["coalesced"] += 1
 
-            acq = max(int(ACQUIRED_MATS.get(mat, 0)), 0)
+        return
 
-            missing = max(q - acq, 0)
+    try:
 
-            qty_display = f"{q} ({missing})"
+        _refresh_after_id = root.after_idle(_flush_refresh)
 
-            if mat in MANUAL_DONE:
+    except Exception:
 
-                DONE_MATS.add(mat)
+        _flush_refresh()
 
-            elif mat in MANUAL_UNDONE:
 
-                DONE_MATS.discard(mat)
+def _flush_refresh():
 
-            elif missing == 0:
+    global _refresh_after_id
 
-                DONE_MATS.add(mat)
+    _refresh_after_id = None
 
-            else:
+    items = _view_dirty["items"]
 
-                DONE_MATS.discard(mat)
+    materials = _view_dirty["materials"]
 
-                MANUAL_UNDONE.discard(mat)
+    _view_dirty["items"] = _view_dirty["materials"] = False
 
-            row = materials_tree.insert(
-                "",
-                "end",
-                iid=mat,
-                image=img if img else "",
-                text="",
-                values=(format_item_name(mat), qty_display, format_stacks(q), acq),
-                tags=(tag,),
-            )
+    if not (items or materials):
 
-            if mat in DONE_MATS:
+        return
 
-                materials_tree.item(row, tags=(tag, "done"))
+    REFRESH_STATS["passes"] += 1
 
-        root.after_idle(_refresh_done_buttons)
+    try:
 
-        try:
+        if items:
 
-            sorted_by_var.set(_sorted_by_label_text())
+            refresh_items_view()
 
-        except Exception:
+        if materials:
 
-            pass
+            refresh_materials_view()
 
     except Exception as e:
 
-        messagebox.showerror("Calculation error", f"Failed to calculate materials: {e}")
+        logging.error(f"View refresh failed: {e}")
+
+    logging.debug(
+        f"Refresh pass {REFRESH_STATS['passes']}: items={items} materials={materials}, "
+        f"{REFRESH_STATS['coalesced']} of {REFRESH_STATS['requests']} requests coalesced"
+    )
 
 
 def update_views():
 
-    refresh_items_view()
-
-    refresh_materials_view()
+    request_refresh(items=True, materials=True)
 
 
 def on_new_project():
@@ -2158,6 +2687,12 @@ def on_add_item():
 
     logging.info(f"Adding item: {itm}")
 
+    if not DATA_READY:
+
+        logging.info("Recipes still loading; add ignored")
+
+        return
+
     if not itm:
 
         logging.warning("No item name provided")
@@ -2302,7 +2837,7 @@ def _begin_acq_edit(mat_id: str):
 
     try:
 
-        bbox = materials_tree.bbox(mat_id, "acq")
+        bbox = materials_view.bbox(mat_id, "acq")
 
         if not bbox:
 
@@ -2310,7 +2845,7 @@ def _begin_acq_edit(mat_id: str):
 
         x, y, w, h = bbox
 
-        _acq_edit_entry = ttk.Entry(materials_tree)
+        _acq_edit_entry = ttk.Entry(materials_view)
 
         _acq_edit_entry.place(x=x, y=y, width=w, height=h)
 
@@ -2340,7 +2875,7 @@ def _begin_acq_edit(mat_id: str):
 
             ACQUIRED_MATS[mat_id] = max(n, 0)
 
-            refresh_materials_view()
+            request_refresh(materials=True)
 
             _schedule_autosave()
 
@@ -2367,9 +2902,9 @@ def _begin_acq_edit(mat_id: str):
 
 def _on_materials_double_click(event):
 
-    row_id = materials_tree.identify_row(event.y)
+    row_id = materials_view.identify_row(event.y)
 
-    col = materials_tree.identify_column(event.x)
+    col = materials_view.identify_column(event.x)
 
     if not row_id:
 
@@ -2412,7 +2947,7 @@ def _on_row_done_click(row_id: str):
 
         MANUAL_UNDONE.discard(row_id)
 
-    refresh_materials_view()
+    request_refresh(materials=True)
 
     _schedule_autosave()
 
@@ -2423,15 +2958,21 @@ def _ensure_row_button(row_id: str):
 
         return _row_done_btns[row_id]
 
-    btn = ttk.Button(materials_tree, text="Done", style="RowAction.TButton")
+    if _overlay_pool["done"]:
 
-    try:
+        btn = _overlay_pool["done"].pop()
+
+    else:
 
-        btn.configure(takefocus=False)
+        btn = ttk.Button(materials_tree, text="Done", style="RowAction.TButton")
 
-    except Exception:
+        try:
 
-        pass
+            btn.configure(takefocus=False)
+
+        except Exception:
+
+            pass
 
     btn.configure(command=lambda rid=row_id: _on_row_done_click(rid))
 
@@ -2446,15 +2987,21 @@ def _ensure_row_del_button(row_id: str):
 
         return _row_del_btns[row_id]
 
-    btn = ttk.Button(materials_tree, text="Del", style="RowAction.TButton")
+    if _overlay_pool["del"]:
 
-    try:
+        btn = _overlay_pool["del"].pop()
 
-        btn.configure(takefocus=False)
+    else:
 
-    except Exception:
+        btn = ttk.Button(materials_tree, text="Del", style="RowAction.TButton")
 
-        pass
+        try:
+
+            btn.configure(takefocus=False)
+
+        except Exception:
+
+            pass
 
     btn.configure(command=lambda rid=row_id: _on_row_del_click(rid))
 
@@ -2463,388 +3010,394 @@ def _ensure_row_del_button(row_id: str):
     return btn
 
 
-def _layout_done_buttons(event=None):
+def _overlay_metrics():
+
+    # Font measurements only change with the theme, so measure once per theme
+    if _overlay_font_cache:
+
+        return _overlay_font_cache
 
     try:
 
-        children = materials_tree.get_children("")
+        fnt = tkfont.nametofont("TkDefaultFont")
 
-        try:
+        btn_w = max(fnt.measure("Done") + 28, fnt.measure("Undo") + 28, 64)
 
-            fnt = tkfont.nametofont("TkDefaultFont")
+        del_w = max(fnt.measure("Del") + 24, 48)
+
+        line_h = int(fnt.metrics("linespace") or 16)
 
-            w_done = fnt.measure("Done") + 28
+    except Exception:
 
-            w_undo = fnt.measure("Undo") + 28
+        fnt = None
 
-            btn_w = max(w_done, w_undo, 64)
+        btn_w, del_w, line_h = 68, 52, 16
 
-            line_h = (
-                int(fnt.metrics("linespace")) if "linespace" in fnt.metrics() else 16
-            )
+    try:
 
-        except Exception:
+        done_fnt = fnt.copy() if fnt is not None else None
 
-            btn_w = 68
+        done_fnt.configure(overstrike=1)
 
-            line_h = 16
+    except Exception:
 
-        for rid in children:
+        done_fnt = fnt
 
-            bbox = materials_tree.bbox(rid, "item")
+    _overlay_font_cache.update(
+        fnt=fnt,
+        done_fnt=done_fnt,
+        btn_w=btn_w,
+        del_w=del_w,
+        btn_h=max(line_h + 8, 22),
+        widths={},
+    )
 
-            btn = _ensure_row_button(rid)
+    return _overlay_font_cache
 
-            if not bbox:
 
-                btn.place_forget()
+def _measure_text(text: str) -> int:
 
-                if rid in _stacks_overlays and _stacks_overlays[rid].winfo_exists():
+    metrics = _overlay_metrics()
 
-                    _stacks_overlays[rid].place_forget()
+    widths = metrics["widths"]
 
-                if rid in _row_del_btns and _row_del_btns[rid].winfo_exists():
+    if text not in widths:
 
-                    _row_del_btns[rid].place_forget()
+        try:
 
-                continue
+            widths[text] = metrics["fnt"].measure(text) if text else 0
 
-            x, y, w, h = bbox
+        except Exception:
 
-            btn.configure(text="Undo" if rid in DONE_MATS else "Done")
+            widths[text] = 0
 
-            desired_h = max(line_h + 8, 22)
+    return widths[text]
 
-            btn_h = min(max(h - 2, 20), desired_h)
 
-            y_off = y + max((h - btn_h) // 2, 0)
+def reset_overlay_metrics():
 
-            if rid in CUSTOM_MATS:
+    _overlay_font_cache.clear()
 
-                del_btn = _ensure_row_del_button(rid)
+    _overlay_geom.clear()
 
-                try:
 
-                    del_w = max(
-                        tkfont.nametofont("TkDefaultFont").measure("Del") + 24, 48
-                    )
+def _layout_done_buttons(event=None):
 
-                except Exception:
+    # Bound to Configure/ButtonRelease/KeyRelease: collapse bursts of events
+    # into one layout pass per frame
+    global _layout_after_id
 
-                    del_w = 52
+    if _layout_after_id is not None:
 
-                btn_x = x + max(w - (btn_w + del_w + 10), 0)
+        return
 
-                del_x = x + max(w - (del_w + 6), 0)
+    try:
 
-                del_btn.place(x=del_x, y=y_off, width=del_w, height=btn_h)
+        _layout_after_id = root.after(LAYOUT_FRAME_MS, _run_layout)
 
-                btn.place(x=btn_x, y=y_off, width=btn_w, height=btn_h)
+    except Exception:
 
-            else:
+        _run_layout()
 
-                btn.place(
-                    x=x + max(w - btn_w - 6, 0), y=y_off, width=btn_w, height=btn_h
-                )
 
-            try:
+def _run_layout():
 
-                stacks_txt = (materials_tree.set(rid, "stacks") or "").strip()
+    global _layout_after_id
 
-            except Exception:
+    _layout_after_id = None
 
-                stacks_txt = ""
+    try:
 
-            overlay = _stacks_overlays.get(rid)
+        metrics = _overlay_metrics()
 
-            show_overlay = rid in DONE_MATS and stacks_txt == "-"
+        cols = tuple(
+            materials_tree.column(c, "width") for c in materials_tree["columns"]
+        )
 
-            if show_overlay:
+        for rid in materials_tree.get_children(""):
 
-                if overlay is None or not overlay.winfo_exists():
+            _layout_row(rid, metrics, cols)
 
-                    overlay = tk.Label(materials_tree, text="-", bd=0, relief="flat")
+    except Exception:
 
-                    _stacks_overlays[rid] = overlay
+        pass
 
-                sb = materials_tree.bbox(rid, "stacks")
 
-                if sb:
+def _layout_row(rid: str, metrics: dict, cols: tuple):
 
-                    sx, sy, sw, sh = sb
+    bbox = materials_tree.bbox(rid, "item")
 
-                    try:
+    btn = _ensure_row_button(rid)
 
-                        idx = materials_tree.index(rid)
+    try:
 
-                    except Exception:
+        stacks_txt = (materials_tree.set(rid, "stacks") or "").strip()
 
-                        idx = 0
+        qty_txt = (materials_tree.set(rid, "qty") or "").strip()
 
-                    cell_bg = THEME_PALETTE.get(
-                        "tree_alt" if idx % 2 else "tree_bg", "#111827"
-                    )
+    except Exception:
 
-                    cell_fg = THEME_PALETTE.get("subtext", "#9CA3AF")
+        stacks_txt = qty_txt = ""
 
-                    try:
+    done = rid in DONE_MATS
 
-                        overlay.configure(bg=cell_bg, fg=cell_fg, anchor="center")
+    key = (
+        tuple(bbox) if bbox else None,
+        cols,
+        done,
+        rid in CUSTOM_MATS,
+        _mat_index.get(rid, 0) % 2,
+        stacks_txt,
+        qty_txt,
+    )
 
-                    except Exception:
+    # Rows whose geometry and content are unchanged keep their placement
+    if _overlay_geom.get(rid) == key:
 
-                        pass
+        return
 
-                    overlay.place(x=sx, y=sy, width=sw, height=sh)
+    _overlay_geom[rid] = key
 
-                else:
+    if not bbox:
 
-                    overlay.place_forget()
+        btn.place_forget()
 
-            elif overlay and overlay.winfo_exists():
+        if rid in _stacks_overlays and _stacks_overlays[rid].winfo_exists():
 
-                overlay.place_forget()
+            _stacks_overlays[rid].place_forget()
 
-            try:
+        if rid in _row_del_btns and _row_del_btns[rid].winfo_exists():
 
-                qty_txt = (materials_tree.set(rid, "qty") or "").strip()
+            _row_del_btns[rid].place_forget()
 
-            except Exception:
+        qov = _qty_overlays.get(rid)
 
-                qty_txt = ""
+        if qov and qov["frame"].winfo_exists():
 
-            lp = qty_txt.find("(")
+            qov["frame"].place_forget()
 
-            rp = qty_txt.rfind(")")
+        return
 
-            have_missing = lp != -1 and rp != -1 and (rp > lp)
+    x, y, w, h = bbox
 
-            qty_total = qty_txt[:lp].strip() if have_missing else qty_txt
+    btn_w = metrics["btn_w"]
 
-            qty_missing = qty_txt[lp : rp + 1].strip() if have_missing else ""
+    btn.configure(text="Undo" if done else "Done")
 
-            qov = _qty_overlays.get(rid)
+    btn_h = min(max(h - 2, 20), metrics["btn_h"])
 
-            if have_missing and bbox:
+    y_off = y + max((h - btn_h) // 2, 0)
 
-                if not qov or not qov.get("frame") or (not qov["frame"].winfo_exists()):
+    if rid in CUSTOM_MATS:
 
-                    qf = tk.Frame(materials_tree, bd=0, highlightthickness=0)
+        del_btn = _ensure_row_del_button(rid)
 
-                    l_total = tk.Label(qf, bd=0)
+        del_w = metrics["del_w"]
 
-                    l_missing = tk.Label(qf, bd=0)
+        btn_x = x + max(w - (btn_w + del_w + 10), 0)
 
-                    l_total.pack(side="left", fill="y")
+        del_x = x + max(w - (del_w + 6), 0)
 
-                    l_missing.pack(side="left", fill="y")
+        del_btn.place(x=del_x, y=y_off, width=del_w, height=btn_h)
 
-                    qov = {"frame": qf, "total": l_total, "missing": l_missing}
+        btn.place(x=btn_x, y=y_off, width=btn_w, height=btn_h)
 
-                    _qty_overlays[rid] = qov
+    else:
 
-                qf = qov["frame"]
+        btn.place(x=x + max(w - btn_w - 6, 0), y=y_off, width=btn_w, height=btn_h)
 
-                l_total = qov["total"]
+    cell_bg = THEME_PALETTE.get(
+        "tree_alt" if _mat_index.get(rid, 0) % 2 else "tree_bg", "#111827"
+    )
 
-                l_missing = qov["missing"]
+    overlay = _stacks_overlays.get(rid)
 
-                try:
+    if done and stacks_txt == "-":
 
-                    idx = materials_tree.index(rid)
+        if overlay is None or not overlay.winfo_exists():
 
-                except Exception:
+            if _overlay_pool["stacks"]:
 
-                    idx = 0
+                overlay = _overlay_pool["stacks"].pop()
 
-                cell_bg = THEME_PALETTE.get(
-                    "tree_alt" if idx % 2 else "tree_bg", "#111827"
-                )
+            else:
 
-                total_fg = THEME_PALETTE.get(
-                    "subtext" if rid in DONE_MATS else "text", "#E5E7EB"
-                )
+                overlay = tk.Label(materials_tree, text="-", bd=0, relief="flat")
 
-                missing_fg = (
-                    THEME_PALETTE.get("subtext", "#9CA3AF")
-                    if rid in DONE_MATS
-                    else "#DC2626"
-                )
+            _stacks_overlays[rid] = overlay
 
-                try:
+        sb = materials_tree.bbox(rid, "stacks")
 
-                    fnt = tkfont.nametofont("TkDefaultFont")
+        if sb:
 
-                except Exception:
+            sx, sy, sw, sh = sb
 
-                    fnt = None
+            try:
 
-                try:
+                overlay.configure(
+                    bg=cell_bg,
+                    fg=THEME_PALETTE.get("subtext", "#9CA3AF"),
+                    anchor="center",
+                )
 
-                    if fnt is not None and rid in DONE_MATS:
+            except Exception:
 
-                        done_fnt = fnt.copy()
+                pass
 
-                        done_fnt.configure(overstrike=1)
+            overlay.place(x=sx, y=sy, width=sw, height=sh)
 
-                    else:
+        else:
 
-                        done_fnt = fnt
+            overlay.place_forget()
 
-                except Exception:
+    elif overlay and overlay.winfo_exists():
 
-                    done_fnt = fnt
+        overlay.place_forget()
 
-                for wdg in (qf, l_total, l_missing):
+    qty_total, qty_missing = split_qty(qty_txt)
 
-                    try:
+    have_missing = bool(qty_missing)
 
-                        wdg.configure(bg=cell_bg)
+    qov = _qty_overlays.get(rid)
 
-                    except Exception:
+    if not have_missing:
 
-                        pass
+        if qov and qov["frame"].winfo_exists():
 
-                try:
+            qov["frame"].place_forget()
 
-                    l_total.configure(fg=total_fg, font=done_fnt)
+        return
 
-                    l_missing.configure(fg=missing_fg, font=fnt)
+    if not qov or not qov["frame"].winfo_exists():
 
-                except Exception:
+        if _overlay_pool["qty"]:
 
-                    pass
+            qov = _overlay_pool["qty"].pop()
 
-                try:
+        else:
 
-                    l_total.configure(
-                        text=qty_total + (" " if qty_total and qty_missing else "")
-                    )
+            qf = tk.Frame(materials_tree, bd=0, highlightthickness=0)
 
-                    l_missing.configure(text=qty_missing)
+            l_total = tk.Label(qf, bd=0)
 
-                except Exception:
+            l_missing = tk.Label(qf, bd=0)
 
-                    pass
+            l_total.pack(side="left", fill="y")
 
-                sb = materials_tree.bbox(rid, "qty")
+            l_missing.pack(side="left", fill="y")
 
-                if sb:
+            qov = {"frame": qf, "total": l_total, "missing": l_missing}
 
-                    sx, sy, sw, sh = sb
+        _qty_overlays[rid] = qov
 
-                    try:
+    qf = qov["frame"]
 
-                        tw = (
-                            (fnt.measure(qty_total + " ") if fnt else 0)
-                            if qty_total
-                            else 0
-                        )
+    l_total = qov["total"]
 
-                        mw = (
-                            (fnt.measure(qty_missing) if fnt else 0)
-                            if qty_missing
-                            else 0
-                        )
+    l_missing = qov["missing"]
 
-                        content_w = max(0, tw + mw)
+    total_fg = THEME_PALETTE.get("subtext" if done else "text", "#E5E7EB")
 
-                    except Exception:
+    missing_fg = THEME_PALETTE.get("subtext", "#9CA3AF") if done else "#DC2626"
 
-                        content_w = sw
+    for wdg in (qf, l_total, l_missing):
 
-                    place_w = min(sw, content_w if content_w > 0 else sw)
+        try:
 
-                    x_off = sx + max((sw - place_w) // 2, 0)
+            wdg.configure(bg=cell_bg)
 
-                    qf.place(x=x_off, y=sy, width=place_w, height=sh)
+        except Exception:
 
-                else:
+            pass
 
-                    qf.place_forget()
+    try:
 
-            elif qov and qov.get("frame") and qov["frame"].winfo_exists():
+        l_total.configure(
+            fg=total_fg,
+            font=metrics["done_fnt"] if done else metrics["fnt"],
+            text=qty_total + (" " if qty_total and qty_missing else ""),
+        )
 
-                qov["frame"].place_forget()
+        l_missing.configure(fg=missing_fg, font=metrics["fnt"], text=qty_missing)
 
     except Exception:
 
         pass
 
+    sb = materials_tree.bbox(rid, "qty")
 
-def _refresh_done_buttons():
-
-    current_rows = set(materials_tree.get_children(""))
+    if sb:
 
-    to_remove = [rid for rid in list(_row_done_btns.keys()) if rid not in current_rows]
+        sx, sy, sw, sh = sb
 
-    for rid in to_remove:
+        tw = _measure_text(qty_total + " ") if qty_total else 0
 
-        try:
+        content_w = tw + _measure_text(qty_missing)
 
-            _row_done_btns[rid].place_forget()
+        place_w = min(sw, content_w if content_w > 0 else sw)
 
-            _row_done_btns[rid].destroy()
+        qf.place(x=sx + max((sw - place_w) // 2, 0), y=sy, width=place_w, height=sh)
 
-        except Exception:
+    else:
 
-            pass
+        qf.place_forget()
 
-        _row_done_btns.pop(rid, None)
 
-        try:
+def _release_overlay(kind: str, store: dict, rid: str):
 
-            if rid in _row_del_btns and _row_del_btns[rid].winfo_exists():
+    # Hide a row's overlay and keep the widget for the next row that needs
+    # one instead of destroying it
+    ov = store.pop(rid, None)
 
-                _row_del_btns[rid].place_forget()
+    if ov is None:
 
-                _row_del_btns[rid].destroy()
+        return
 
-        except Exception:
+    _overlay_geom.pop(rid, None)
 
-            pass
+    widget = ov["frame"] if isinstance(ov, dict) else ov
 
-        _row_del_btns.pop(rid, None)
+    try:
 
-    to_remove_ov = [
-        rid for rid in list(_stacks_overlays.keys()) if rid not in current_rows
-    ]
+        if not widget or not widget.winfo_exists():
 
-    for rid in to_remove_ov:
+            return
 
-        try:
+        if len(_overlay_pool[kind]) >= OVERLAY_POOL_MAX:
 
-            _stacks_overlays[rid].place_forget()
+            widget.destroy()
 
-            _stacks_overlays[rid].destroy()
+            return
 
-        except Exception:
+        widget.place_forget()
 
-            pass
+        _overlay_pool[kind].append(ov)
 
-        _stacks_overlays.pop(rid, None)
+    except Exception:
 
-    to_remove_qo = [
-        rid for rid in list(_qty_overlays.keys()) if rid not in current_rows
-    ]
+        pass
 
-    for rid in to_remove_qo:
 
-        try:
+def _refresh_done_buttons():
 
-            fr = _qty_overlays[rid].get("frame")
+    current_rows = set(materials_tree.get_children(""))
 
-            if fr and fr.winfo_exists():
+    for kind, store in (
+        ("done", _row_done_btns),
+        ("del", _row_del_btns),
+        ("stacks", _stacks_overlays),
+        ("qty", _qty_overlays),
+    ):
 
-                fr.place_forget()
+        for rid in [rid for rid in list(store.keys()) if rid not in current_rows]:
 
-                fr.destroy()
+            _release_overlay(kind, store, rid)
 
-        except Exception:
+    for rid in list(_row_del_btns.keys()):
 
-            pass
+        if rid not in CUSTOM_MATS:
 
-        _qty_overlays.pop(rid, None)
+            _release_overlay("del", _row_del_btns, rid)
 
     for rid in current_rows:
 
@@ -2854,17 +3407,12 @@ def _refresh_done_buttons():
 
             _ensure_row_del_button(rid)
 
-    removed_manual_undo = [
-        rid for rid in list(MANUAL_UNDONE) if rid not in current_rows
-    ]
-
-    for rid in removed_manual_undo:
+    # Manual overrides follow the model, not the rows currently materialized
+    for rid in [rid for rid in list(MANUAL_UNDONE) if rid not in _mat_index]:
 
         MANUAL_UNDONE.discard(rid)
 
-    removed_manual_done = [rid for rid in list(MANUAL_DONE) if rid not in current_rows]
-
-    for rid in removed_manual_done:
+    for rid in [rid for rid in list(MANUAL_DONE) if rid not in _mat_index]:
 
         MANUAL_DONE.discard(rid)
 
@@ -2889,7 +3437,7 @@ def _on_row_del_click(row_id: str):
 
         pass
 
-    refresh_materials_view()
+    request_refresh(materials=True)
 
     _schedule_autosave()
 
@@ -2910,7 +3458,7 @@ def _on_materials_click(event):
 
             DONE_MATS.add(row_id)
 
-            refresh_materials_view()
+            request_refresh(materials=True)
 
             _schedule_autosave()
 
@@ -3000,7 +3548,7 @@ def _on_done_click(event=None):
 
         DONE_MATS.add(mat)
 
-    refresh_materials_view()
+    request_refresh(materials=True)
 
     _hide_done_button()
 
@@ -3060,13 +3608,7 @@ def _on_materials_motion(event):
 
         label = "↺"
 
-        try:
-
-            idx = materials_tree.index(row)
-
-        except Exception:
-
-            idx = 0
+        idx = _mat_index.get(row, 0)
 
         cell_bg = THEME_PALETTE.get("tree_alt" if idx % 2 else "tree_bg", "#111827")
 
@@ -3108,10 +3650,28 @@ materials_tree.bind("<ButtonRelease-1>", _layout_done_buttons)
 
 materials_tree.bind("<KeyRelease>", _layout_done_buttons)
 
-materials_tree.bind("<MouseWheel>", _layout_done_buttons)
+materials_tree.bind("<MouseWheel>", _on_mat_wheel)
+
+materials_tree.bind("<Button-4>", _on_mat_wheel)
+
+materials_tree.bind("<Button-5>", _on_mat_wheel)
+
+materials_tree.bind("<Configure>", _on_mat_configure, add="+")
+
+materials_tree.configure(yscrollcommand=_on_mat_tree_scrolled)
+
+for _key in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+
+    materials_tree.bind(_key, _on_mat_key)
 
 materials_tree.bind("<Button-3>", lambda e: _on_materials_context_menu(e))
 
+if materials_grid is not None:
+
+    materials_grid.bind("<Double-1>", _on_materials_double_click)
+
+    materials_grid.bind("<Button-3>", lambda e: _on_materials_context_menu(e))
+
 
 def _init_materials_headers_for_sort():
 
@@ -3150,7 +3710,7 @@ def _on_mat_heading_click(col_key: str):
 
             _mat_sort = (col_key, False)
 
-        refresh_materials_view()
+        request_refresh(materials=True)
 
         try:
 
@@ -3169,7 +3729,7 @@ def _on_materials_context_menu(event):
 
     try:
 
-        row_id = materials_tree.identify_row(event.y)
+        row_id = materials_view.identify_row(event.y)
 
         if not row_id:
 
@@ -3220,17 +3780,28 @@ def _on_pick_image_for_row(row_id: str):
 
         shutil.copyfile(fpath, dst)
 
-        PIC_INDEX[str(row_id).lower()] = dst
+        stem = str(row_id).lower()
+
+        sizes = normalize_user_icon(dst, USER_ICON_CACHE, stem)
+
+        PIC_INDEX[stem] = dst
+
+        ICON_INDEX.add(stem)
 
         try:
 
-            ITEM_IMAGES.pop(row_id, None)
+            record_picture(ICON_MANIFEST_FILE, stem, dst)
 
-        except Exception:
+        except Exception as e:
 
-            pass
+            logging.warning(f"Failed to update icon manifest: {e}")
+
+        # Only this row changes; no full materials refresh
+        photo = tk.PhotoImage(master=root, file=str(sizes[ICON_PX]))
 
-        refresh_materials_view()
+        ITEM_IMAGES.pop(TAGS.resolve(row_id), None)
+
+        _set_row_icon(row_id, photo)
 
         _schedule_autosave()
 
@@ -3259,23 +3830,29 @@ def _open_recipe_peek(item: str, qty: int = 1):
 
         tv.pack(fill="both", expand=True)
 
-        def add(node, it, q):
+        def add(node, it, q, leaf=False):
 
             rid = tv.insert(node, "end", text=format_item_name(it), values=(q,))
 
-            rec = RECIPES.get(it)
+            rec = None if leaf else RECIPES.get(it)
 
             if isinstance(rec, dict):
 
                 for sub, cnt in rec.items():
 
+                    # A tag stands for any member; show its representative
+                    # without expanding that item's recipe
+                    is_tag = TAGS.is_tag(sub)
+
+                    sub = TAGS.resolve(sub)
+
                     try:
 
-                        add(rid, sub, int(cnt) * int(q))
+                        add(rid, sub, int(cnt) * int(q), leaf=is_tag)
 
                     except Exception:
 
-                        add(rid, sub, q)
+                        add(rid, sub, q, leaf=is_tag)
 
         add("", item, qty)
 
@@ -3343,7 +3920,7 @@ def on_add_custom_mat(event=None):
 
         pass
 
-    refresh_materials_view()
+    request_refresh(materials=True)
 
     _schedule_autosave()
 
@@ -3390,4 +3967,19 @@ for i in range(3):
 
     main.columnconfigure(i, weight=1)
 
+STARTUP_UI_MS = (time.perf_counter() - STARTUP_T0) * 1000
+
+startup_profile.mark("ui")
+
+threading.Thread(target=_load_startup_data, name="startup-data", daemon=True).start()
+
+root.after(30, _poll_startup_data)
+
 root.mainloop()
+
+logging.info(f"Icon cache: {ITEM_IMAGES.describe()}")
+
+logging.info(
+    f"View refresh: {REFRESH_STATS['passes']} passes for {REFRESH_STATS['requests']} requests "
+    f"({REFRESH_STATS['coalesced']} coalesced)"
+)
@@ -0,0 +1,795 @@
+import tkinter as tk
+
+import tkinter.font as tkfont
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Set MCCC_MATERIALS_VIEW=canvas to draw the materials table on one Canvas
+# instead of a Treeview with placed Done/Del buttons and qty/stacks overlays.
+VIEW_ENV = "MCCC_MATERIALS_VIEW"
+
+# (key, heading, width, anchor, stretch); "#0" is the icon column
+Column = Tuple[str, str, int, str, bool]
+
+
+def split_qty(text: str) -> Tuple[str, str]:
+
+    # "12 (3)" -> ("12", "(3)"); text without a missing part is all total
+    lp = text.find("(")
+
+    rp = text.rfind(")")
+
+    if lp == -1 or rp == -1 or rp <= lp:
+
+        return text.strip(), ""
+
+    return text[:lp].strip(), text[lp : rp + 1].strip()
+
+
+def column_layout(columns: Sequence[Column], width: int) -> List[Tuple[str, int, int]]:
+
+    # Left-to-right (key, x0, x1); stretch columns share whatever width the
+    # fixed columns leave over
+    fixed = sum(c[2] for c in columns)
+
+    stretch = [c[0] for c in columns if c[4]]
+
+    extra = max(width - fixed, 0)
+
+    share, rem = divmod(extra, len(stretch)) if stretch else (0, 0)
+
+    out = []
+
+    x = 0
+
+    for key, _, w, _, grow in columns:
+
+        if grow:
+
+            w += share + (1 if rem > 0 else 0)
+
+            rem -= 1
+
+        out.append((key, x, x + w))
+
+        x += w
+
+    return out
+
+
+def clamp_first(first: int, total: int, visible: int) -> int:
+
+    return max(0, min(int(first), total - visible))
+
+
+class MaterialsGrid(tk.Canvas):
+
+    # Renders the materials model [(iid, values, tags), ...] on a fixed ring
+    # of row slots, one per visible row. Each slot is a handful of canvas
+    # items tagged "cell" and "s<n>"; scrolling moves every cell in one call
+    # and repaints only the slots that wrapped to the other end, and a row
+    # state change is a few itemconfigure calls on its slot. Done/Del are
+    # rectangles tagged "done_btn"/"del_btn" rather than widgets.
+    #
+    # identify_row, identify_column, bbox and get_children follow the
+    # Treeview signatures so the existing materials handlers work unchanged.
+
+    def __init__(
+        self,
+        master,
+        columns: Sequence[Column],
+        row_height: int,
+        image_for: Callable[[str], object],
+        on_done: Callable[[str], None],
+        on_delete: Callable[[str], None],
+        on_heading: Callable[[str], None],
+        **kw,
+    ):
+
+        kw.setdefault("highlightthickness", 0)
+
+        kw.setdefault("bd", 0)
+
+        kw.setdefault("takefocus", 1)
+
+        super().__init__(master, **kw)
+
+        self.columns = list(columns)
+
+        self.row_height = row_height
+
+        self.header_height = row_height + 4
+
+        self.image_for = image_for
+
+        self.on_done = on_done
+
+        self.on_delete = on_delete
+
+        self.on_heading = on_heading
+
+        self.scroll_command: Optional[Callable[[float, float], None]] = None
+
+        self.model: list = []
+
+        self.index: Dict[str, int] = {}
+
+        self.custom = set()
+
+        self.first = 0
+
+        self.palette: Dict[str, str] = {}
+
+        self._layout: List[Tuple[str, int, int]] = []
+
+        self._actions = (0, 0)
+
+        self._slots: List[Dict[str, int]] = []
+
+        self._slot_row: List[int] = []
+
+        self._painted: List[object] = []
+
+        self._hidden: List[bool] = []
+
+        self._metrics: Dict[str, object] = {}
+
+        self._width = 0
+
+        self._make_header()
+
+        self.bind("<Configure>", self._on_configure)
+
+        self.bind("<Button-1>", lambda e: self.focus_set(), add="+")
+
+        self.bind("<MouseWheel>", self._on_wheel)
+
+        self.bind("<Button-4>", self._on_wheel)
+
+        self.bind("<Button-5>", self._on_wheel)
+
+        for key in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+
+            self.bind(key, self._on_key)
+
+        self.tag_bind("done_btn", "<ButtonRelease-1>", self._on_button)
+
+        self.tag_bind("del_btn", "<ButtonRelease-1>", self._on_button)
+
+    # -- metrics ---------------------------------------------------------
+
+    def _fonts(self) -> Dict[str, object]:
+
+        if self._metrics:
+
+            return self._metrics
+
+        try:
+
+            fnt = tkfont.nametofont("TkDefaultFont")
+
+            done_fnt = fnt.copy()
+
+            done_fnt.configure(overstrike=1)
+
+            head_fnt = tkfont.nametofont("TkHeadingFont")
+
+        except Exception:
+
+            fnt = done_fnt = head_fnt = tkfont.Font(self, size=10)
+
+        btn_w = max(fnt.measure("Done") + 28, fnt.measure("Undo") + 28, 64)
+
+        del_w = max(fnt.measure("Del") + 24, 48)
+
+        btn_h = min(max(self.row_height - 4, 18), int(fnt.metrics("linespace")) + 8)
+
+        self._metrics.update(
+            fnt=fnt,
+            done_fnt=done_fnt,
+            head_fnt=head_fnt,
+            btn_w=btn_w,
+            del_w=del_w,
+            btn_h=btn_h,
+            widths={},
+        )
+
+        return self._metrics
+
+    def _measure(self, text: str) -> int:
+
+        widths = self._fonts()["widths"]
+
+        if text not in widths:
+
+            widths[text] = self._fonts()["fnt"].measure(text) if text else 0
+
+        return widths[text]
+
+    def visible_rows(self) -> int:
+
+        h = self.winfo_height()
+
+        if h <= 1:
+
+            h = int(self.cget("height") or 0)
+
+        return max(1, (h - self.header_height) // self.row_height)
+
+    # -- layout ----------------------------------------------------------
+
+    def _make_header(self):
+
+        for key, text, _, _, _ in self.columns:
+
+            self.create_rectangle(0, 0, 0, 0, width=0, tags=("heading", f"hbg:{key}"))
+
+            self.create_text(0, 0, text=text, tags=("heading", f"htx:{key}", f"h:{key}"))
+
+            self.tag_bind(f"hbg:{key}", "<Button-1>", lambda e, k=key: self._heading(k))
+
+            self.tag_bind(f"htx:{key}", "<Button-1>", lambda e, k=key: self._heading(k))
+
+        self.create_rectangle(0, 0, 0, 0, width=0, tags=("heading", "hbg:actions"))
+
+    def _heading(self, key: str):
+
+        if key != "#0":
+
+            self.on_heading(key)
+
+    def _on_configure(self, event=None):
+
+        width = self.winfo_width()
+
+        slots = self.visible_rows() + 1
+
+        if width == self._width and slots == len(self._slots):
+
+            return
+
+        self._width = width
+
+        self._relayout(slots)
+
+    def _relayout(self, slots: Optional[int] = None):
+
+        m = self._fonts()
+
+        actions_w = m["btn_w"] + m["del_w"] + 16
+
+        self._layout = column_layout(self.columns, max(self._width - actions_w, 0))
+
+        x = self._layout[-1][2] if self._layout else 0
+
+        self._actions = (x, max(self._width, x + actions_w))
+
+        hh = self.header_height
+
+        for key, x0, x1 in self._layout:
+
+            self.coords(f"hbg:{key}", x0, 0, x1, hh)
+
+            self.coords(f"htx:{key}", (x0 + x1) // 2, hh // 2)
+
+        self.coords("hbg:actions", self._actions[0], 0, self._actions[1], hh)
+
+        slots = slots or len(self._slots)
+
+        while len(self._slots) < slots:
+
+            self._make_slot(len(self._slots))
+
+        while len(self._slots) > slots:
+
+            self.delete(f"s{len(self._slots) - 1}")
+
+            self._slots.pop()
+
+            self._slot_row.pop()
+
+            self._painted.pop()
+
+            self._hidden.pop()
+
+        self.tag_raise("heading")
+
+        self.first = clamp_first(self.first, len(self.model), slots - 1)
+
+        for n in range(len(self._slots)):
+
+            self._slot_row[n] = self.first + n
+
+            self._place(n)
+
+        self._update_scrollbar()
+
+    def _make_slot(self, n: int):
+
+        tag = f"s{n}"
+
+        ids = {
+            "bg": self.create_rectangle(0, 0, 0, 0, width=0, tags=("cell", tag)),
+            "img": self.create_image(0, 0, tags=("cell", tag)),
+        }
+
+        for key in ("item", "total", "missing", "stacks", "acq"):
+
+            ids[key] = self.create_text(0, 0, tags=("cell", tag))
+
+        P = self.palette
+
+        for key in ("done", "del"):
+
+            ids[key] = self.create_rectangle(
+                0,
+                0,
+                0,
+                0,
+                fill=P.get("surface", "#111827"),
+                outline=P.get("border", "#1F2937"),
+                activefill=P.get("hover", "#1F2937"),
+                tags=("cell", tag, f"{key}_btn"),
+            )
+
+            # Labels ignore the pointer so the rectangle under them gets the
+            # hover highlight and the click
+            ids[key + "_txt"] = self.create_text(
+                0, 0, state="disabled", tags=("cell", tag, "label")
+            )
+
+        self._slots.append(ids)
+
+        self._slot_row.append(n)
+
+        self._painted.append(None)
+
+        self._hidden.append(False)
+
+    def _slot_top(self, n: int) -> int:
+
+        return self.header_height + (self._slot_row[n] - self.first) * self.row_height
+
+    def _col(self, key: str) -> Tuple[int, int]:
+
+        for k, x0, x1 in self._layout:
+
+            if k == key:
+
+                return x0, x1
+
+        return 0, 0
+
+    def _place(self, n: int):
+
+        # Content-independent geometry of a slot; qty text is placed in _paint
+        ids = self._slots[n]
+
+        m = self._fonts()
+
+        y = self._slot_top(n)
+
+        cy = y + self.row_height // 2
+
+        self.coords(ids["bg"], 0, y, max(self._width, self._actions[1]), y + self.row_height)
+
+        x0, x1 = self._col("#0")
+
+        self.coords(ids["img"], (x0 + x1) // 2, cy)
+
+        x0, x1 = self._col("item")
+
+        self.coords(ids["item"], x0 + 6, cy)
+
+        self.itemconfigure(ids["item"], anchor="w")
+
+        x0, x1 = self._col("stacks")
+
+        self.coords(ids["stacks"], x0 + 6, cy)
+
+        self.itemconfigure(ids["stacks"], anchor="w")
+
+        x0, x1 = self._col("acq")
+
+        self.coords(ids["acq"], (x0 + x1) // 2, cy)
+
+        top = y + (self.row_height - m["btn_h"]) // 2
+
+        right = self._actions[1] - 6
+
+        self.coords(ids["done"], right - m["btn_w"], top, right, top + m["btn_h"])
+
+        self.coords(ids["done_txt"], right - m["btn_w"] // 2, cy)
+
+        left = right - m["btn_w"] - 4
+
+        self.coords(ids["del"], left - m["del_w"], top, left, top + m["btn_h"])
+
+        self.coords(ids["del_txt"], left - m["del_w"] // 2, cy)
+
+        self._painted[n] = None
+
+        self._paint(n)
+
+    def _paint(self, n: int):
+
+        r = self._slot_row[n]
+
+        ids = self._slots[n]
+
+        tag = f"s{n}"
+
+        if r >= len(self.model):
+
+            if not self._hidden[n]:
+
+                self.itemconfigure(tag, state="hidden")
+
+                self._hidden[n] = True
+
+            self._painted[n] = None
+
+            return
+
+        iid, values, tags = self.model[r]
+
+        img = self.image_for(iid)
+
+        key = (iid, values, tags, iid in self.custom, id(img) if img else None)
+
+        if self._painted[n] == key:
+
+            return
+
+        self._painted[n] = key
+
+        P = self.palette
+
+        m = self._fonts()
+
+        done = "done" in tags
+
+        fg = P.get("subtext" if done else "text", "#E5E7EB")
+
+        row_fnt = m["done_fnt"] if done else m["fnt"]
+
+        name, qty, stacks, acq = (list(values) + ["", "", "", ""])[:4]
+
+        total, missing = split_qty(str(qty))
+
+        if self._hidden[n]:
+
+            self.itemconfigure(tag, state="normal")
+
+            self.itemconfigure(f"{tag}&&label", state="disabled")
+
+            self._hidden[n] = False
+
+        self.itemconfigure(
+            ids["bg"], fill=P.get("tree_alt" if "odd" in tags else "tree_bg", "#111827")
+        )
+
+        self.itemconfigure(ids["img"], image=img or "")
+
+        self.itemconfigure(ids["item"], text=name, fill=fg, font=row_fnt)
+
+        self.itemconfigure(ids["total"], text=total, fill=fg, font=row_fnt, anchor="w")
+
+        self.itemconfigure(
+            ids["missing"],
+            text=missing,
+            fill=P.get("subtext", "#9CA3AF") if done else "#DC2626",
+            font=m["fnt"],
+            anchor="w",
+        )
+
+        # Total and missing are centred together in the qty column
+        x0, x1 = self._col("qty")
+
+        tw = self._measure(total + " ") if total and missing else self._measure(total)
+
+        left = (x0 + x1 - tw - self._measure(missing)) // 2
+
+        cy = self._slot_top(n) + self.row_height // 2
+
+        self.coords(ids["total"], left, cy)
+
+        self.coords(ids["missing"], left + tw, cy)
+
+        self.itemconfigure(
+            ids["stacks"],
+            text=stacks,
+            fill=P.get("subtext", "#9CA3AF") if done else fg,
+            font=m["fnt"],
+        )
+
+        self.itemconfigure(ids["acq"], text=acq, fill=fg, font=row_fnt)
+
+        self.itemconfigure(
+            ids["done_txt"], text="Undo" if done else "Done", fill=P.get("text", "#E5E7EB")
+        )
+
+        del_state = "normal" if iid in self.custom else "hidden"
+
+        self.itemconfigure(ids["del"], state=del_state)
+
+        self.itemconfigure(
+            ids["del_txt"],
+            text="Del",
+            fill=P.get("text", "#E5E7EB"),
+            state="disabled" if del_state == "normal" else "hidden",
+        )
+
+    # -- model -----------------------------------------------------------
+
+    def set_model(self, model: list, custom=()):
+
+        self.model = model
+
+        self.index = {iid: i for i, (iid, _, _) in enumerate(model)}
+
+        self.custom = set(custom)
+
+        if not self._slots:
+
+            return
+
+        first = clamp_first(self.first, len(model), len(self._slots) - 1)
+
+        if first != self.first:
+
+            self.first = first
+
+            for n in range(len(self._slots)):
+
+                self._slot_row[n] = first + n
+
+                self._place(n)
+
+        else:
+
+            for n in range(len(self._slots)):
+
+                self._paint(n)
+
+        self._update_scrollbar()
+
+    def set_palette(self, palette: Dict[str, str]):
+
+        self.palette = dict(palette)
+
+        self._metrics.clear()
+
+        P = self.palette
+
+        self.configure(bg=P.get("tree_bg", "#111827"))
+
+        for key, _, _, _, _ in self.columns:
+
+            self.itemconfigure(f"hbg:{key}", fill=P.get("header_bg", "#1F2937"))
+
+            self.itemconfigure(
+                f"htx:{key}",
+                fill=P.get("header_text", "#E5E7EB"),
+                font=self._fonts()["head_fnt"],
+            )
+
+        self.itemconfigure("hbg:actions", fill=P.get("header_bg", "#1F2937"))
+
+        self.itemconfigure(
+            "done_btn||del_btn",
+            fill=P.get("surface", "#111827"),
+            outline=P.get("border", "#1F2937"),
+            activefill=P.get("hover", "#1F2937"),
+        )
+
+        if self._width:
+
+            self._relayout()
+
+    def set_image(self, iid: str, photo):
+
+        r = self.index.get(iid)
+
+        if r is None:
+
+            return
+
+        for n, row in enumerate(self._slot_row):
+
+            if row == r:
+
+                self._painted[n] = None
+
+                self._paint(n)
+
+    # -- scrolling -------------------------------------------------------
+
+    def scroll_to(self, first: int):
+
+        slots = len(self._slots)
+
+        first = clamp_first(first, len(self.model), max(slots - 1, 1))
+
+        d = first - self.first
+
+        if d == 0 or not slots:
+
+            return
+
+        self.first = first
+
+        if abs(d) >= slots:
+
+            for n in range(slots):
+
+                self._slot_row[n] = first + n
+
+                self._place(n)
+
+        else:
+
+            # Rows still in view just shift; slots that fell off one end are
+            # reused for the rows coming in at the other
+            self.move("cell", 0, -d * self.row_height)
+
+            for n in range(slots):
+
+                r = self._slot_row[n]
+
+                if r < first or r >= first + slots:
+
+                    self._slot_row[n] = r + slots if d > 0 else r - slots
+
+                    self._place(n)
+
+        self._update_scrollbar()
+
+    def yview(self, *args):
+
+        try:
+
+            if args[0] == "moveto":
+
+                self.scroll_to(round(float(args[1]) * len(self.model)))
+
+            elif args[0] == "scroll":
+
+                step = self.visible_rows() if args[2] == "pages" else 1
+
+                self.scroll_to(self.first + int(args[1]) * step)
+
+        except Exception:
+
+            pass
+
+    def _update_scrollbar(self):
+
+        if not self.scroll_command:
+
+            return
+
+        total = len(self.model)
+
+        if total <= 0:
+
+            self.scroll_command(0, 1)
+
+            return
+
+        last = min(self.first + self.visible_rows(), total)
+
+        self.scroll_command(self.first / total, last / total)
+
+    def _on_wheel(self, event):
+
+        if getattr(event, "num", None) == 4:
+
+            step = -3
+
+        elif getattr(event, "num", None) == 5:
+
+            step = 3
+
+        else:
+
+            step = -3 if event.delta > 0 else 3
+
+        self.scroll_to(self.first + step)
+
+        return "break"
+
+    def _on_key(self, event):
+
+        page = self.visible_rows()
+
+        target = {
+            "Up": self.first - 1,
+            "Down": self.first + 1,
+            "Prior": self.first - page,
+            "Next": self.first + page,
+            "Home": 0,
+            "End": len(self.model),
+        }.get(event.keysym)
+
+        if target is not None:
+
+            self.scroll_to(target)
+
+        return "break"
+
+    def _on_button(self, event):
+
+        tags = self.gettags("current")
+
+        slot = next((t for t in tags if t.startswith("s") and t[1:].isdigit()), None)
+
+        if slot is None:
+
+            return
+
+        r = self._slot_row[int(slot[1:])]
+
+        if r >= len(self.model):
+
+            return
+
+        iid = self.model[r][0]
+
+        if "done_btn" in tags:
+
+            self.on_done(iid)
+
+        elif "del_btn" in tags:
+
+            self.on_delete(iid)
+
+    # -- Treeview-compatible queries ---------------------------------------
+
+    def get_children(self, item: str = "") -> Tuple[str, ...]:
+
+        rows = self.model[self.first : self.first + len(self._slots)]
+
+        return tuple(iid for iid, _, _ in rows)
+
+    def identify_row(self, y: int) -> str:
+
+        if y < self.header_height:
+
+            return ""
+
+        r = self.first + (int(y) - self.header_height) // self.row_height
+
+        return self.model[r][0] if 0 <= r < len(self.model) else ""
+
+    def identify_column(self, x: int) -> str:
+
+        for i, (_, x0, x1) in enumerate(self._layout):
+
+            if x0 <= x < x1:
+
+                return f"#{i}"
+
+        return ""
+
+    def bbox(self, item, column=None):
+
+        r = self.index.get(item)
+
+        if r is None or not (self.first <= r < self.first + self.visible_rows()):
+
+            return ""
+
+        y = self.header_height + (r - self.first) * self.row_height
+
+        if column is None:
+
+            return (0, y, self._actions[1], self.row_height)
+
+        for i, (key, x0, x1) in enumerate(self._layout):
+
+            if column in (key, f"#{i}"):
+
+                return (x0, y, x1 - x0, self.row_height)
+
+        return ""
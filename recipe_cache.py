@@ -0,0 +1,776 @@
+import hashlib
+
+import json
+
+import logging
+
+import mmap
+
+import os
+
+import struct
+
+import sys
+
+from array import array
+
+from bisect import bisect_left
+
+from collections.abc import Mapping
+
+from pathlib import Path
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CACHE_MAGIC = b"MCRC"
+
+CACHE_VERSION = 3
+
+# magic, version, sha256 of the source file, then the section counts:
+# strings, items, variants, edges, topo order, suggestions, string blob bytes.
+# Sections follow as little-endian u32 arrays so the file can be mapped:
+# string offsets, item ids, name-sorted rows, per-item variant offsets,
+# per-item default variant, variant recipe types, variant yields, variant
+# edge offsets, edge ingredient ids, edge quantities, topo order,
+# suggestions; then the NUL-terminated UTF-8 string blob.
+_HEADER = struct.Struct("<4sI32s7I")
+
+_U32 = "I" if array("I").itemsize == 4 else "L"
+
+# (recipe type, yield, ingredients) for one way of crafting an item
+Variant = Tuple[str, int, Dict[str, int]]
+
+
+class CompiledRecipes:
+
+    def __init__(
+        self,
+        recipes: Dict[str, Dict[str, int]],
+        items: List[str],
+        suggestions: List[str],
+        topo_order: List[str],
+        variants: Optional[Dict[str, List[Variant]]] = None,
+        defaults: Optional[Dict[str, int]] = None,
+    ):
+
+        self.recipes = recipes
+
+        self.items = items
+
+        self.suggestions = suggestions
+
+        self.topo_order = topo_order
+
+        self.variants = variants if variants is not None else {}
+
+        self.defaults = defaults if defaults is not None else {}
+
+    def variants_for(self, name: str) -> List[Variant]:
+
+        if isinstance(self.recipes, MappedRecipes):
+
+            return self.recipes.variants(name)
+
+        if name in self.variants:
+
+            return list(self.variants[name])
+
+        row = self.recipes.get(name)
+
+        return [("", 1, dict(row))] if row is not None else []
+
+    def select_variant(self, name: str, index: int):
+
+        if isinstance(self.recipes, MappedRecipes):
+
+            self.recipes.select_variant(name, index)
+
+            return
+
+        options = self.variants_for(name)
+
+        self.recipes[name] = dict(options[index][2])
+
+        self.defaults[name] = index
+
+    def topo_positions(self) -> Dict[str, int]:
+
+        # item -> position in topo_order, for calculate_requirements(order=...)
+        return {n: i for i, n in enumerate(self.topo_order)}
+
+
+def source_digest(data: bytes) -> bytes:
+
+    return hashlib.sha256(data).digest()
+
+
+def _topological_order(recipes: Dict[str, Dict[str, int]]) -> List[str]:
+
+    # Ingredients come before the items crafted from them; anything caught in
+    # a cycle is appended afterwards in name order.
+
+    nodes = set(recipes.keys())
+
+    for v in recipes.values():
+
+        nodes.update(v.keys())
+
+    pending = {n: 0 for n in nodes}
+
+    users = {n: [] for n in nodes}
+
+    for k, v in recipes.items():
+
+        for sub in v.keys():
+
+            if sub == k:
+
+                continue
+
+            pending[k] += 1
+
+            users[sub].append(k)
+
+    ready = sorted(n for n, c in pending.items() if c == 0)
+
+    order = []
+
+    while ready:
+
+        nxt = []
+
+        for n in ready:
+
+            order.append(n)
+
+            for u in users[n]:
+
+                pending[u] -= 1
+
+                if pending[u] == 0:
+
+                    nxt.append(u)
+
+        ready = sorted(nxt)
+
+    if len(order) < len(nodes):
+
+        seen = set(order)
+
+        order.extend(sorted(n for n in nodes if n not in seen))
+
+    return order
+
+
+def _parse_variants(value) -> List[Variant]:
+
+    # recepies.json rows are either a plain {ingredient: qty} dict or a list
+    # of {"type", "count", "ingredients"} variants, first one being the default.
+
+    if isinstance(value, list):
+
+        out = []
+
+        for v in value:
+
+            if not isinstance(v, dict) or not isinstance(v.get("ingredients"), dict):
+
+                continue
+
+            ings = v["ingredients"]
+
+            out.append(
+                (
+                    str(v.get("type") or ""),
+                    int(v.get("count", 1)),
+                    {str(sk): int(sq) for sk, sq in ings.items()},
+                )
+            )
+
+        return out
+
+    return [("", 1, {str(sk): int(sq) for sk, sq in (value or {}).items()})]
+
+
+def compile_recipes(recipes: Dict[str, object]) -> CompiledRecipes:
+
+    rows = {}
+
+    variants = {}
+
+    for k, v in recipes.items():
+
+        options = _parse_variants(v)
+
+        if not options:
+
+            continue
+
+        rows[str(k)] = dict(options[0][2])
+
+        if len(options) > 1 or options[0][:2] != ("", 1):
+
+            variants[str(k)] = options
+
+    mats = set(rows.keys())
+
+    for v in rows.values():
+
+        mats.update(v.keys())
+
+    for options in variants.values():
+
+        for _, _, ings in options:
+
+            mats.update(ings.keys())
+
+    return CompiledRecipes(
+        rows, sorted(rows.keys()), sorted(mats), _topological_order(rows), variants
+    )
+
+
+def _pack_u32(values) -> bytes:
+
+    arr = array(_U32, values)
+
+    if sys.byteorder == "big":
+
+        arr.byteswap()
+
+    return arr.tobytes()
+
+
+def _unpack_u32(buf, start: int, count: int) -> array:
+
+    arr = array(_U32)
+
+    arr.frombytes(buf[start : start + count * 4])
+
+    if sys.byteorder == "big":
+
+        arr.byteswap()
+
+    return arr
+
+
+def encode_cache(compiled: CompiledRecipes, digest: bytes) -> bytes:
+
+    strings = []
+
+    ids = {}
+
+    def intern(s: str) -> int:
+
+        sid = ids.get(s)
+
+        if sid is None:
+
+            if "\0" in s:
+
+                raise ValueError(f"Cannot cache name containing NUL: {s!r}")
+
+            sid = len(strings)
+
+            ids[s] = sid
+
+            strings.append(s)
+
+        return sid
+
+    item_ids = []
+
+    variant_offsets = [0]
+
+    default_variant = []
+
+    variant_kind = []
+
+    variant_yield = []
+
+    edge_offsets = [0]
+
+    edge_ids = []
+
+    edge_qty = []
+
+    for k in compiled.recipes.keys():
+
+        item_ids.append(intern(k))
+
+        default_variant.append(compiled.defaults.get(k, 0))
+
+        for kind, count, ings in compiled.variants_for(k):
+
+            variant_kind.append(intern(kind))
+
+            variant_yield.append(count)
+
+            for sk, sq in ings.items():
+
+                edge_ids.append(intern(sk))
+
+                edge_qty.append(sq)
+
+            edge_offsets.append(len(edge_ids))
+
+        variant_offsets.append(len(variant_kind))
+
+    rows = {k: i for i, k in enumerate(compiled.recipes.keys())}
+
+    sorted_rows = [rows[k] for k in compiled.items]
+
+    topo_ids = [intern(n) for n in compiled.topo_order]
+
+    suggest_ids = [intern(n) for n in compiled.suggestions]
+
+    encoded = [s.encode("utf-8") for s in strings]
+
+    str_offsets = [0]
+
+    for b in encoded:
+
+        str_offsets.append(str_offsets[-1] + len(b) + 1)
+
+    blob = b"\0".join(encoded) + b"\0"
+
+    header = _HEADER.pack(
+        CACHE_MAGIC,
+        CACHE_VERSION,
+        digest,
+        len(strings),
+        len(item_ids),
+        len(variant_kind),
+        len(edge_ids),
+        len(topo_ids),
+        len(suggest_ids),
+        len(blob),
+    )
+
+    return b"".join(
+        (
+            header,
+            _pack_u32(str_offsets),
+            _pack_u32(item_ids),
+            _pack_u32(sorted_rows),
+            _pack_u32(variant_offsets),
+            _pack_u32(default_variant),
+            _pack_u32(variant_kind),
+            _pack_u32(variant_yield),
+            _pack_u32(edge_offsets),
+            _pack_u32(edge_ids),
+            _pack_u32(edge_qty),
+            _pack_u32(topo_ids),
+            _pack_u32(suggest_ids),
+            blob,
+        )
+    )
+
+
+def _read_header(buf, digest: Optional[bytes]):
+
+    if len(buf) < _HEADER.size:
+
+        return None
+
+    (
+        magic,
+        version,
+        cached_digest,
+        n_str,
+        n_items,
+        n_var,
+        n_edges,
+        n_topo,
+        n_sugg,
+        n_blob,
+    ) = _HEADER.unpack_from(buf, 0)
+
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+
+        return None
+
+    if digest is not None and cached_digest != digest:
+
+        return None
+
+    counts = (
+        n_str + 1,
+        n_items,
+        n_items,
+        n_items + 1,
+        n_items,
+        n_var,
+        n_var,
+        n_var + 1,
+        n_edges,
+        n_edges,
+        n_topo,
+        n_sugg,
+    )
+
+    starts = []
+
+    pos = _HEADER.size
+
+    for count in counts:
+
+        starts.append(pos)
+
+        pos += count * 4
+
+    if pos + n_blob != len(buf):
+
+        return None
+
+    return counts, starts, pos
+
+
+def decode_cache(buf: bytes, digest: bytes) -> Optional[CompiledRecipes]:
+
+    layout = _read_header(buf, digest)
+
+    if layout is None:
+
+        return None
+
+    counts, starts, blob_pos = layout
+
+    (
+        _,
+        item_ids,
+        sorted_rows,
+        variant_offsets,
+        default_variant,
+        variant_kind,
+        variant_yield,
+        edge_offsets,
+        edge_ids,
+        edge_qty,
+        topo_ids,
+        suggest_ids,
+    ) = [_unpack_u32(buf, st, n) for st, n in zip(starts, counts)]
+
+    strings = bytes(buf[blob_pos:]).decode("utf-8").split("\0")
+
+    if len(strings) != counts[0]:
+
+        return None
+
+    edge_names = [strings[i] for i in edge_ids]
+
+    item_names = [strings[i] for i in item_ids]
+
+    recipes = {}
+
+    variants = {}
+
+    defaults = {}
+
+    for row, name in enumerate(item_names):
+
+        v_lo = variant_offsets[row]
+
+        v_hi = variant_offsets[row + 1]
+
+        options = []
+
+        for v in range(v_lo, v_hi):
+
+            lo = edge_offsets[v]
+
+            hi = edge_offsets[v + 1]
+
+            options.append(
+                (
+                    strings[variant_kind[v]],
+                    variant_yield[v],
+                    dict(zip(edge_names[lo:hi], edge_qty[lo:hi])),
+                )
+            )
+
+        pick = default_variant[row]
+
+        recipes[name] = dict(options[pick][2])
+
+        if pick:
+
+            defaults[name] = pick
+
+        if len(options) > 1 or options[0][:2] != ("", 1):
+
+            variants[name] = options
+
+    return CompiledRecipes(
+        recipes,
+        [item_names[r] for r in sorted_rows],
+        [strings[i] for i in suggest_ids],
+        [strings[i] for i in topo_ids],
+        variants,
+        defaults,
+    )
+
+
+class MappedRecipes(Mapping):
+
+    # Read-only recipe mapping served straight from a memory-mapped cache file.
+    # Every process that maps the same file shares its pages; rows are decoded
+    # into small dicts on access only. Lookups return each item's default
+    # variant, which select_variant() can change per process without touching
+    # the file.
+
+    def __init__(self, cache_path: Path, digest: Optional[bytes] = None):
+
+        if sys.byteorder != "little":
+
+            raise ValueError("Mapped recipe store requires a little-endian host")
+
+        self.path = Path(cache_path)
+
+        with open(self.path, "rb") as f:
+
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        layout = _read_header(self._mm, digest)
+
+        if layout is None:
+
+            self._mm.close()
+
+            raise ValueError(f"Stale or invalid recipe cache: {self.path}")
+
+        counts, starts, blob_pos = layout
+
+        # Digest of the source this file was built from; copies made by
+        # pickling check that the file still holds the same data
+        self.digest = _HEADER.unpack_from(self._mm, 0)[2]
+
+        view = memoryview(self._mm)
+
+        words = view[_HEADER.size : blob_pos].cast(_U32)
+
+        cols = []
+
+        for st, n in zip(starts, counts):
+
+            lo = (st - _HEADER.size) // 4
+
+            cols.append(words[lo : lo + n])
+
+        (
+            self._str_offsets,
+            self._item_ids,
+            self._sorted_rows,
+            self._variant_offsets,
+            self._default_variant,
+            self._variant_kind,
+            self._variant_yield,
+            self._edge_offsets,
+            self._edge_ids,
+            self._edge_qty,
+            self._topo_ids,
+            self._suggest_ids,
+        ) = cols
+
+        self._cols = cols + [words]
+
+        self._blob = view[blob_pos:]
+
+        self._selected = {}
+
+    def __reduce__(self):
+
+        return (MappedRecipes, (self.path, self.digest), dict(self._selected))
+
+    def __setstate__(self, selected):
+
+        self._selected = dict(selected)
+
+    def _string(self, sid: int) -> str:
+
+        lo = self._str_offsets[sid]
+
+        hi = self._str_offsets[sid + 1] - 1
+
+        return str(self._blob[lo:hi], "utf-8")
+
+    def _row_name(self, row: int) -> str:
+
+        return self._string(self._item_ids[row])
+
+    def _find_row(self, name) -> Optional[int]:
+
+        if not isinstance(name, str):
+
+            return None
+
+        i = bisect_left(self._sorted_rows, name, key=self._row_name)
+
+        if i < len(self._sorted_rows):
+
+            row = self._sorted_rows[i]
+
+            if self._row_name(row) == name:
+
+                return row
+
+        return None
+
+    def _edges(self, variant: int) -> Dict[str, int]:
+
+        lo = self._edge_offsets[variant]
+
+        hi = self._edge_offsets[variant + 1]
+
+        return {
+            self._string(self._edge_ids[e]): self._edge_qty[e] for e in range(lo, hi)
+        }
+
+    def _row(self, row: int) -> Dict[str, int]:
+
+        pick = self._selected.get(row, self._default_variant[row])
+
+        return self._edges(self._variant_offsets[row] + pick)
+
+    def __getitem__(self, name: str) -> Dict[str, int]:
+
+        row = self._find_row(name)
+
+        if row is None:
+
+            raise KeyError(name)
+
+        return self._row(row)
+
+    def __contains__(self, name) -> bool:
+
+        return self._find_row(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+
+        for row in range(len(self._item_ids)):
+
+            yield self._row_name(row)
+
+    def __len__(self) -> int:
+
+        return len(self._item_ids)
+
+    def variants(self, name: str) -> List[Variant]:
+
+        row = self._find_row(name)
+
+        if row is None:
+
+            return []
+
+        return [
+            (self._string(self._variant_kind[v]), self._variant_yield[v], self._edges(v))
+            for v in range(self._variant_offsets[row], self._variant_offsets[row + 1])
+        ]
+
+    def select_variant(self, name: str, index: int):
+
+        row = self._find_row(name)
+
+        if row is None:
+
+            raise KeyError(name)
+
+        if not 0 <= index < self._variant_offsets[row + 1] - self._variant_offsets[row]:
+
+            raise IndexError(f"{name} has no recipe variant {index}")
+
+        self._selected[row] = index
+
+    def sorted_names(self) -> List[str]:
+
+        return [self._row_name(r) for r in self._sorted_rows]
+
+    def suggestion_names(self) -> List[str]:
+
+        return [self._string(i) for i in self._suggest_ids]
+
+    def topo_names(self) -> List[str]:
+
+        return [self._string(i) for i in self._topo_ids]
+
+    def close(self):
+
+        for mv in self._cols:
+
+            mv.release()
+
+        self._blob.release()
+
+        self._mm.close()
+
+
+def write_cache(cache_path: Path, compiled: CompiledRecipes, digest: bytes):
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = cache_path.with_name(cache_path.name + ".tmp")
+
+    tmp.write_bytes(encode_cache(compiled, digest))
+
+    os.replace(tmp, cache_path)
+
+
+def load_recipes_cached(source: Path, cache_path: Path) -> CompiledRecipes:
+
+    data = Path(source).read_bytes()
+
+    digest = source_digest(data)
+
+    try:
+
+        if cache_path.exists():
+
+            compiled = decode_cache(cache_path.read_bytes(), digest)
+
+            if compiled is not None:
+
+                logging.debug(
+                    f"Loaded {len(compiled.recipes)} recipes from cache {cache_path}"
+                )
+
+                return compiled
+
+            logging.info(f"Recipe cache {cache_path} is stale; rebuilding")
+
+    except Exception as e:
+
+        logging.warning(f"Failed to read recipe cache {cache_path}: {e}")
+
+    compiled = compile_recipes(json.loads(data.decode("utf-8")))
+
+    try:
+
+        write_cache(cache_path, compiled, digest)
+
+    except Exception as e:
+
+        logging.warning(f"Failed to write recipe cache {cache_path}: {e}")
+
+    return compiled
+
+
+def open_mapped_recipes(source: Path, cache_path: Path) -> CompiledRecipes:
+
+    digest = source_digest(Path(source).read_bytes())
+
+    try:
+
+        store = MappedRecipes(cache_path, digest)
+
+    except (OSError, ValueError):
+
+        load_recipes_cached(source, cache_path)
+
+        store = MappedRecipes(cache_path, digest)
+
+    logging.debug(f"Mapped {len(store)} recipes from {cache_path}")
+
+    return CompiledRecipes(
+        store, store.sorted_names(), store.suggestion_names(), store.topo_names()
+    )
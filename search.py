@@ -0,0 +1,634 @@
+import heapq
+
+import tkinter as tk
+
+from array import array
+
+from bisect import bisect_left
+
+from collections import defaultdict
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Every slice of up to GRAM characters has a rank-ordered posting list; each
+# trigram also has a bitset over ranks for longer substrings and typos
+GRAM = 3
+
+# Minimum Dice similarity (shared trigrams) for a typo match to be offered
+FUZZY_MIN = 0.35
+
+# Ranked prefix hits kept per short (< GRAM chars) query, computed on first use
+SHORT_PREFIX_CAP = 256
+
+SUGGEST_ROWS = 6
+
+SUGGEST_DEBOUNCE_MS = 60
+
+# Characters after which a new word starts ("iron_ingot", "Iron Ingot")
+WORD_BREAKS = "_ :/-"
+
+
+def ingredient_counts(recipes) -> Dict[str, int]:
+
+    # How many recipes use each item; commonly used items rank first
+    counts: Dict[str, int] = {}
+
+    for _, ingredients in recipes.items():
+
+        try:
+
+            for name in (ingredients or {}).keys():
+
+                counts[name] = counts.get(name, 0) + 1
+
+        except Exception:
+
+            pass
+
+    return counts
+
+
+def _bitset(ranks) -> int:
+
+    # Ascending ranks -> int with those bits set, via one binary literal
+    if not ranks:
+
+        return 0
+
+    digits = bytearray(b"0") * (ranks[-1] + 1)
+
+    for r in ranks:
+
+        digits[r] = 49
+
+    return int(digits[::-1], 2)
+
+
+def _ranks_of(mask: int, order) -> Iterable[int]:
+
+    # Ids for the set bits of a rank bitset, lowest rank first
+    while mask:
+
+        low = mask & -mask
+
+        yield order[low.bit_length() - 1]
+
+        mask ^= low
+
+
+class SearchIndex:
+
+    # Ranked search over names and optional display names. Every lowercased
+    # name, and every suffix of it that starts a word, is kept in one sorted
+    # key array, so exact, prefix and word-start matches are bisect ranges
+    # (a trie flattened into a sorted array). Slices of up to GRAM characters
+    # have posting lists of ranks, and each trigram a bitset over ranks, so
+    # longer substrings are bitset intersections and typo scores come from
+    # adding bitsets.
+    #
+    # Results come in tiers (exact, prefix, word start, substring, fuzzy);
+    # within a tier ids are ordered by a static rank (usage weight, then
+    # shorter name) and only the top `limit` are kept. Postings and bitsets
+    # are laid out by rank, so each tier stops once it has enough.
+
+    def __init__(
+        self,
+        names: Iterable[str] = (),
+        displays: Optional[Iterable[str]] = None,
+        weights: Optional[Dict[str, int]] = None,
+    ):
+
+        self.names: List[str] = list(names)
+
+        self.lower: List[str] = [n.lower() for n in self.names]
+
+        if displays is None:
+
+            self.display: List[str] = self.lower
+
+        else:
+
+            self.display = [d.lower() for d in displays]
+
+        weights = weights or {}
+
+        order = sorted(
+            range(len(self.names)),
+            key=lambda i: (
+                -weights.get(self.names[i], 0),
+                len(self.lower[i]),
+                self.lower[i],
+            ),
+        )
+
+        self._order = array("I", order)
+
+        self._rank = array("I", bytes(4 * len(order)))
+
+        for r, i in enumerate(order):
+
+            self._rank[i] = r
+
+        entries = []
+
+        self._exact: Dict[str, int] = {}
+
+        grams: Dict[str, List[int]] = defaultdict(list)
+
+        self._ngrams = array("H", bytes(2 * len(order)))
+
+        # Postings hold ranks, appended in order so each list comes out sorted
+        for r, i in enumerate(order):
+
+            low = self.lower[i]
+
+            own = set()
+
+            short = set()
+
+            for s in {low, self.display[i]}:
+
+                self._exact.setdefault(s, i)
+
+                entries.append((s, 1, i))
+
+                for j in range(1, len(s)):
+
+                    if s[j - 1] in WORD_BREAKS and s[j] not in WORD_BREAKS:
+
+                        entries.append((s[j:], 0, i))
+
+                own.update([s[j : j + GRAM] for j in range(len(s) - GRAM + 1)])
+
+                short.update(s)
+
+                for k in range(2, GRAM):
+
+                    short.update([s[j : j + k] for j in range(len(s) - k + 1)])
+
+            for g in own | short:
+
+                grams[g].append(r)
+
+            self._ngrams[i] = min(len(own), 0xFFFF)
+
+        entries.sort()
+
+        self._keys = [e[0] for e in entries]
+
+        # Per key: the owning id's rank, offset by len(names) for word-start
+        # keys, so sorting a prefix range yields full-name matches first and
+        # each group already in rank order
+        n = len(self.names)
+
+        self._entry_rank = array(
+            "I", (self._rank[i] + (0 if full else n) for _, full, i in entries)
+        )
+
+        self._grams = {g: array("I", ranks) for g, ranks in grams.items()}
+
+        self._short: Dict[str, List[int]] = {}
+
+        # Typo scoring works on bitsets over ranks: one per trigram and one
+        # per trigram count a name can have
+        self._masks = {
+            g: _bitset(ranks) for g, ranks in grams.items() if len(g) == GRAM
+        }
+
+        by_count: Dict[int, List[int]] = defaultdict(list)
+
+        for r, i in enumerate(order):
+
+            by_count[self._ngrams[i]].append(r)
+
+        self._counts = sorted(by_count)
+
+        self._count_masks = {k: _bitset(ranks) for k, ranks in by_count.items()}
+
+    def __len__(self) -> int:
+
+        return len(self.names)
+
+    def _range(self, prefix: str):
+
+        lo = bisect_left(self._keys, prefix)
+
+        hi = bisect_left(self._keys, prefix + "\uffff", lo)
+
+        return lo, hi
+
+    def prefix_ids(self, prefix: str) -> List[int]:
+
+        lo, hi = self._range(prefix.lower())
+
+        n = len(self.names)
+
+        return sorted({self._order[r] for r in self._entry_rank[lo:hi] if r < n})
+
+    def _prefix_ranks(self, q: str, lo: int, hi: int, limit: int) -> List[int]:
+
+        # An id maps to two ranks (full name and word start) and one id may
+        # be taken by the exact match, so 2 * limit + 2 distinct ranks are
+        # enough; a rank repeats when both spellings of a name match
+        if len(q) >= GRAM:
+
+            need = 2 * limit + 2
+
+            ranks = heapq.nsmallest(2 * need, self._entry_rank[lo:hi])
+
+            if len(ranks) == hi - lo or len(set(ranks)) >= need:
+
+                return ranks
+
+            return sorted(set(self._entry_rank[lo:hi]))
+
+        # One and two letter prefixes cover a large share of all keys; their
+        # ranked head is static, so sort it once
+        ranks = self._short.get(q)
+
+        if ranks is None:
+
+            ranks = sorted(set(self._entry_rank[lo:hi]))[:SHORT_PREFIX_CAP]
+
+            self._short[q] = ranks
+
+        return ranks
+
+    def _contains(self, q: str, i: int) -> bool:
+
+        return q in self.lower[i] or q in self.display[i]
+
+    def _substring_scan(self, q: str) -> Iterable[int]:
+
+        # Ids containing q in rank order: slices up to GRAM long have exact
+        # postings; longer queries walk the names holding all their trigrams
+        if len(q) <= GRAM:
+
+            return map(self._order.__getitem__, self._grams.get(q, ()))
+
+        mask = -1
+
+        for g in {q[j : j + GRAM] for j in range(len(q) - GRAM + 1)}:
+
+            mask &= self._masks.get(g, 0)
+
+        return (i for i in _ranks_of(mask, self._order) if self._contains(q, i))
+
+    def substring_ids(self, query: str, limit: Optional[int] = None) -> List[int]:
+
+        q = query.lower()
+
+        if not q:
+
+            out = list(range(len(self.names)))
+
+        else:
+
+            out = sorted(self._substring_scan(q))
+
+        return out[:limit] if limit is not None else out
+
+    def _fuzzy(self, q: str, limit: int) -> List[int]:
+
+        # Typo matches by Dice similarity of trigram sets, 2 * shared /
+        # (query trigrams + name trigrams). Shared counts for every name at
+        # once come from adding the trigram bitsets into bit planes; names
+        # with the same shared and own counts score alike, so those buckets
+        # are visited best score first and stop once the top `limit` is set.
+        qgrams = {q[j : j + GRAM] for j in range(len(q) - GRAM + 1)}
+
+        nq = len(qgrams)
+
+        planes: List[int] = []
+
+        for g in qgrams:
+
+            carry = self._masks.get(g, 0)
+
+            for k in range(len(planes)):
+
+                if not carry:
+
+                    break
+
+                planes[k], carry = planes[k] ^ carry, planes[k] & carry
+
+            if carry:
+
+                planes.append(carry)
+
+        shared: Dict[int, int] = {}
+
+        def sharing(v):
+
+            # Ranks of the names sharing exactly v trigrams
+            if v not in shared:
+
+                mask = -1
+
+                for k, plane in enumerate(planes):
+
+                    mask &= plane if v >> k & 1 else ~plane
+
+                shared[v] = mask
+
+            return shared[v]
+
+        counts = self._counts
+
+        heap = []
+
+        for v in range(1, min(nq, (1 << len(planes)) - 1) + 1):
+
+            j = bisect_left(counts, v)
+
+            if j < len(counts):
+
+                heapq.heappush(heap, (-2.0 * v / (nq + counts[j]), v, j))
+
+        found: List[tuple] = []
+
+        while heap:
+
+            score, v, j = heapq.heappop(heap)
+
+            sim = -score
+
+            floor = found[limit - 1][0] if len(found) >= limit else FUZZY_MIN
+
+            if sim < floor:
+
+                break
+
+            if j + 1 < len(counts):
+
+                heapq.heappush(heap, (-2.0 * v / (nq + counts[j + 1]), v, j + 1))
+
+            bucket = sharing(v) & self._count_masks[counts[j]]
+
+            # Lowest set bits are the best ranked names of the bucket
+            for _ in range(limit):
+
+                if not bucket:
+
+                    break
+
+                low = bucket & -bucket
+
+                found.append((sim, low.bit_length() - 1))
+
+                bucket ^= low
+
+        found.sort(key=lambda e: (-e[0], e[1]))
+
+        return [self._order[r] for _, r in found[:limit]]
+
+    def search(self, query: str, limit: int = SUGGEST_ROWS) -> List[str]:
+
+        q = " ".join(query.lower().split())
+
+        if not q or limit <= 0:
+
+            return []
+
+        out: List[int] = []
+
+        seen = set()
+
+        def fill(ids):
+
+            # ids come in rank order: keep the first ones not taken yet
+            for i in ids:
+
+                if i not in seen:
+
+                    out.append(i)
+
+                    seen.add(i)
+
+                    if len(out) >= limit:
+
+                        break
+
+        if q in self._exact:
+
+            fill([self._exact[q]])
+
+        lo, hi = self._range(q)
+
+        if len(out) < limit and hi > lo:
+
+            n = len(self.names)
+
+            fill(self._order[r % n] for r in self._prefix_ranks(q, lo, hi, limit))
+
+        if len(out) < limit:
+
+            fill(self._substring_scan(q))
+
+        if not out and len(q) >= GRAM:
+
+            # Nothing contains the query: treat it as a typo
+            out = self._fuzzy(q, limit)
+
+        return [self.names[i] for i in out[:limit]]
+
+
+class SuggestionPopup:
+
+    # One borderless Toplevel + Listbox per entry, created on first use and
+    # then only withdrawn/shown; the listbox rows are replaced in place and
+    # left alone when the matches did not change.
+
+    def __init__(
+        self,
+        root,
+        entry,
+        on_accept: Callable[[str], None],
+        palette: Optional[Callable[[], Dict[str, str]]] = None,
+        rows: int = SUGGEST_ROWS,
+    ):
+
+        self.root = root
+
+        self.entry = entry
+
+        self.on_accept = on_accept
+
+        self.palette = palette
+
+        self.rows = rows
+
+        self.win = None
+
+        self.listbox = None
+
+        self.items: List[str] = []
+
+        self.is_open = False
+
+        self._colors = None
+
+        self._geometry = None
+
+    def _build(self):
+
+        self.win = tk.Toplevel(self.root)
+
+        self.win.withdraw()
+
+        self.win.wm_overrideredirect(True)
+
+        self.win.attributes("-topmost", True)
+
+        self.listbox = tk.Listbox(
+            self.win,
+            activestyle="dotbox",
+            exportselection=False,
+            selectmode="browse",
+            highlightthickness=0,
+        )
+
+        self.listbox.pack(fill="both", expand=True)
+
+        self.listbox.bind("<Double-Button-1>", self.accept)
+
+        self.listbox.bind("<Return>", self.accept)
+
+    def _apply_colors(self):
+
+        P = self.palette() if self.palette else {}
+
+        colors = (
+            P.get("surface", "#FFFFFF"),
+            P.get("text", "#000000"),
+            P.get("select", "#DBEAFE"),
+        )
+
+        if colors == self._colors:
+
+            return
+
+        self._colors = colors
+
+        self.listbox.configure(
+            bg=colors[0],
+            fg=colors[1],
+            selectbackground=colors[2],
+            selectforeground=colors[1],
+            relief="flat",
+            bd=1,
+        )
+
+    def show(self, items: List[str]):
+
+        if not items:
+
+            self.hide()
+
+            return
+
+        try:
+
+            if self.win is None or not self.win.winfo_exists():
+
+                self.win = None
+
+                self._build()
+
+                self._colors = self._geometry = None
+
+                self.items = []
+
+            self._apply_colors()
+
+            if items != self.items:
+
+                self.listbox.delete(0, "end")
+
+                self.listbox.insert("end", *items)
+
+                self.items = list(items)
+
+            x = self.entry.winfo_rootx()
+
+            y = self.entry.winfo_rooty() + self.entry.winfo_height()
+
+            height = min(self.rows, len(items)) * 20
+
+            geometry = f"{self.entry.winfo_width()}x{height}+{x}+{y}"
+
+            if geometry != self._geometry:
+
+                self.win.geometry(geometry)
+
+                self._geometry = geometry
+
+            if not self.is_open:
+
+                self.win.deiconify()
+
+                self.win.lift()
+
+                self.is_open = True
+
+        except Exception:
+
+            self.hide()
+
+    def hide(self):
+
+        try:
+
+            if self.is_open and self.win is not None:
+
+                self.win.withdraw()
+
+                self.listbox.selection_clear(0, "end")
+
+        except Exception:
+
+            pass
+
+        self.is_open = False
+
+    def accept(self, evt=None):
+
+        if not self.is_open:
+
+            return
+
+        sel = self.listbox.curselection()
+
+        if not sel:
+
+            return
+
+        value = self.listbox.get(sel[0])
+
+        self.hide()
+
+        self.on_accept(value)
+
+    def cycle(self):
+
+        # Tab moves the selection down the list, wrapping at the end
+        sel = self.listbox.curselection()
+
+        idx = (sel[0] + 1) % self.listbox.size() if sel else 0
+
+        self.listbox.selection_clear(0, "end")
+
+        self.listbox.selection_set(idx)
+
+        self.listbox.activate(idx)
+
+        self.listbox.see(idx)
+
+    def focus_list(self):
+
+        if self.is_open:
+
+            self.listbox.focus_set()
+
+            self.listbox.selection_set(0)
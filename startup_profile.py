@@ -0,0 +1,212 @@
+import os
+
+import sys
+
+import threading
+
+import time
+
+from importlib.abc import Loader, MetaPathFinder
+
+from pathlib import Path
+
+from typing import List, Optional, Tuple
+
+# Set MCCC_PROFILE_STARTUP=1 to record per-module import cost (the same
+# self/cumulative numbers `python -X importtime` prints) and per-phase wall
+# time, written to a report file once startup finishes.
+PROFILE_ENV = "MCCC_PROFILE_STARTUP"
+
+_T0 = time.perf_counter()
+
+_FINDER = None
+
+_PHASES: List[Tuple[str, float]] = []
+
+_IMPORTS: List[Tuple[str, float, float, int]] = []
+
+_LOCAL = threading.local()
+
+
+class _TimingLoader(Loader):
+
+    def __init__(self, loader):
+
+        self.loader = loader
+
+    def __getattr__(self, name):
+
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+
+        stack = getattr(_LOCAL, "stack", None)
+
+        if stack is None:
+
+            stack = _LOCAL.stack = []
+
+        # Each frame collects the cumulative time of nested imports so the
+        # module's own (self) time can be split out afterwards
+        stack.append(0.0)
+
+        start = time.perf_counter()
+
+        try:
+
+            self.loader.exec_module(module)
+
+        finally:
+
+            total = time.perf_counter() - start
+
+            children = stack.pop()
+
+            if stack:
+
+                stack[-1] += total
+
+            _IMPORTS.append((module.__name__, total - children, total, len(stack)))
+
+
+class _TimingFinder(MetaPathFinder):
+
+    def find_spec(self, fullname, path, target=None):
+
+        for finder in sys.meta_path:
+
+            if finder is self or not hasattr(finder, "find_spec"):
+
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+
+            if spec is None:
+
+                continue
+
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+
+                spec.loader = _TimingLoader(spec.loader)
+
+            return spec
+
+        return None
+
+
+def enabled() -> bool:
+
+    return _FINDER is not None
+
+
+def install(force: bool = False) -> bool:
+
+    global _FINDER, _T0
+
+    if _FINDER is not None:
+
+        return True
+
+    if not force and os.getenv(PROFILE_ENV, "").strip() in ("", "0"):
+
+        return False
+
+    _T0 = time.perf_counter()
+
+    _FINDER = _TimingFinder()
+
+    sys.meta_path.insert(0, _FINDER)
+
+    return True
+
+
+def uninstall():
+
+    global _FINDER
+
+    if _FINDER is not None:
+
+        try:
+
+            sys.meta_path.remove(_FINDER)
+
+        except ValueError:
+
+            pass
+
+    _FINDER = None
+
+
+def reset():
+
+    _PHASES.clear()
+
+    _IMPORTS.clear()
+
+
+def mark(name: str):
+
+    # Wall time since install(), recorded only while profiling
+    if _FINDER is not None:
+
+        _PHASES.append((name, time.perf_counter() - _T0))
+
+
+def add_phase(name: str, seconds: float):
+
+    if _FINDER is not None:
+
+        _PHASES.append((name, seconds))
+
+
+def imports_by_cost(limit: Optional[int] = None) -> List[Tuple[str, float, float, int]]:
+
+    rows = sorted(_IMPORTS, key=lambda r: r[2], reverse=True)
+
+    return rows[:limit] if limit else rows
+
+
+def format_report(limit: int = 40) -> str:
+
+    lines = ["Startup phases (ms):"]
+
+    for name, seconds in _PHASES:
+
+        lines.append(f"  {name:<24} {seconds * 1000:10.1f}")
+
+    total_self = sum(r[1] for r in _IMPORTS)
+
+    lines.append("")
+
+    lines.append(
+        f"Imports: {len(_IMPORTS)} modules, {total_self * 1000:.1f} ms total self time"
+    )
+
+    lines.append("  self [us] | cumulative | imported package")
+
+    for name, self_s, total_s, depth in imports_by_cost(limit):
+
+        lines.append(
+            f"  {self_s * 1e6:9.0f} | {total_s * 1e6:10.0f} | {'  ' * depth}{name}"
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path: Path, limit: int = 40) -> Optional[Path]:
+
+    if _FINDER is None:
+
+        return None
+
+    path = Path(path)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    path.write_text(format_report(limit), encoding="utf-8")
+
+    return path
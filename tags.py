@@ -0,0 +1,109 @@
+import json
+
+import logging
+
+from pathlib import Path
+
+from typing import Dict, List, Optional
+
+TAG_POLICIES = ("first", "alphabetical")
+
+
+class TagIndex:
+
+    # Maps "#tag" ingredients to one representative member item. Names are
+    # resolved through a single precomputed dict, so lookups are O(1).
+    # Bare tag names (older recepies.json files dropped the "#") resolve too,
+    # unless the name is also a real item that appears in some tag.
+
+    def __init__(
+        self,
+        tags: Dict[str, List[str]],
+        policy: str = "first",
+        preferred: Optional[Dict[str, str]] = None,
+    ):
+
+        if policy not in TAG_POLICIES:
+
+            raise ValueError(f"Unknown tag policy: {policy}")
+
+        self.tags = tags
+
+        self.policy = policy
+
+        self.preferred = dict(preferred or {})
+
+        members = set()
+
+        for items in tags.values():
+
+            members.update(items)
+
+        self._resolved = {}
+
+        for tag, items in tags.items():
+
+            rep = self._pick(tag, items)
+
+            if rep is None:
+
+                continue
+
+            self._resolved["#" + tag] = rep
+
+            if tag not in members:
+
+                self._resolved.setdefault(tag, rep)
+
+    def _pick(self, tag: str, items: List[str]) -> Optional[str]:
+
+        if not items:
+
+            return None
+
+        want = self.preferred.get(tag)
+
+        if want in items:
+
+            return want
+
+        if self.policy == "alphabetical":
+
+            return min(items)
+
+        return items[0]
+
+    def resolve(self, name: str) -> str:
+
+        return self._resolved.get(name, name)
+
+    def is_tag(self, name: str) -> bool:
+
+        return name in self._resolved
+
+    def members(self, name: str) -> List[str]:
+
+        return list(self.tags.get(str(name).lstrip("#"), []))
+
+
+def load_tag_index(
+    path: Path, policy: str = "first", preferred: Optional[Dict[str, str]] = None
+) -> TagIndex:
+
+    try:
+
+        with open(path, "r", encoding="utf-8") as f:
+
+            tags = json.load(f)
+
+    except FileNotFoundError:
+
+        tags = {}
+
+    except Exception as e:
+
+        logging.warning(f"Failed to load tag index {path}: {e}")
+
+        tags = {}
+
+    return TagIndex(tags, policy=policy, preferred=preferred)
@@ -47,6 +47,20 @@ if (-not $hasPyInstaller) {
   }
 }
 
+# Pillow is needed by tools\build_icon_atlas.py below
+Write-Host "Checking for Pillow..."
+& $python -c "import PIL" 2>$null
+$hasPillow = ($LASTEXITCODE -eq 0)
+if (-not $hasPillow) {
+  Write-Host "Installing Pillow..."
+  & $python -m pip install --user pillow
+  & $python -c "import PIL" 2>$null
+  $hasPillow = ($LASTEXITCODE -eq 0)
+  if (-not $hasPillow) {
+    throw "Pillow is not available after installation. Ensure pip installs to the same Python ($python)."
+  }
+}
+
 # Build name (folder and exe base name)
 $appName = 'MCCraftingCalculator'
 
@@ -54,11 +68,18 @@ $appName = 'MCCraftingCalculator'
 if (Test-Path "$repoRoot\dist\$appName") { Remove-Item -Recurse -Force "$repoRoot\dist\$appName" }
 if (Test-Path "$repoRoot\build\$appName") { Remove-Item -Recurse -Force "$repoRoot\build\$appName" }
 
+# Pack pic/*.png into the pre-resized icon atlas shipped in place of pic/
+Write-Host "Building icon atlas..."
+& $python tools\build_icon_atlas.py
+if ($LASTEXITCODE -ne 0) { throw "Icon atlas build failed." }
+
 # Compose --add-data values (use ; separator on Windows)
 $datas = @(
   "recepies.json;.",
+  "tags.json;.",
+  "icon_table.json;.",
   "recepies;recepies",
-  "pic;pic",
+  "icons;icons",
   "LICENSE;.",
   "NOTICE.md;."
 )
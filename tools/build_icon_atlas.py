@@ -0,0 +1,91 @@
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+BASE = Path(__file__).resolve().parents[1]
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+from icons import ATLAS_INDEX_NAME, ATLAS_VERSION, ICON_SIZES, slot_origin
+
+PIC_DIR = BASE / "pic"
+OUT_DIR = BASE / "icons"
+
+
+def collect_icons(pic_dir: Path):
+    # Same keying as the app's picture index: lower-case stem, later files win
+    found = {}
+    for p in sorted(pic_dir.glob("*.png")):
+        found[p.stem.lower()] = p
+    return dict(sorted(found.items()))
+
+
+def thumbnail(path: Path, size: int):
+    # Matches the app's runtime resize so atlas icons look identical
+    img = Image.open(path)
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    return img.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def build_atlas(pic_dir: Path, out_dir: Path, sizes=ICON_SIZES):
+    # One sheet per pyramid size, same slot layout in all of them; every
+    # level is resampled from the source so none is a resize of a resize
+    icons = collect_icons(pic_dir)
+    columns = max(1, math.ceil(math.sqrt(len(icons))))
+    rows = max(1, math.ceil(len(icons) / columns))
+    sheets = {
+        size: Image.new("RGBA", (columns * size, rows * size), (0, 0, 0, 0))
+        for size in sizes
+    }
+    stems = {}
+    for stem, path in icons.items():
+        try:
+            thumbs = {size: thumbnail(path, size) for size in sizes}
+        except Exception as e:
+            print(f"Skipping {path.name}: {e}")
+            continue
+        slot = len(stems)
+        for size, img in thumbs.items():
+            sheets[size].paste(img, slot_origin(slot, columns, size))
+        stems[stem] = slot
+    out_dir.mkdir(parents=True, exist_ok=True)
+    names = {}
+    for size, sheet in sheets.items():
+        names[str(size)] = f"atlas_{size}.png"
+        sheet.save(out_dir / names[str(size)], optimize=True)
+    index = {
+        "version": ATLAS_VERSION,
+        "sheets": names,
+        "columns": columns,
+        "stems": stems,
+    }
+    (out_dir / ATLAS_INDEX_NAME).write_text(
+        json.dumps(index, indent=1, sort_keys=True), encoding="utf-8"
+    )
+    return index
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pack pic/*.png into one icon atlas")
+    ap.add_argument("--pic-dir", type=Path, default=PIC_DIR)
+    ap.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    args = ap.parse_args(argv)
+    if not args.pic_dir.is_dir():
+        print(f"Picture folder not found: {args.pic_dir}")
+        return 1
+    index = build_atlas(args.pic_dir, args.out_dir)
+    total = sum((args.out_dir / n).stat().st_size for n in index["sheets"].values())
+    print(
+        f"Packed {len(index['stems'])} icons at {', '.join(index['sheets'])} px "
+        f"into {args.out_dir} ({total // 1024} KB)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+from icons import IconIndex, scan_pictures
+from recipe_cache import compile_recipes
+
+RECIPES_FILE = BASE / "recepies.json"
+TAGS_FILE = BASE / "tags.json"
+PIC_DIR = BASE / "pic"
+OUT_FILE = BASE / "icon_table.json"
+
+
+def icon_key(name: str) -> str:
+    # Same normalisation load_item_image applies after tag resolution
+    return str(name).lower().replace(" ", "_")
+
+
+def known_names(recipes, tags):
+    # Every name the app can ask an icon for: items, ingredients, tag names
+    # (legacy bare form) and every tag member any policy could pick
+    names = set(compile_recipes(recipes).suggestions)
+    for tag, members in tags.items():
+        names.add(tag)
+        names.update(members)
+    return {icon_key(n.lstrip("#")) for n in names if n}
+
+
+def build_table(recipes, tags, stems):
+    index = IconIndex(stems)
+    return {key: index.resolve(key) for key in sorted(known_names(recipes, tags))}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Freeze item -> icon resolution")
+    ap.add_argument("--out", type=Path, default=OUT_FILE)
+    args = ap.parse_args(argv)
+    recipes = json.loads(RECIPES_FILE.read_text(encoding="utf-8"))
+    try:
+        tags = json.loads(TAGS_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        tags = {}
+    stems = scan_pictures(PIC_DIR, PIC_DIR / "__none__")
+    table = build_table(recipes, tags, stems)
+    # One entry per line so review diffs show exactly which match changed
+    args.out.write_text(
+        json.dumps({"version": 1, "icons": table}, indent=1, ensure_ascii=False) + "\n",
+        encoding="utf-8",
+    )
+    missing = sum(1 for v in table.values() if v is None)
+    print(f"Wrote {len(table)} icon entries to {args.out} ({missing} without an icon)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import argparse
 import json
 import re
 from pathlib import Path
@@ -25,7 +26,24 @@ def load_json(path: Path):
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def main():
+def slot_counts(recipe):
+    counts = {}
+    for slot in recipe:
+        if not slot:
+            continue
+        name = normalize(slot)
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Simplify recepies.json in place")
+    ap.add_argument(
+        "--all-variants",
+        action="store_true",
+        help="keep every variant as {type, count, ingredients} instead of the first",
+    )
+    args = ap.parse_args(argv)
     if not IN_FILE.exists():
         print(f"{IN_FILE} not found")
         return
@@ -39,25 +57,30 @@ def main():
             out[k] = simple
             continue
         if isinstance(val, list):
-            variant = None
-            for v in val:
-                if (
-                    isinstance(v, dict)
-                    and "recipe" in v
-                    and isinstance(v["recipe"], list)
-                ):
-                    variant = v
-                    break
-            if not variant:
+            variants = [
+                v
+                for v in val
+                if isinstance(v, dict) and isinstance(v.get("recipe"), list)
+            ]
+            if not variants:
+                continue
+            if not args.all_variants:
+                out[k] = slot_counts(variants[0]["recipe"])
                 continue
-            recipe = variant["recipe"]
-            counts = {}
-            for slot in recipe:
-                if not slot:
-                    continue
-                name = normalize(slot)
-                counts[name] = counts.get(name, 0) + 1
-            out[k] = counts
+            kept = []
+            for v in variants:
+                try:
+                    count = int(v.get("count", 1))
+                except (TypeError, ValueError):
+                    count = 1
+                kept.append(
+                    {
+                        "type": str(v.get("type") or ""),
+                        "count": count,
+                        "ingredients": slot_counts(v["recipe"]),
+                    }
+                )
+            out[k] = kept
             continue
     IN_FILE.write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8")
     print(
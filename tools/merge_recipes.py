@@ -1,10 +1,16 @@
+import heapq
 import json
+import os
+import tempfile
+from itertools import groupby
 from pathlib import Path
 
 BASE = Path(__file__).resolve().parents[1]
 IN_DIR = BASE / "recepies"
 OUT_FILE = BASE / "recepies.json"
 BACKUP = BASE / "recepies.json.bak"
+# Records buffered in memory before a sorted run is spilled to disk
+RUN_SIZE = 50000
 
 
 def load_json(path: Path):
@@ -15,6 +21,82 @@ def load_json(path: Path):
         return {}
 
 
+def spill_run(buf, tmp_dir: Path, runs):
+    # One JSON line per record: [sort key, key, seq, value is list, value]
+    buf.sort()
+    path = tmp_dir / f"run_{len(runs):05d}.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for rec in buf:
+            f.write(json.dumps(rec, ensure_ascii=False))
+            f.write("\n")
+    runs.append(path)
+    buf.clear()
+
+
+def read_run(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def write_value(out, value):
+    # Same layout as json.dumps(value, indent=2) nested one level deep
+    text = json.dumps(value, indent=2, ensure_ascii=False)
+    out.write(text.replace("\n", "\n    "))
+
+
+def write_merged(out, records):
+    # records arrive sorted by key; values of one key are concatenated in
+    # file order and written element by element, never as one document
+    count = 0
+    out.write("{")
+    for key, group in groupby(records, key=lambda r: r[1]):
+        out.write(",\n" if count else "\n")
+        out.write(f"  {json.dumps(key, ensure_ascii=False)}: ")
+        first = True
+        for _, _, _, is_list, value in group:
+            for item in value if is_list else (value,):
+                out.write(",\n    " if not first else "[\n    ")
+                write_value(out, item)
+                first = False
+        out.write("[]" if first else "\n  ]")
+        count += 1
+    out.write("\n}" if count else "}")
+    return count
+
+
+def merge_files(files, out_path: Path, run_size: int = RUN_SIZE) -> int:
+    # External sort: each file's top-level keys become records, buffered
+    # runs are sorted and spilled, then merged with a k-way heap merge.
+    # Keys sort by (lower, key); the old in-memory merge kept first-seen
+    # order for keys that differ only in case.
+    with tempfile.TemporaryDirectory(dir=out_path.parent) as tmp:
+        tmp_dir = Path(tmp)
+        runs = []
+        buf = []
+        seq = 0
+        for p in files:
+            data = load_json(p)
+            if not isinstance(data, dict):
+                print(f"Skipping {p} (not an object)")
+                continue
+            for k, v in data.items():
+                buf.append([k.lower(), k, seq, isinstance(v, list), v])
+                seq += 1
+                if len(buf) >= run_size:
+                    spill_run(buf, tmp_dir, runs)
+            del data
+        buf.sort()
+        streams = [read_run(p) for p in runs]
+        if buf:
+            streams.append(iter(buf))
+        tmp_out = tmp_dir / out_path.name
+        with open(tmp_out, "w", encoding="utf-8") as out:
+            count = write_merged(out, heapq.merge(*streams))
+        os.replace(tmp_out, out_path)
+    return count
+
+
 def main():
     if not IN_DIR.exists() or not IN_DIR.is_dir():
         print(f"Input folder not found: {IN_DIR}")
@@ -22,32 +104,10 @@ def main():
     if OUT_FILE.exists():
         BACKUP.write_bytes(OUT_FILE.read_bytes())
         print(f"Backed up existing {OUT_FILE.name} -> {BACKUP.name}")
-    merged = {}
     files = sorted([p for p in IN_DIR.iterdir() if p.suffix.lower() == ".json"])
     print(f"Merging {len(files)} files from {IN_DIR}")
-    for p in files:
-        data = load_json(p)
-        if not isinstance(data, dict):
-            print(f"Skipping {p} (not an object)")
-            continue
-        for k, v in data.items():
-            if k in merged and isinstance(merged[k], list) and isinstance(v, list):
-                merged[k].extend(v)
-            elif (
-                k in merged
-                and isinstance(merged[k], list)
-                and (not isinstance(v, list))
-            ):
-                merged[k].append(v)
-            else:
-                merged.setdefault(k, [])
-                if isinstance(v, list):
-                    merged[k].extend(v)
-                else:
-                    merged[k].append(v)
-    out = {k: merged[k] for k in sorted(merged.keys(), key=lambda s: s.lower())}
-    OUT_FILE.write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8")
-    print(f"Wrote merged recipes to {OUT_FILE} ({len(out)} items)")
+    count = merge_files(files, OUT_FILE)
+    print(f"Wrote merged recipes to {OUT_FILE} ({count} items)")
 
 
 if __name__ == "__main__":
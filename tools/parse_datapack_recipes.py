@@ -1,11 +1,27 @@
+import argparse
+import hashlib
 import json
+import os
 import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 BASE = Path(__file__).resolve().parents[1]
 IN_DIR = BASE / "recepies"
 OUT_FILE = BASE / "recepies.json"
 BACKUP = BASE / "recepies.json.bak_dp"
+MANIFEST_FILE = BASE / "recepies.manifest.json"
+TAGS_FILE = BASE / "tags.json"
+MANIFEST_VERSION = 4
+ARCHIVE_SUFFIXES = (".jar", ".zip")
+# 1.21 dropped the plural folder names (recipes/ -> recipe/, tags/items/ ->
+# tags/item/); accept both layouts
+RECIPE_DIRS = ("recipe", "recipes")
+TAG_DIRS = ("tags/item", "tags/items")
+# Below this many files the pool start-up costs more than it saves
+MIN_PARALLEL_FILES = 4000
 
 
 def normalize_item(raw: str) -> str:
@@ -19,12 +35,22 @@ def normalize_item(raw: str) -> str:
     return raw
 
 
+def normalize_tag(raw: str) -> str:
+    return "#" + normalize_item(raw.lstrip("#"))
+
+
 def parse_ingredient_obj(obj):
+    # Tag references keep their "#" so the app can resolve them through the
+    # tag index instead of treating the tag name as an item.
     if isinstance(obj, str):
-        s = obj.lstrip("#")
-        return normalize_item(s)
+        if obj.startswith("#"):
+            return normalize_tag(obj)
+        return normalize_item(obj)
     if isinstance(obj, dict):
-        it = obj.get("item") or obj.get("tag") or obj.get("name")
+        it = obj.get("item")
+        if not it and isinstance(obj.get("tag"), str):
+            return normalize_tag(obj["tag"])
+        it = it or obj.get("name")
         if isinstance(it, dict):
             return None
         return normalize_item(it)
@@ -48,7 +74,10 @@ def extract_result(data: dict):
 
 
 def parse_file(path: Path):
-    j = json.loads(path.read_text(encoding="utf-8"))
+    return parse_recipe(json.loads(path.read_text(encoding="utf-8")))
+
+
+def parse_recipe(j: dict):
     result_name, result_count = extract_result(j)
     if not result_name:
         return (None, None)
@@ -105,31 +134,312 @@ def parse_file(path: Path):
     return (result_name, ingredients_count)
 
 
-def main():
-    if not IN_DIR.exists():
-        print(f"Folder not found: {IN_DIR}")
-        return
-    if OUT_FILE.exists():
-        BACKUP.write_bytes(OUT_FILE.read_bytes())
+def recipe_kind(j: dict) -> str:
+    t = j.get("type", "")
+    return t.split(":", 1)[-1] if isinstance(t, str) else ""
+
+
+def _parse_entry(entry):
+    # -> (result, ingredients, error, recipe type, yield)
+    label, raw = entry
+    try:
+        j = json.loads(raw.decode("utf-8"))
+        res, ic = parse_recipe(j)
+        count = extract_result(j)[1] if res else None
+        return (res, ic, None, recipe_kind(j), count or 1)
+    except Exception as e:
+        return (None, None, f"Failed to parse {label}: {e}", "", 1)
+
+
+def parse_entries(entries, jobs: int):
+    if jobs <= 1 or len(entries) < MIN_PARALLEL_FILES:
+        return [_parse_entry(e) for e in entries]
+    chunksize = max(1, len(entries) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_parse_entry, entries, chunksize=chunksize))
+
+
+def merge_parsed(parsed, all_variants: bool = False):
+    # Default output keeps the first recipe per result; with all_variants
+    # every recipe is kept as {"type", "count", "ingredients"} in file order.
     merged = {}
-    files = sorted([p for p in IN_DIR.rglob("*.json")])
-    print(f"Parsing {len(files)} recipe files...")
-    for p in files:
-        try:
-            res, ic = parse_file(p)
-            if not res:
-                continue
-            if res in merged:
+    for res, ic, err, kind, count in parsed:
+        if err:
+            print(err)
+            continue
+        if not res:
+            continue
+        if all_variants:
+            merged.setdefault(res, []).append(
+                {"type": kind, "count": count, "ingredients": ic}
+            )
+            continue
+        if res in merged:
+            continue
+        merged[res] = ic
+    return merged
+
+
+def print_timings(timings):
+    total = sum(t for _, t in timings)
+    parts = ", ".join(f"{name} {t * 1000:.1f} ms" for name, t in timings)
+    print(f"Timings: {parts} (total {total * 1000:.1f} ms)")
+
+
+def _tag_values(raw: dict):
+    out = []
+    for v in raw.get("values", []):
+        if isinstance(v, dict):
+            v = v.get("id")
+        if not isinstance(v, str) or not v:
+            continue
+        out.append(normalize_tag(v) if v.startswith("#") else normalize_item(v))
+    return out
+
+
+def read_tags(sources, archives: dict):
+    # Tags from every source are merged in priority order; a file with
+    # "replace": true discards what lower-priority sources contributed.
+    raw = {}
+    for src in sources:
+        found = dict(iter_source(Path(src), TAG_DIRS, archives, flat=False))
+        for rid in sorted(found, key=_resource_sort_key):
+            label, _, _, read = found[rid]
+            try:
+                data = json.loads(read().decode("utf-8"))
+            except Exception as e:
+                print(f"Failed to read tag {label}: {e}")
                 continue
-            merged[res] = ic
-        except Exception as e:
-            print(f"Failed to parse {p.name}: {e}")
-    OUT_FILE.write_text(
-        json.dumps(merged, indent=2, ensure_ascii=False), encoding="utf-8"
+            tag = normalize_item(rid[1])
+            if data.get("replace"):
+                raw[tag] = []
+            raw.setdefault(tag, []).extend(_tag_values(data))
+    return raw
+
+
+def flatten_tags(raw: dict):
+    memo = {}
+
+    def expand(tag, active):
+        if tag in memo:
+            return memo[tag]
+        if tag in active:
+            print(f"Tag cycle through #{tag}; ignoring the nested reference")
+            return []
+        active.add(tag)
+        out = []
+        seen = set()
+        for v in raw.get(tag, []):
+            members = expand(v[1:], active) if v.startswith("#") else [v]
+            for it in members:
+                if it not in seen:
+                    seen.add(it)
+                    out.append(it)
+        active.discard(tag)
+        memo[tag] = out
+        return out
+
+    return {tag: expand(tag, set()) for tag in sorted(raw)}
+
+
+def load_manifest(path: Path):
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    if not isinstance(data.get("files"), dict):
+        return {}
+    return data
+
+
+def save_manifest(path: Path, files: dict, all_variants: bool):
+    tmp = path.with_name(path.name + ".tmp")
+    data = {"version": MANIFEST_VERSION, "all_variants": all_variants, "files": files}
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def match_resource(member: str, kind_dirs):
+    parts = member.split("/")
+    if len(parts) < 4 or parts[0] != "data" or not member.endswith(".json"):
+        return None
+    for kind in kind_dirs:
+        kp = kind.split("/")
+        if parts[2 : 2 + len(kp)] == kp and len(parts) > 2 + len(kp):
+            return (parts[1], "/".join(parts[2 + len(kp) :])[:-5])
+    return None
+
+
+def _resource_sort_key(rid):
+    # Same order as sorting the files' Paths (the name keeps its .json), so
+    # "a-b.json" still comes before "a.json" and the same duplicate id wins
+    return (rid[0], (rid[1] + ".json").split("/"))
+
+
+def iter_source(src: Path, kind_dirs, archives: dict, flat: bool = True):
+    # Yields (resource id, (label, manifest key, stamp, reader)) per JSON entry.
+    # Plain folders without data/ are treated as flat recipe folders.
+    if src.is_dir():
+        data_root = src / "data"
+        datapack = data_root.is_dir()
+        if not datapack and not flat:
+            return
+        for p in (data_root if datapack else src).rglob("*.json"):
+            if datapack:
+                rid = match_resource(p.relative_to(src).as_posix(), kind_dirs)
+                if rid is None:
+                    continue
+            else:
+                rid = ("minecraft", p.relative_to(src).as_posix()[:-5])
+            st = p.stat()
+            stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            yield rid, (p.name, str(p), stamp, p.read_bytes)
+        return
+    zf = archives.get(src)
+    if zf is None:
+        zf = archives[src] = zipfile.ZipFile(src)
+    # Only the central directory is consulted here; members that are not
+    # recipes are never decompressed.
+    for info in zf.infolist():
+        if info.is_dir():
+            continue
+        rid = match_resource(info.filename, kind_dirs)
+        if rid is None:
+            continue
+        stamp = {"size": info.file_size, "crc": info.CRC}
+        label = f"{src.name}:{info.filename}"
+        yield rid, (label, f"{src}!{info.filename}", stamp, lambda i=info: zf.read(i))
+
+
+def list_sources(sources, kind_dirs, archives: dict):
+    # Later sources override earlier ones for the same resource id, the same
+    # way a datapack overrides vanilla.
+    found = {}
+    for src in sources:
+        for rid, entry in iter_source(Path(src), kind_dirs, archives):
+            found[rid] = entry
+    return [found[rid] for rid in sorted(found, key=_resource_sort_key)]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Parse datapack recipes into recepies.json")
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes for the parse stage (1 = serial)",
+    )
+    ap.add_argument(
+        "sources",
+        nargs="*",
+        type=Path,
+        help="recipe folders, datapack folders or .jar/.zip archives in priority order (default: recepies/)",
+    )
+    ap.add_argument(
+        "--full",
+        action="store_true",
+        help="ignore the manifest and re-parse every file",
     )
+    ap.add_argument(
+        "--all-variants",
+        action="store_true",
+        help="keep every recipe per item (with type and yield) instead of the first",
+    )
+    args = ap.parse_args(argv)
+    sources = args.sources or [IN_DIR]
+    for src in sources:
+        if not src.is_dir() and not (
+            src.is_file() and src.suffix.lower() in ARCHIVE_SUFFIXES
+        ):
+            print(f"Source not found or unsupported: {src}")
+            return
+    archives = {}
+    try:
+        parse_sources(sources, args, archives)
+    finally:
+        for zf in archives.values():
+            zf.close()
+
+
+def parse_sources(sources, args, archives: dict):
+    timings = []
+    t0 = time.perf_counter()
+    previous = {} if args.full else load_manifest(MANIFEST_FILE)
+    old = previous.get("files", {})
+    old_variants = previous.get("all_variants", False)
+    listed = list_sources(sources, RECIPE_DIRS, archives)
+    t1 = time.perf_counter()
+    timings.append(("list", t1 - t0))
+    print(f"Parsing {len(listed)} recipe files...")
+    manifest = {}
+    entries = []
+    pending = []
+    for label, key, stamp, read in listed:
+        prev = old.get(key)
+        if prev and all(prev.get(k) == v for k, v in stamp.items()):
+            manifest[key] = prev
+            continue
+        try:
+            raw = read()
+        except Exception as e:
+            print(f"Failed to read {label}: {e}")
+            continue
+        digest = hashlib.sha256(raw).hexdigest()
+        rec = dict(stamp, sha256=digest)
+        manifest[key] = rec
+        if prev and prev.get("sha256") == digest and "parsed" in prev:
+            rec["parsed"] = prev["parsed"]
+            continue
+        entries.append((label, raw))
+        pending.append(rec)
+    removed = len([rel for rel in old if rel not in manifest])
+    t2 = time.perf_counter()
+    timings.append(("read", t2 - t1))
+    for rec, parsed in zip(pending, parse_entries(entries, args.jobs)):
+        rec["parsed"] = list(parsed)
+    t3 = time.perf_counter()
+    timings.append(("parse", t3 - t2))
     print(
-        f"Wrote {len(merged)} simplified recipes to {OUT_FILE.name} (backup {(BACKUP.name if BACKUP.exists() else 'none')})"
+        f"Re-parsed {len(entries)} changed/added files, {removed} removed, {len(listed) - len(entries)} unchanged"
+    )
+    merged = merge_parsed(
+        (tuple(rec["parsed"]) for rec in manifest.values()), args.all_variants
     )
+    t4 = time.perf_counter()
+    timings.append(("merge", t4 - t3))
+    if (
+        entries
+        or removed
+        or old.keys() != manifest.keys()
+        or not OUT_FILE.exists()
+        or args.all_variants != old_variants
+    ):
+        if OUT_FILE.exists():
+            BACKUP.write_bytes(OUT_FILE.read_bytes())
+        OUT_FILE.write_text(
+            json.dumps(merged, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        print(
+            f"Wrote {len(merged)} simplified recipes to {OUT_FILE.name} (backup {(BACKUP.name if BACKUP.exists() else 'none')})"
+        )
+    else:
+        print(f"No recipe changes; {OUT_FILE.name} is up to date")
+    try:
+        save_manifest(MANIFEST_FILE, manifest, args.all_variants)
+    except Exception as e:
+        print(f"Failed to write manifest {MANIFEST_FILE.name}: {e}")
+    t5 = time.perf_counter()
+    timings.append(("write", t5 - t4))
+    tags = flatten_tags(read_tags(sources, archives))
+    if tags:
+        TAGS_FILE.write_text(
+            json.dumps(tags, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        print(f"Wrote {len(tags)} flattened item tags to {TAGS_FILE.name}")
+    timings.append(("tags", time.perf_counter() - t5))
+    print_timings(timings)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 from pathlib import Path
+import json
 import sys
 
 # Ensure project root is on sys.path so "code" can be imported when running from tools/
@@ -6,7 +7,9 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from code import calculate_requirements
+from code import aggregate_requirements, calculate_requirements
+from recipe_cache import compile_recipes
+from tags import load_tag_index
 
 
 def test_redstone_torch():
@@ -16,5 +19,62 @@ def test_redstone_torch():
     print("test_redstone_torch passed:", result)
 
 
+def test_tag_ingredients_are_leaf_materials():
+    # A tag ingredient means "any member": its representative is counted as a
+    # material, never expanded through that item's own recipe
+    recipes = json.loads((ROOT / "recepies.json").read_text(encoding="utf-8"))
+    tags = load_tag_index(ROOT / "tags.json")
+    painting = calculate_requirements(recipes, "painting", 1, tags=tags)
+    assert painting == {"oak_planks": 16, "white_wool": 1}
+    composter = aggregate_requirements(recipes, {"composter": 1}, tags=tags)
+    assert composter == {"oak_slab": 7}
+    print("test_tag_ingredients_are_leaf_materials passed:", painting, composter)
+
+
+def test_topological_expansion_matches_recursion():
+    # The cached order expands each item once instead of recursing; totals
+    # must be exactly what the recursive walk produces
+    recipes = json.loads((ROOT / "recepies.json").read_text(encoding="utf-8"))
+    tags = load_tag_index(ROOT / "tags.json")
+    table = compile_recipes(recipes)
+    order = table.topo_positions()
+    for name in table.items:
+        for expand_all in (False, True):
+            for t in (None, tags):
+                try:
+                    want = calculate_requirements(
+                        table.recipes, name, 3, expand_all=expand_all, tags=t
+                    )
+                except ValueError:
+                    continue
+                got = calculate_requirements(
+                    table.recipes, name, 3, expand_all=expand_all, tags=t, order=order
+                )
+                assert got == want, name
+    print("test_topological_expansion_matches_recursion passed")
+
+
+def test_order_falls_back_on_cycles_and_stale_order():
+    recipes = {"a": {"b": 2}, "b": {"c": 3}, "c": {}}
+    order = compile_recipes(recipes).topo_positions()
+    assert calculate_requirements(recipes, "a", 1, order=order) == {"c": 6}
+    # A recipe changed after the order was built: "c" now needs "a"
+    recipes["c"] = {"a": 1}
+    try:
+        calculate_requirements(recipes, "a", 1, order=order)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("cycle not reported")
+    # Items missing from the order still expand recursively
+    recipes["c"] = {"d": 1}
+    recipes["d"] = {"e": 4}
+    assert calculate_requirements(recipes, "a", 1, order=order) == {"e": 24}
+    print("test_order_falls_back_on_cycles_and_stale_order passed")
+
+
 if __name__ == "__main__":
     test_redstone_torch()
+    test_tag_ingredients_are_leaf_materials()
+    test_topological_expansion_matches_recursion()
+    test_order_falls_back_on_cycles_and_stale_order()
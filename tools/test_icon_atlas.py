@@ -0,0 +1,205 @@
+from pathlib import Path
+import json
+import sys
+import tempfile
+
+from PIL import Image
+
+# Ensure project root and tools/ are importable
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS = Path(__file__).resolve().parent
+for p in (ROOT, TOOLS):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from build_icon_atlas import build_atlas, thumbnail
+from build_icon_table import build_table
+from icons import (
+    IconCache,
+    IconIndex,
+    cached_user_icon,
+    decode_icon,
+    decode_user_icon,
+    load_icon_atlas,
+    load_icon_table,
+    load_picture_index,
+    normalize_user_icon,
+    pick_icon_size,
+    record_picture,
+)
+
+
+def test_atlas_slots_match_runtime_thumbnails():
+    with tempfile.TemporaryDirectory() as tmp:
+        pic = Path(tmp) / "pic"
+        pic.mkdir()
+        colors = {"stone": (120, 120, 120, 255), "Oak_Log": (110, 80, 40, 255)}
+        for i, (name, color) in enumerate(colors.items()):
+            Image.new("RGBA", (16, 16 * (i + 1)), color).save(pic / f"{name}.png")
+        Image.new("RGB", (32, 32), (0, 0, 255)).save(pic / "water.png")
+        (pic / "broken.png").write_bytes(b"not a png")
+        index = build_atlas(pic, Path(tmp) / "icons")
+        assert sorted(index["stems"]) == ["oak_log", "stone", "water"]
+        atlas = load_icon_atlas(Path(tmp) / "icons")
+        assert len(atlas) == 3 and "oak_log" in atlas and "broken" not in atlas
+        sheet = Image.open(atlas.image_path)
+        for stem, src in (("oak_log", "Oak_Log"), ("water", "water")):
+            got = sheet.crop(atlas.rect(stem))
+            want = thumbnail(pic / f"{src}.png", atlas.size)
+            assert got.tobytes() == want.tobytes()
+        assert load_icon_atlas(Path(tmp) / "missing") is None
+        big = load_icon_atlas(Path(tmp) / "icons", 48)
+        assert big.size == 48
+        assert big.rect("water") == tuple(v * 48 // 20 for v in atlas.rect("water"))
+        assert Image.open(big.image_path).crop(big.rect("water")).tobytes() == (
+            thumbnail(pic / "water.png", 48).tobytes()
+        )
+        assert load_icon_atlas(Path(tmp) / "icons", 40).size == 48
+        width, height, rgba = decode_icon(pic / "water.png", atlas.size)
+        assert (width, height) == (atlas.size, atlas.size)
+        assert rgba == thumbnail(pic / "water.png", atlas.size).tobytes()
+    print("test_atlas_slots_match_runtime_thumbnails passed")
+
+
+def test_icon_size_follows_tk_scaling():
+    assert pick_icon_size(96 / 72) == 20
+    assert pick_icon_size(72 / 72) == 16
+    assert pick_icon_size(2 * 96 / 72) == 48
+    assert pick_icon_size(1.5 * 96 / 72) == 32
+    assert pick_icon_size("bogus") == 20
+    print("test_icon_size_follows_tk_scaling passed")
+
+
+def test_user_icons_normalized_once_per_size():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "user" / "stone.png"
+        src.parent.mkdir()
+        Image.new("RGB", (300, 200), (10, 200, 30)).save(src)
+        cache = Path(tmp) / "cache" / "user_icons"
+        assert cached_user_icon(src, cache, "stone", 32) is None
+        paths = normalize_user_icon(src, cache, "stone")
+        assert sorted(paths) == [16, 20, 32, 48]
+        assert cached_user_icon(src, cache, "stone", 32) == paths[32]
+        assert Image.open(paths[48]).size == (48, 48)
+        width, height, rgba = decode_user_icon(src, cache, "stone", 20)
+        assert (width, height) == (20, 20)
+        assert rgba == Image.open(paths[20]).convert("RGBA").tobytes()
+    print("test_user_icons_normalized_once_per_size passed")
+
+
+def test_picture_manifest_reused_until_a_directory_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        pic, user = Path(tmp) / "pic", Path(tmp) / "user"
+        pic.mkdir()
+        user.mkdir()
+        for name in ("stone", "dirt"):
+            Image.new("RGBA", (16, 16)).save(pic / f"{name}.png")
+        Image.new("RGBA", (16, 16)).save(user / "Stone.png")
+        manifest = Path(tmp) / "cache" / "icons.json"
+        index = load_picture_index(pic, user, manifest)
+        assert index == {"stone": user / "Stone.png", "dirt": pic / "dirt.png"}
+        # Tamper with the manifest: an unchanged tree must be served from it
+        data = json.loads(manifest.read_text(encoding="utf-8"))
+        data["entries"]["marker"] = [str(pic / "marker.png"), None]
+        manifest.write_text(json.dumps(data), encoding="utf-8")
+        assert "marker" in load_picture_index(pic, user, manifest)
+        Image.new("RGBA", (16, 16)).save(user / "sand.png")
+        index = load_picture_index(pic, user, manifest)
+        assert "marker" not in index and index["sand"] == user / "sand.png"
+        Image.new("RGBA", (16, 16)).save(user / "gravel.png")
+        record_picture(manifest, "gravel", user / "gravel.png")
+        data = json.loads(manifest.read_text(encoding="utf-8"))
+        data["entries"]["marker"] = [str(pic / "marker.png"), None]
+        manifest.write_text(json.dumps(data), encoding="utf-8")
+        index = load_picture_index(pic, user, manifest)
+        assert index["gravel"] == user / "gravel.png" and "marker" in index
+    print("test_picture_manifest_reused_until_a_directory_changes passed")
+
+
+def test_icon_index_fallbacks_and_memo():
+    index = IconIndex(
+        ["stone", "oak_planks", "redstone_torch", "oak_log", "oak_log_top", "cut_sandstone"]
+    )
+    assert index.resolve("stone") == "stone"
+    assert index.resolve("oak_log") == "oak_log"
+    assert index.resolve("torch") == "redstone_torch"
+    assert index.resolve("stone_bricks") == "stone"
+    assert index.resolve("oak_boat") == "oak_planks"
+    assert index.resolve("oak") == "oak_planks"
+    assert index.resolve("sandstone") == "cut_sandstone"
+    assert index.resolve("zzz_block") is None
+    index.add("zzz")
+    assert index.resolve("zzz_block") == "zzz"
+    assert "zzz" in index and len(index) == 7
+    print("test_icon_index_fallbacks_and_memo passed")
+
+
+def test_icon_table_freezes_index_answers():
+    recipes = {
+        "Oak_Boat": {"#planks": 5},
+        "stone_bricks": [{"type": "crafting_shaped", "count": 4, "ingredients": {"stone": 4}}],
+    }
+    tags = {"planks": ["oak_planks", "birch_planks"]}
+    stems = ["stone", "oak_planks", "birch_planks"]
+    table = build_table(recipes, tags, stems)
+    assert table == {
+        "birch_planks": "birch_planks",
+        "oak_boat": "oak_planks",
+        "oak_planks": "oak_planks",
+        "planks": "oak_planks",
+        "stone": "stone",
+        "stone_bricks": "stone",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "icon_table.json"
+        path.write_text(json.dumps({"version": 1, "icons": table}), encoding="utf-8")
+        assert load_icon_table(path) == table
+        assert load_icon_table(Path(tmp) / "missing.json") == {}
+    print("test_icon_table_freezes_index_answers passed")
+
+
+class FakePhoto:
+    def __init__(self, size):
+        self.size = size
+
+    def width(self):
+        return self.size
+
+    def height(self):
+        return self.size
+
+
+def test_icon_cache_bounds_bytes_and_keeps_pinned():
+    shown = {"a"}
+    cache = IconCache(max_bytes=3 * 1600, pinned=lambda: shown)
+    photos = {n: FakePhoto(20) for n in "abcd"}
+    for n in "abc":
+        cache.put(n, photos[n])
+    cache.put("#alias_c", photos["c"])
+    cache.put("missing", None)
+    assert cache.bytes == 3 * 1600 and len(cache) == 5
+    assert cache.lookup("b") == (True, photos["b"])
+    assert cache.lookup("#alias_c") == (True, photos["c"])
+    cache.put("d", photos["d"])
+    # "a" is oldest but pinned; dropping "c" frees nothing while its alias
+    # still holds the image, so "b" goes as well
+    assert "a" in cache and "#alias_c" in cache and "missing" in cache
+    assert "b" not in cache and "c" not in cache
+    assert cache.bytes == 3 * 1600
+    assert cache.lookup("zzz") == (False, None)
+    cache.forget_misses()
+    assert "missing" not in cache
+    st = cache.stats()
+    assert st["images"] == 3 and st["hits"] == 2 and st["misses"] == 1
+    assert st["evictions"] == 2 and "hit rate 66.7%" in cache.describe()
+    print("test_icon_cache_bounds_bytes_and_keeps_pinned passed")
+
+
+if __name__ == "__main__":
+    test_atlas_slots_match_runtime_thumbnails()
+    test_icon_size_follows_tk_scaling()
+    test_user_icons_normalized_once_per_size()
+    test_picture_manifest_reused_until_a_directory_changes()
+    test_icon_index_fallbacks_and_memo()
+    test_icon_table_freezes_index_answers()
+    test_icon_cache_bounds_bytes_and_keeps_pinned()
@@ -0,0 +1,129 @@
+from pathlib import Path
+import sys
+
+# Ensure project root is on sys.path so the app modules can be imported from tools/
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from materials_canvas import MaterialsGrid, clamp_first, column_layout, split_qty
+
+COLUMNS = (
+    ("#0", "Img", 40, "center", False),
+    ("item", "Item", 200, "w", True),
+    ("qty", "Qty (missing)", 120, "center", False),
+    ("acq", "Acquired", 80, "center", False),
+)
+
+
+def test_split_qty():
+    assert split_qty("12 (3)") == ("12", "(3)")
+    assert split_qty("64") == ("64", "")
+    assert split_qty(" 5 ) (") == ("5 ) (", "")
+    print("test_split_qty passed")
+
+
+def test_column_layout_stretches_item_column():
+    cols = column_layout(COLUMNS, 540)
+    assert [c[0] for c in cols] == ["#0", "item", "qty", "acq"]
+    assert cols[1] == ("item", 40, 340)
+    assert cols[-1][2] == 540
+    # Narrower than the fixed widths: nothing shrinks below its width
+    assert column_layout(COLUMNS, 100)[-1][2] == 440
+    print("test_column_layout_stretches_item_column passed")
+
+
+def test_clamp_first():
+    assert clamp_first(5, 100, 20) == 5
+    assert clamp_first(95, 100, 20) == 80
+    assert clamp_first(-3, 100, 20) == 0
+    assert clamp_first(4, 10, 20) == 0
+    print("test_clamp_first passed")
+
+
+def _skip(reason):
+    try:
+        import pytest
+    except ImportError:
+        print(f"skipped: {reason}")
+        return
+    pytest.skip(reason)
+
+
+def _shown_rows(grid):
+    # (y, text) of every slot's item label, top to bottom
+    rows = []
+    for ids in grid._slots:
+        if grid.itemcget(ids["item"], "state") != "hidden":
+            rows.append((grid.coords(ids["item"])[1], grid.itemcget(ids["item"], "text")))
+    return sorted(rows)
+
+
+def test_grid_scroll_and_treeview_queries():
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        _skip("no display")
+        return
+    try:
+        grid = MaterialsGrid(
+            root,
+            COLUMNS,
+            row_height=20,
+            image_for=lambda iid: None,
+            on_done=lambda iid: None,
+            on_delete=lambda iid: None,
+            on_heading=lambda key: None,
+            width=800,
+            height=24 + 5 * 20,
+        )
+        grid.pack()
+        root.update()
+        model = [(f"item{i}", (f"item{i}", "2 (1)", "", "0"), ()) for i in range(50)]
+        grid.set_model(model)
+        root.update()
+        assert grid.visible_rows() == 5
+        assert grid.get_children() == tuple(f"item{i}" for i in range(6))
+
+        # Header, first row, third row and the area past the last column
+        assert grid.identify_row(10) == ""
+        assert grid.identify_row(24) == "item0"
+        assert grid.identify_row(24 + 2 * 20 + 5) == "item2"
+        assert [grid.identify_column(x) for x in (10, 100)] == ["#0", "#1"]
+        assert grid.identify_column(10_000) == ""
+
+        x, y, w, h = grid.bbox("item2")
+        assert (x, y, h) == (0, 64, 20) and w >= 800
+        assert grid.bbox("item2", "qty") == grid.bbox("item2", "#2")
+        assert grid.bbox("item2", "qty")[2:] == (120, 20)
+        assert grid.bbox("item40") == ""
+
+        # A short scroll only wraps the slots that left the top to the bottom
+        grid.scroll_to(3)
+        assert grid.first == 3
+        assert grid.get_children() == tuple(f"item{i}" for i in range(3, 9))
+        assert grid.identify_row(24) == "item3"
+        assert grid.bbox("item2") == ""
+        assert grid.bbox("item4")[1] == 44
+        expected = [(24 + k * 20 + 10, f"item{3 + k}") for k in range(6)]
+        assert _shown_rows(grid) == expected
+
+        # Back up past the start of the ring, then jump beyond the end
+        grid.scroll_to(1)
+        assert _shown_rows(grid) == [(24 + k * 20 + 10, f"item{1 + k}") for k in range(6)]
+        grid.scroll_to(100)
+        assert grid.first == 45
+        assert grid.get_children() == tuple(f"item{i}" for i in range(45, 50))
+        assert _shown_rows(grid) == [(24 + k * 20 + 10, f"item{45 + k}") for k in range(5)]
+    finally:
+        root.destroy()
+    print("test_grid_scroll_and_treeview_queries passed")
+
+
+if __name__ == "__main__":
+    test_split_qty()
+    test_column_layout_stretches_item_column()
+    test_clamp_first()
+    test_grid_scroll_and_treeview_queries()
@@ -0,0 +1,47 @@
+from pathlib import Path
+import json
+import sys
+import tempfile
+
+# Ensure tools/ is on sys.path so the merge script can be imported
+TOOLS = Path(__file__).resolve().parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+from merge_recipes import merge_files
+
+FILES = [
+    {"stick": [{"recipe": ["oak_planks", "oak_planks"]}], "Torch": {"count": 4}},
+    {"stick": {"count": 4}, "empty": [], "coal": "plain"},
+    ["not", "an", "object"],
+    {"torch": [], "stick": [[1, 2], {"nested": {"a": "é"}}]},
+]
+
+
+def test_streaming_merge_matches_in_memory():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = []
+        for i, data in enumerate(FILES):
+            p = tmp / f"{i}.json"
+            p.write_text(json.dumps(data), encoding="utf-8")
+            paths.append(p)
+        merged = {}
+        for data in FILES:
+            if not isinstance(data, dict):
+                continue
+            for k, v in data.items():
+                merged.setdefault(k, []).extend(v if isinstance(v, list) else [v])
+        expected = {k: merged[k] for k in sorted(merged, key=lambda s: (s.lower(), s))}
+        out = tmp / "out.json"
+        assert merge_files(paths, out, run_size=2) == len(expected)
+        assert out.read_text(encoding="utf-8") == json.dumps(
+            expected, indent=2, ensure_ascii=False
+        )
+        assert merge_files([], out) == 0
+        assert out.read_text(encoding="utf-8") == "{}"
+    print("test_streaming_merge_matches_in_memory passed")
+
+
+if __name__ == "__main__":
+    test_streaming_merge_matches_in_memory()
@@ -0,0 +1,243 @@
+from pathlib import Path
+import json
+import os
+import sys
+import tempfile
+import zipfile
+
+# Ensure this folder is on sys.path so the tool modules import when run directly
+TOOLS = Path(__file__).resolve().parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import parse_datapack_recipes as pdr
+
+SHAPED = {
+    "type": "minecraft:crafting_shaped",
+    "key": {"#": "minecraft:acacia_planks"},
+    "pattern": ["# #", "###"],
+    "result": {"count": 1, "id": "minecraft:acacia_boat"},
+}
+
+SHAPELESS = {
+    "type": "minecraft:crafting_shapeless",
+    "ingredients": ["minecraft:stick", "minecraft:redstone"],
+    "result": {"count": 1, "id": "minecraft:redstone_torch"},
+}
+
+
+def _entries(n):
+    out = []
+    for i in range(n):
+        data = dict(SHAPED if i % 2 else SHAPELESS)
+        data["result"] = {"id": f"minecraft:item_{i // 3}"}
+        out.append((f"r{i}.json", json.dumps(data).encode("utf-8")))
+    out.append(("broken.json", b"{not json"))
+    return out
+
+
+def test_parse_recipe_shapes():
+    assert pdr.parse_recipe(SHAPED) == ("acacia_boat", {"acacia_planks": 5})
+    assert pdr.parse_recipe(SHAPELESS) == (
+        "redstone_torch",
+        {"stick": 1, "redstone": 1},
+    )
+
+
+def test_parallel_parse_matches_serial():
+    entries = _entries(40)
+    serial = pdr.parse_entries(entries, 1)
+    old = pdr.MIN_PARALLEL_FILES
+    pdr.MIN_PARALLEL_FILES = 0
+    try:
+        parallel = pdr.parse_entries(entries, 2)
+    finally:
+        pdr.MIN_PARALLEL_FILES = old
+    assert parallel == serial
+    assert serial[-1][2].startswith("Failed to parse broken.json")
+    assert list(pdr.merge_parsed(serial)) == [f"item_{i}" for i in range(14)]
+    variants = pdr.merge_parsed(serial, all_variants=True)
+    assert [v["type"] for v in variants["item_0"]] == [
+        "crafting_shapeless",
+        "crafting_shaped",
+        "crafting_shapeless",
+    ]
+    print("test_parallel_parse_matches_serial passed")
+
+
+def test_archives_layer_in_priority_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        jar = Path(tmp) / "client.jar"
+        pack = Path(tmp) / "pack.zip"
+        with zipfile.ZipFile(jar, "w") as zf:
+            zf.writestr("assets/minecraft/textures/item/stick.png", b"png")
+            zf.writestr("data/minecraft/recipe/acacia_boat.json", json.dumps(SHAPED))
+            zf.writestr("data/minecraft/recipe/torch.json", json.dumps(SHAPELESS))
+        override = dict(SHAPELESS, ingredients=["minecraft:lever"])
+        with zipfile.ZipFile(pack, "w") as zf:
+            zf.writestr("data/minecraft/recipes/torch.json", json.dumps(override))
+        archives = {}
+        listed = pdr.list_sources([jar, pack], pdr.RECIPE_DIRS, archives)
+        labels = [label for label, _, _, _ in listed]
+        parsed = [pdr.parse_recipe(json.loads(read())) for _, _, _, read in listed]
+        for zf in archives.values():
+            zf.close()
+        assert labels == [
+            "client.jar:data/minecraft/recipe/acacia_boat.json",
+            "pack.zip:data/minecraft/recipes/torch.json",
+        ]
+        assert parsed[1] == ("redstone_torch", {"lever": 1})
+    print("test_archives_layer_in_priority_order passed")
+
+
+def test_tags_flatten_and_resolve():
+    with tempfile.TemporaryDirectory() as tmp:
+        jar = Path(tmp) / "client.jar"
+        with zipfile.ZipFile(jar, "w") as zf:
+            zf.writestr(
+                "data/minecraft/tags/item/logs.json",
+                json.dumps({"values": ["#minecraft:oak_logs", "minecraft:crimson_stem"]}),
+            )
+            zf.writestr(
+                "data/minecraft/tags/item/oak_logs.json",
+                json.dumps({"values": ["minecraft:oak_log", {"id": "minecraft:oak_wood"}]}),
+            )
+        archives = {}
+        tags = pdr.flatten_tags(pdr.read_tags([jar], archives))
+        for zf in archives.values():
+            zf.close()
+    assert tags == {
+        "logs": ["oak_log", "oak_wood", "crimson_stem"],
+        "oak_logs": ["oak_log", "oak_wood"],
+    }
+    assert pdr.parse_ingredient_obj("#minecraft:logs") == "#logs"
+    assert pdr.parse_ingredient_obj({"tag": "minecraft:logs"}) == "#logs"
+    sys.path.insert(0, str(TOOLS.parent))
+    from tags import TagIndex
+
+    index = TagIndex(tags)
+    assert index.resolve("#logs") == "oak_log"
+    assert index.resolve("oak_logs") == "oak_log"
+    assert index.resolve("oak_log") == "oak_log"
+    assert TagIndex(tags, policy="alphabetical").resolve("#logs") == "crimson_stem"
+    print("test_tags_flatten_and_resolve passed")
+
+
+def _run(tmp, src, *flags):
+    # Runs the tool with its outputs redirected into tmp; returns the names of
+    # the files it had to parse and the recepies.json it left behind
+    names = ("OUT_FILE", "BACKUP", "MANIFEST_FILE", "TAGS_FILE", "parse_entries")
+    saved = {name: getattr(pdr, name) for name in names}
+    parsed = []
+
+    def counting(entries, jobs):
+        parsed.extend(label for label, _ in entries)
+        return saved["parse_entries"](entries, jobs)
+
+    pdr.OUT_FILE = tmp / "recepies.json"
+    pdr.BACKUP = tmp / "recepies.json.bak_dp"
+    pdr.MANIFEST_FILE = tmp / "recepies.manifest.json"
+    pdr.TAGS_FILE = tmp / "tags.json"
+    pdr.parse_entries = counting
+    try:
+        pdr.main([str(src), "--jobs", "1", *flags])
+    finally:
+        for name, value in saved.items():
+            setattr(pdr, name, value)
+    return sorted(parsed), (tmp / "recepies.json").read_bytes()
+
+
+def _write(path, data, bump=0):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    if bump:
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))
+
+
+def test_incremental_parse_reuses_unchanged_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = tmp / "recipes"
+        src.mkdir()
+        _write(src / "a.json", SHAPED)
+        _write(src / "b.json", SHAPELESS)
+        parsed, first = _run(tmp, src)
+        assert parsed == ["a.json", "b.json"]
+        # Same size and mtime: not even read
+        parsed, out = _run(tmp, src)
+        assert parsed == [] and out == first
+        # New mtime, same bytes: the hash matches and the cached entry is kept
+        _write(src / "a.json", SHAPED, bump=10**9)
+        parsed, out = _run(tmp, src)
+        assert parsed == [] and out == first
+        manifest = json.loads((tmp / "recepies.manifest.json").read_text("utf-8"))
+        rec = manifest["files"][str(src / "a.json")]
+        assert rec["mtime_ns"] == (src / "a.json").stat().st_mtime_ns
+        assert rec["parsed"][0] == "acacia_boat"
+    print("test_incremental_parse_reuses_unchanged_files passed")
+
+
+def test_incremental_output_matches_full_parse():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = tmp / "recipes"
+        src.mkdir()
+        _write(src / "a.json", SHAPED)
+        _write(src / "b.json", SHAPELESS)
+        _write(src / "c.json", dict(SHAPED, result={"id": "minecraft:oak_boat"}))
+        _run(tmp, src)
+        _write(src / "b.json", dict(SHAPELESS, ingredients=["minecraft:lever"]), 10**9)
+        _write(src / "d.json", dict(SHAPELESS, result={"id": "minecraft:torch"}))
+        (src / "c.json").unlink()
+        parsed, incremental = _run(tmp, src)
+        assert parsed == ["b.json", "d.json"]
+        parsed, full = _run(tmp, src, "--full")
+        assert parsed == ["a.json", "b.json", "d.json"]
+        assert incremental == full
+        assert json.loads(full) == {
+            "acacia_boat": {"acacia_planks": 5},
+            "redstone_torch": {"lever": 1},
+            "torch": {"stick": 1, "redstone": 1},
+        }
+    print("test_incremental_output_matches_full_parse passed")
+
+
+def test_all_variants_toggle_rewrites_output():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = tmp / "recipes"
+        src.mkdir()
+        _write(src / "a.json", SHAPED)
+        _write(src / "b.json", dict(SHAPELESS, result={"id": "minecraft:acacia_boat"}))
+        _, simple = _run(tmp, src)
+        parsed, variants = _run(tmp, src, "--all-variants")
+        assert parsed == []
+        assert variants == _run(tmp, src, "--full", "--all-variants")[1]
+        assert len(json.loads(variants)["acacia_boat"]) == 2
+        parsed, back = _run(tmp, src)
+        assert parsed == [] and back == simple
+    print("test_all_variants_toggle_rewrites_output passed")
+
+
+def test_resource_order_matches_path_sort():
+    names = ["a.json", "a-b.json", "a/b.json", "a_b.json", "b/a.json", "a b.json"]
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp)
+        for name in names:
+            (src / name).parent.mkdir(parents=True, exist_ok=True)
+            (src / name).write_text("{}")
+        expected = [str(p) for p in sorted(src.rglob("*.json"))]
+        got = [key for _, key, _, _ in pdr.list_sources([src], pdr.RECIPE_DIRS, {})]
+        assert got == expected, got
+    print("test_resource_order_matches_path_sort passed")
+
+
+if __name__ == "__main__":
+    test_parse_recipe_shapes()
+    test_parallel_parse_matches_serial()
+    test_archives_layer_in_priority_order()
+    test_tags_flatten_and_resolve()
+    test_incremental_parse_reuses_unchanged_files()
+    test_incremental_output_matches_full_parse()
+    test_all_variants_toggle_rewrites_output()
+    test_resource_order_matches_path_sort()
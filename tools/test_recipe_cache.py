@@ -0,0 +1,112 @@
+from pathlib import Path
+import json
+import pickle
+import sys
+import tempfile
+
+# Ensure project root is on sys.path so the app modules can be imported from tools/
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from recipe_cache import MappedRecipes, load_recipes_cached, open_mapped_recipes
+from code import calculate_requirements
+
+SAMPLE = {
+    "redstone_torch": {"stick": 1, "redstone": 1},
+    "stick": {"oak_planks": 2},
+    "oak_planks": {"oak_log": 1},
+    "coal": {},
+}
+
+
+def test_cache_round_trip_and_invalidation():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "recepies.json"
+        cache = Path(tmp) / "cache" / "recipes.bin"
+        src.write_text(json.dumps(SAMPLE), encoding="utf-8")
+        first = load_recipes_cached(src, cache)
+        assert cache.exists()
+        second = load_recipes_cached(src, cache)
+        assert second.recipes == SAMPLE
+        assert list(second.recipes) == list(SAMPLE)
+        assert second.items == sorted(SAMPLE)
+        assert second.suggestions == first.suggestions
+        assert "oak_log" in second.suggestions
+        order = second.topo_order
+        assert order.index("oak_log") < order.index("oak_planks") < order.index("stick")
+        assert order.index("stick") < order.index("redstone_torch")
+        src.write_text(json.dumps({"stick": {"bamboo": 2}}), encoding="utf-8")
+        third = load_recipes_cached(src, cache)
+        assert third.recipes == {"stick": {"bamboo": 2}}
+    print("test_cache_round_trip_and_invalidation passed")
+
+
+def test_mapped_store_matches_dict():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "recepies.json"
+        cache = Path(tmp) / "recipes.bin"
+        src.write_text(json.dumps(SAMPLE), encoding="utf-8")
+        table = open_mapped_recipes(src, cache)
+        store = table.recipes
+        assert isinstance(store, MappedRecipes)
+        assert dict(store.items()) == SAMPLE
+        assert "stick" in store and "oak_log" not in store
+        assert store.get("oak_log") is None
+        assert table.items == sorted(SAMPLE)
+        assert calculate_requirements(
+            store, "redstone_torch", 3, expand_all=True
+        ) == calculate_requirements(SAMPLE, "redstone_torch", 3, expand_all=True)
+        clone = pickle.loads(pickle.dumps(store))
+        assert clone["stick"] == {"oak_planks": 2}
+        clone.close()
+        store.close()
+    print("test_mapped_store_matches_dict passed")
+
+
+def test_variants_kept_and_selectable():
+    recipes = dict(SAMPLE)
+    recipes["stick"] = [
+        {"type": "crafting_shaped", "count": 4, "ingredients": {"oak_planks": 2}},
+        {"type": "crafting_shaped", "count": 1, "ingredients": {"bamboo": 2}},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "recepies.json"
+        cache = Path(tmp) / "recipes.bin"
+        src.write_text(json.dumps(recipes), encoding="utf-8")
+        table = load_recipes_cached(src, cache)
+        assert table.recipes["stick"] == {"oak_planks": 2}
+        assert "bamboo" in table.suggestions
+        assert [v[1] for v in table.variants_for("stick")] == [4, 1]
+        table.select_variant("stick", 1)
+        assert table.recipes["stick"] == {"bamboo": 2}
+        mapped = open_mapped_recipes(src, cache)
+        store = mapped.recipes
+        assert store["stick"] == {"oak_planks": 2}
+        assert store.variants("stick")[1] == ("crafting_shaped", 1, {"bamboo": 2})
+        assert store.variants("coal") == [("", 1, {})]
+        mapped.select_variant("stick", 1)
+        assert store["stick"] == {"bamboo": 2}
+        # A copy in another process keeps the selection and the file check
+        data = pickle.dumps(store)
+        clone = pickle.loads(data)
+        assert clone["stick"] == {"bamboo": 2}
+        assert clone["redstone_torch"] == {"stick": 1, "redstone": 1}
+        clone.close()
+        recipes["coal"] = {"stick": 1}
+        src.write_text(json.dumps(recipes), encoding="utf-8")
+        load_recipes_cached(src, cache)
+        try:
+            pickle.loads(data)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("unpickled a store over a rebuilt cache file")
+        store.close()
+    print("test_variants_kept_and_selectable passed")
+
+
+if __name__ == "__main__":
+    test_cache_round_trip_and_invalidation()
+    test_mapped_store_matches_dict()
+    test_variants_kept_and_selectable()
@@ -0,0 +1,113 @@
+from pathlib import Path
+import json
+import sys
+import time
+
+# Ensure project root is on sys.path so the app modules can be imported from tools/
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from search import SearchIndex
+
+NAMES = sorted(json.loads((ROOT / "recepies.json").read_text(encoding="utf-8")))
+
+
+def test_prefix_and_substring_match_scan():
+    index = SearchIndex(NAMES)
+    for q in ("oak", "iron_", "Stone", "ab", "_b", "x", "slab", "nope_nothing"):
+        low = q.lower()
+        expected = [n for n in NAMES if low in n.lower()]
+        assert [NAMES[i] for i in index.substring_ids(q)] == expected, q
+        prefix = [n for n in NAMES if n.lower().startswith(low)]
+        assert [NAMES[i] for i in index.prefix_ids(q)] == prefix, q
+    print("test_prefix_and_substring_match_scan passed")
+
+
+def test_search_ranks_exact_prefix_word_then_substring():
+    names = ["acacia_log", "birch_log", "log_pile", "stripped_oak_log", "clog"]
+    index = SearchIndex(names)
+    assert index.search("log", limit=3) == ["log_pile", "birch_log", "acacia_log"]
+    assert index.search("log", limit=10)[-1] == "clog"
+    assert index.search("LOG_", limit=10) == ["log_pile"]
+    assert index.search("clog") == ["clog"]
+    assert index.search("") == []
+    assert len(SearchIndex(NAMES).search("a", limit=6)) == 6
+    print("test_search_ranks_exact_prefix_word_then_substring passed")
+
+
+def test_search_uses_weights_display_names_and_typos():
+    names = ["iron_axe", "iron_bars", "iron_ingot", "iron_nugget", "raw_iron"]
+    weights = {"iron_ingot": 40, "iron_nugget": 3}
+    index = SearchIndex(names, [n.replace("_", " ").title() for n in names], weights)
+    assert index.search("iron", limit=3) == ["iron_ingot", "iron_nugget", "iron_axe"]
+    assert index.search("iron", limit=5)[-1] == "raw_iron"
+    assert index.search("iron ing") == ["iron_ingot"]
+    assert index.search("iron_ingto")[0] == "iron_ingot"
+    assert SearchIndex(NAMES).search("diamon_pickaxe")[0] == "diamond_pickaxe"
+    assert index.search("zzzz") == []
+    # One and two letter queries rank their substring tier too
+    ranked = SearchIndex(["axb", "bxc", "cxd"], weights={"cxd": 5})
+    assert ranked.search("x", limit=2) == ["cxd", "axb"]
+    print("test_search_uses_weights_display_names_and_typos passed")
+
+
+def test_typos_rank_like_a_full_scan():
+    index = SearchIndex(NAMES)
+
+    def grams(s):
+        return {s[j : j + 3] for j in range(len(s) - 2)}
+
+    # Without weights the static rank is shorter name, then alphabetical
+    ranked = sorted(NAMES, key=lambda n: (len(n), n))
+    typos = ("diamon_pickax", "stne_brick", "iron_ingto", "polishd_andsite", "rde_wool")
+    for q in typos:
+        qg = grams(q)
+        scored = []
+        for rank, name in enumerate(ranked):
+            shared = len(qg & grams(name))
+            sim = 2.0 * shared / (len(qg) + len(grams(name)))
+            if shared and sim >= 0.35:
+                scored.append((-sim, rank, name))
+        expected = [name for _, _, name in sorted(scored)[:6]]
+        assert index.search(q) == expected, (q, index.search(q), expected)
+    print("test_typos_rank_like_a_full_scan passed")
+
+
+def test_search_is_fast_on_large_list():
+    names = [f"{n}_{k}" for k in range(50) for n in NAMES]
+    index = SearchIndex(names)
+    queries = {
+        "iron_ing": "iron_ingot_",
+        "oak": "oak_",
+        "st": "st",
+        "nd": "nd",
+        "qz": None,
+        "planks_4": "planks_4",
+        "diamon_pickax": "diamond_pickaxe_",
+        "stne_brick": "stone_bricks_",
+        "redstone": "redstone",
+    }
+    slowest = 0.0
+    for q, part in queries.items():
+        times = []
+        for _ in range(3):
+            t = time.perf_counter()
+            found = index.search(q)
+            times.append(time.perf_counter() - t)
+        slowest = max(slowest, min(times))
+        if part is None:
+            assert found == [], (q, found)
+        else:
+            assert len(found) == 6 and all(part in n for n in found), (q, found)
+    # Every tier stops at the limit, so no lookup scans all ~50k names
+    assert slowest < 0.002, slowest
+    print("test_search_is_fast_on_large_list passed")
+
+
+if __name__ == "__main__":
+    test_prefix_and_substring_match_scan()
+    test_search_ranks_exact_prefix_word_then_substring()
+    test_search_uses_weights_display_names_and_typos()
+    test_typos_rank_like_a_full_scan()
+    test_search_is_fast_on_large_list()
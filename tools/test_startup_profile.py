@@ -0,0 +1,45 @@
+from pathlib import Path
+import sys
+import tempfile
+
+# Ensure project root is on sys.path so the app modules can be imported from tools/
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import startup_profile
+
+
+def test_import_hook_records_self_and_cumulative_time():
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, "sp_outer.py").write_text("import sp_inner\nVALUE = sp_inner.VALUE\n")
+        Path(tmp, "sp_inner.py").write_text("VALUE = sum(range(10000))\n")
+        sys.path.insert(0, tmp)
+        startup_profile.reset()
+        try:
+            assert startup_profile.install(force=True)
+            startup_profile.mark("start")
+            import sp_outer
+
+            startup_profile.mark("imported")
+            assert sp_outer.VALUE == sum(range(10000))
+            rows = {r[0]: r for r in startup_profile.imports_by_cost()}
+            outer, inner = rows["sp_outer"], rows["sp_inner"]
+            assert inner[3] == outer[3] + 1
+            assert outer[2] >= inner[2]
+            assert abs(outer[1] - (outer[2] - inner[2])) < 1e-9
+            report = startup_profile.write_report(Path(tmp) / "out" / "profile.txt")
+            text = report.read_text(encoding="utf-8")
+            assert "imported" in text and "sp_inner" in text
+        finally:
+            startup_profile.uninstall()
+            sys.path.remove(tmp)
+            sys.modules.pop("sp_outer", None)
+            sys.modules.pop("sp_inner", None)
+        assert not startup_profile.enabled()
+        assert startup_profile.write_report(Path(tmp) / "none.txt") is None
+    print("test_import_hook_records_self_and_cumulative_time passed")
+
+
+if __name__ == "__main__":
+    test_import_hook_records_self_and_cumulative_time()